@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""Benchmark for parsing a large multi-FASTA file with worker processes.
+
+Generates a synthetic FASTA file of random nucleotide reads and reports
+the time taken by `read_fasta_file` and `read_fasta_alignment` for
+different numbers of worker processes.
+
+Usage:
+    python benchmarks/bench_reader.py [n_records] [record_length]
+
+"""
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+# Import bseq from this checkout when run as a script from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bseq.reader import read_fasta_file, read_fasta_alignment  # pylint: disable=wrong-import-position
+
+
+def write_fasta(path, n_records, record_length, line_width=60):
+    rng = np.random.default_rng(0)
+    bases = np.frombuffer(b'ACGT', dtype=np.uint8)
+    with open(path, 'wb') as f:
+        for i in range(n_records):
+            seq = bases[rng.integers(0, 4, record_length)].tobytes()
+            f.write('>read{} synthetic read\n'.format(i).encode())
+            for j in range(0, record_length, line_width):
+                f.write(seq[j:j+line_width] + b'\n')
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    n_records = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    record_length = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'bench.fasta')
+        write_fasta(path, n_records, record_length)
+        size_mb = os.path.getsize(path) / 1e6
+        print('{} records x {} bp ({:.1f} MB)'.format(
+            n_records, record_length, size_mb))
+        print('{:>8} {:>18} {:>8} {:>23} {:>8}'.format(
+            'workers', 'read_fasta_file', 'speedup',
+            'read_fasta_alignment', 'speedup'))
+        base_file = base_aln = None
+        for workers in [1, 2, 4, 8]:
+            if workers > (os.cpu_count() or 1):
+                break
+            t_file = timed(read_fasta_file, path, workers=workers)
+            t_aln = timed(read_fasta_alignment, path, workers=workers)
+            base_file = base_file or t_file
+            base_aln = base_aln or t_aln
+            print('{:>8} {:>17.2f}s {:>7.2f}x {:>22.2f}s {:>7.2f}x'.format(
+                workers, t_file, base_file / t_file,
+                t_aln, base_aln / t_aln))
+
+
+if __name__ == '__main__':
+    main()
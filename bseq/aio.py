@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""Asynchronous helper functions for reading files.
+
+These functions mirror `iter_fasta` and `read_fasta_alignment` for use
+inside an asyncio event loop, for example in a web service receiving
+uploaded sequences. Input is consumed in chunks, control is returned to
+the event loop between chunks, and CPU-heavy parsing and matrix building
+run in an executor so that other tasks are not blocked.
+
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import os
+from bseq.alignment import AlignmentBuilder
+from bseq.compression import open_binary
+from bseq.reader import DEFAULT_CHUNK_SIZE, _FastaChunkParser, \
+    _sequence_class, _alignment_class, _make_sequence, _parse_header, \
+    read_fasta_alignment
+
+
+def _check_executor(executor):
+    """Raises TypeError unless the executor runs its tasks in threads of
+    this process. The parser and the alignment builder keep their state
+    between chunks, which a process pool would not see.
+    """
+    if executor is not None and \
+            not isinstance(executor, ThreadPoolExecutor):
+        raise TypeError('executor must be a ThreadPoolExecutor.')
+
+
+async def _aiter_path_chunks(path, chunk_size, executor):
+    """Reads chunks of a file, decompressing it if needed,
+    without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    f = await loop.run_in_executor(executor, open_binary, path)
+    try:
+        while True:
+            chunk = await loop.run_in_executor(executor, f.read, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        f.close()
+
+
+async def _aiter_chunks(source, chunk_size, executor):
+    """Yields chunks of bytes from a path, an object with an asynchronous
+    `read` method, or an asynchronous iterable of bytes.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        async for chunk in _aiter_path_chunks(source, chunk_size, executor):
+            yield chunk
+    elif hasattr(source, 'read'):
+        while True:
+            chunk = await source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    elif hasattr(source, '__aiter__'):
+        async for chunk in source:
+            if chunk:
+                yield chunk
+    else:
+        raise TypeError('source must be a path, an asynchronous stream, or '
+                        'an asynchronous iterable of bytes.')
+
+
+async def aiter_fasta(source, seq_type='nucleotide',
+                      chunk_size=DEFAULT_CHUNK_SIZE, executor=None):
+    """Asynchronously reads FASTA records one at a time.
+
+    Parameters
+    ----------
+    source : str, asynchronous stream, or asynchronous iterable of bytes
+        Path to the FASTA file, an object with an asynchronous `read`
+        method such as `asyncio.StreamReader` or an aiohttp request
+        body, or an asynchronous iterable yielding chunks of bytes.
+        Files may be compressed with gzip, BGZF, xz or bzip2.
+    seq_type : str, optional
+        Type of sequence expected. Choices are 'nucleotide',
+        'protein', or 'codon'.
+    chunk_size : int, optional
+        Number of bytes requested from the source at a time.
+    executor : concurrent.futures.ThreadPoolExecutor, optional
+        Executor used for file access and parsing. By default, the
+        event loop's default executor is used. Process pools are not
+        supported, because the parser keeps its state between chunks.
+
+    Yields
+    ------
+    Sequence
+        NuclSequence, ProtSequence or CodonSequence depending on
+        `seq_type`.
+
+    Raises
+    ------
+    TypeError
+        If `executor` is not a ThreadPoolExecutor.
+
+    See also
+    --------
+    bseq.reader.iter_fasta
+
+    """
+    seq_class = _sequence_class(seq_type)
+    _check_executor(executor)
+    loop = asyncio.get_running_loop()
+    parser = _FastaChunkParser()
+    async for chunk in _aiter_chunks(source, chunk_size, executor):
+        raw_records = await loop.run_in_executor(executor, parser.feed, chunk)
+        for header, seq in raw_records:
+            yield _make_sequence(seq_class, header, seq)
+        await asyncio.sleep(0)
+    for header, seq in await loop.run_in_executor(executor, parser.close):
+        yield _make_sequence(seq_class, header, seq)
+
+
+async def aread_fasta_alignment(source, seq_type='nucleotide',
+                                name=None, description=None,
+                                chunk_size=DEFAULT_CHUNK_SIZE, executor=None):
+    """Asynchronously reads a FASTA alignment into an Alignment object.
+
+    Parameters
+    ----------
+    source : str, asynchronous stream, or asynchronous iterable of bytes
+        Path to the FASTA file, an object with an asynchronous `read`
+        method, or an asynchronous iterable yielding chunks of bytes.
+        See `aiter_fasta`.
+    seq_type : str, optional
+        Type of sequence expected. Choices are 'nucleotide',
+        'protein', or 'codon'.
+    name : str, optional
+        Name of the alignment.
+    description : str, optional
+        Description of the alignment.
+    chunk_size : int, optional
+        Number of bytes requested from the source at a time.
+    executor : concurrent.futures.ThreadPoolExecutor, optional
+        Executor used to parse the chunks and write the sequences into
+        the alignment matrix. By default, the event loop's default
+        executor is used. Process pools are not supported.
+
+    Returns
+    -------
+    Alignment
+
+    Raises
+    ------
+    TypeError
+        If `executor` is not a ThreadPoolExecutor.
+
+    See also
+    --------
+    bseq.reader.read_fasta_alignment
+
+    """
+    _alignment_class(seq_type)
+    _check_executor(executor)
+    loop = asyncio.get_running_loop()
+    if isinstance(source, (str, os.PathLike)):
+        return await loop.run_in_executor(
+            executor, lambda: read_fasta_alignment(
+                source, seq_type=seq_type, name=name,
+                description=description))
+    # Records are parsed and written into the matrix as chunks arrive, so
+    # the whole input is never held in memory
+    parser = _FastaChunkParser()
+    builder = AlignmentBuilder(name, seq_type, description=description)
+
+    def add_records(raw_records):
+        for header, seq in raw_records:
+            seq_name, seq_description = _parse_header(header)
+            builder._add_codes(seq_name, seq, seq_description)  # pylint: disable=protected-access
+
+    async for chunk in _aiter_chunks(source, chunk_size, executor):
+        await loop.run_in_executor(
+            executor, lambda chunk=chunk: add_records(parser.feed(chunk)))
+        await asyncio.sleep(0)
+    await loop.run_in_executor(
+        executor, lambda: add_records(parser.close()))
+    return await loop.run_in_executor(executor, builder.build)
@@ -19,16 +19,123 @@ and add in the sequences automatically.
 
 """
 from collections import namedtuple
-from copy import deepcopy
+from copy import copy
+import io
+import json
+import struct
 import numpy as np
 from bseq.sequence import Sequence, NuclSequence, CodonSequence
-from bseq.marker import Marker
-from bseq.formatter import fasta_formatted_string
+from bseq.marker import Marker, GapMarker, ConsAlignMarker
+from bseq.distance import distance_matrix
+from bseq.writer import write_fasta
 
 
 SequenceAnnotation = namedtuple('SequenceAnnotation',
                                 'name, description, seq_type')
 
+# Binary alignment container: magic bytes, format version and header
+# length, followed by a JSON header and the raw alignment matrix. The
+# matrix starts at a multiple of _BINARY_ALIGN bytes so that it can be
+# memory-mapped directly.
+_BINARY_MAGIC = b'BSEQALN\x00'
+_BINARY_VERSION = 1
+_BINARY_PREFIX = struct.Struct('<8sIQ')
+_BINARY_ALIGN = 64
+
+_MARKER_CLASSES = {
+    cls.__name__: cls for cls in (Marker, GapMarker, ConsAlignMarker)
+}
+
+SiteStats = namedtuple(
+    'SiteStats',
+    'alphabet, counts, gaps, ambiguous, major, minor, entropy, segregating')
+
+# Alleles counted by site_stats. Lowercase characters are counted with
+# uppercase ones, and U with T.
+_SITE_ALPHABETS = {
+    'nucleotide': 'ACGT',
+    'codon': 'ACGT',
+    'protein': 'ACDEFGHIKLMNPQRSTVWY',
+}
+
+# Number of matrix cells counted at a time by site_stats
+_STATS_BLOCK = 1 << 22
+
+
+def _site_table(alphabet):
+    """Returns an array mapping character codes to allele numbers, with
+    len(alphabet) for gaps and len(alphabet) + 1 for any other character.
+    """
+    table = np.full(256, len(alphabet) + 1, dtype=np.uint8)
+    for i, char in enumerate(alphabet):
+        table[ord(char)] = table[ord(char.lower())] = i
+    if 'T' in alphabet and 'U' not in alphabet:
+        table[ord('U')] = table[ord('u')] = alphabet.index('T')
+    table[ord('-')] = len(alphabet)
+    return table
+
+
+def _decode_chars(codes):
+    """Returns an array of uint8 character codes as an array of
+    single-character strings.
+    """
+    return codes.astype('<u4').view('<U1')
+
+
+def _as_selection(indexes, size):
+    """Returns the selection of sorted or unsorted `indexes` along an axis of
+    length `size`: None if all indexes are selected in order, a slice if they
+    are contiguous, otherwise the index array itself.
+    """
+    indexes = np.asarray(indexes, dtype=np.intp)
+    if len(indexes) == size and (indexes == np.arange(size)).all():
+        return None
+    if not len(indexes):
+        return slice(0, 0)
+    if (np.diff(indexes) == 1).all():
+        return slice(int(indexes[0]), int(indexes[-1]) + 1)
+    return indexes
+
+
+def _compose(outer, inner, size):
+    """Returns the selection along an axis of length `size` made by taking
+    `inner` within the selection `outer`. None selects everything.
+    """
+    if outer is None:
+        return inner
+    if inner is None:
+        return outer
+    if isinstance(outer, slice):
+        positions = range(*outer.indices(size))
+        if isinstance(inner, (int, np.integer)):
+            return positions[inner]
+        if isinstance(inner, slice):
+            positions = positions[inner]
+            if positions.step > 0:
+                return slice(positions.start, positions.stop, positions.step)
+        outer = np.arange(positions.start, positions.stop, positions.step)
+        if isinstance(inner, slice):
+            return outer
+    return outer[inner]
+
+
+def _selection_length(selection, size):
+    if selection is None:
+        return size
+    if isinstance(selection, slice):
+        return len(range(*selection.indices(size)))
+    return len(selection)
+
+
+def _grow_rows(matrix, n_cols, capacity):
+    """Returns a new uint8 buffer of `capacity` rows whose first rows are
+    a copy of `matrix`.
+    """
+    buffer = np.empty((capacity, n_cols), dtype=np.uint8)
+    if len(matrix):
+        buffer[:len(matrix)] = matrix
+    return buffer
+
 
 class Alignment(object):
     """Represents an alignment of biological sequences.
@@ -80,9 +187,198 @@ class Alignment(object):
         self.aln_type = aln_type
         self._records = []  # list of SequenceAnnotation objects
         self._records_lookup_d = dict()
-        self._aln_matrix = np.array([])
+        # Filtered alignments share the matrix of the alignment they were
+        # derived from, and select their rows and columns with _rows and
+        # _cols. None selects all rows or columns.
+        self._base = np.empty((0, 0), dtype=np.uint8)
+        self._rows = None
+        self._cols = None
+        self._buffer = None  # spare rows for sequences added one by one
+        self._site_stats = None
         self.markers = dict()
 
+    @property
+    def _aln_matrix(self):
+        """Returns the alignment matrix.
+
+        A filtered alignment that selects rows or columns by index copies
+        them on the first read and keeps the copy, in place of the matrix
+        it was derived from. Contiguous selections are views and are not
+        copied.
+        """
+        if isinstance(self._rows, np.ndarray) or \
+                isinstance(self._cols, np.ndarray):
+            self._base = self._select()
+            self._rows = None
+            self._cols = None
+        return self._select()
+
+    @_aln_matrix.setter
+    def _aln_matrix(self, matrix):
+        self._base = matrix
+        self._rows = None
+        self._cols = None
+        self._site_stats = None
+
+    @property
+    def _shape(self):
+        """Returns the shape of the alignment matrix without building it.
+        """
+        n_rows, n_cols = self._base.shape
+        return (_selection_length(self._rows, n_rows),
+                _selection_length(self._cols, n_cols))
+
+    def _select(self, rows=None, cols=None):
+        """Returns the rows and columns of the alignment matrix selected by
+        `rows` and `cols`, which are indexes or slices within the
+        alignment. None selects all rows or columns.
+        """
+        n_rows, n_cols = self._base.shape
+        rows = _compose(self._rows, rows, n_rows)
+        cols = _compose(self._cols, cols, n_cols)
+        if rows is None and cols is None:
+            return self._base
+        if isinstance(rows, np.ndarray) and isinstance(cols, np.ndarray):
+            return self._base[np.ix_(rows, cols)]
+        return self._base[slice(None) if rows is None else rows,
+                          slice(None) if cols is None else cols]
+
+    def _derive(self, rows=None, cols=None):
+        """Returns a filtered alignment that shares the matrix of this
+        alignment. `rows` and `cols` are selections within this alignment,
+        see `_as_selection`.
+        """
+        n_rows, n_cols = self._base.shape
+        new_aln = copy(self)
+        new_aln._rows = _compose(self._rows, rows, n_rows)
+        new_aln._cols = _compose(self._cols, cols, n_cols)
+        new_aln._records = list(self._records)
+        new_aln._records_lookup_d = dict(self._records_lookup_d)
+        new_aln._buffer = None
+        new_aln._site_stats = None
+        new_aln.markers = dict(self.markers)
+        return new_aln
+
+    def site_stats(self):
+        """Returns allele counts and summary statistics of every site of
+        the alignment.
+
+        All statistics are computed in one pass over the alignment matrix.
+        The result is cached until sequences are added to the alignment,
+        and filtered alignments compute their own statistics.
+        Codon alignments are counted per nucleotide site.
+
+        Returns
+        -------
+        SiteStats
+            Named tuple with the following arrays, one entry per site:
+
+            - alphabet : str, alleles counted, 'ACGT' for nucleotide and
+              codon alignments or the 20 amino acids for proteins.
+            - counts : (n_sites, len(alphabet)) array of allele counts.
+            - gaps : number of gap characters ('-').
+            - ambiguous : number of other characters, such as N or X.
+            - major : most common allele, or '' if the site has none.
+              Ties are broken in alphabet order.
+            - minor : second most common allele, or '' if the site has
+              fewer than two alleles.
+            - entropy : Shannon entropy in bits of the allele frequencies.
+            - segregating : True if the site has at least two alleles.
+
+        """
+        if self._site_stats is None:
+            self._site_stats = self._compute_site_stats()
+        return self._site_stats
+
+    def _compute_site_stats(self):
+        alphabet = _SITE_ALPHABETS.get(self.aln_type, 'ACGT')
+        n_codes = len(alphabet) + 2
+        table = _site_table(alphabet)
+        n_rows, n_cols = self._shape
+        counts = np.zeros((n_cols, n_codes), dtype=np.int64)
+        step = max(1, _STATS_BLOCK // max(1, n_rows))
+        for start in range(0, n_cols, step):
+            codes = table[self._select(cols=slice(start, start + step))]
+            width = codes.shape[1]
+            # Codes of each column are shifted to their own range of bins
+            keys = codes + (np.arange(width) * n_codes).astype(np.intp)
+            counts[start:start+width] = np.bincount(
+                keys.ravel(), minlength=width * n_codes).reshape(width, n_codes)
+        allele_counts = counts[:, :len(alphabet)]
+        order = np.argsort(-allele_counts, axis=1, kind='stable')
+        ranked = np.take_along_axis(allele_counts, order[:, :2], axis=1)
+        chars = np.array(list(alphabet) + [''])
+        major = np.where(ranked[:, 0] > 0, order[:, 0], len(alphabet))
+        minor = np.where(ranked[:, 1] > 0, order[:, 1], len(alphabet))
+        totals = allele_counts.sum(axis=1, keepdims=True)
+        freqs = allele_counts / np.maximum(totals, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            entropy = -np.where(freqs > 0, freqs * np.log2(freqs), 0).sum(axis=1)
+        stats = SiteStats(alphabet, allele_counts, counts[:, -2],
+                          counts[:, -1], chars[major], chars[minor],
+                          entropy + 0.0, (allele_counts > 0).sum(axis=1) >= 2)
+        # Cached arrays are shared by all callers
+        for array in stats[1:]:
+            array.flags.writeable = False
+        return stats
+
+    def distance_matrix(self, model='p', form='condensed', out=None,
+                        workers=1):
+        """Computes the distances between all pairs of sequences.
+
+        Gaps and ambiguous characters are handled by pairwise deletion.
+
+        Parameters
+        ----------
+        model : str, optional
+            'p' (default), 'jc69', 'k2p', or 'tn93'. Protein alignments
+            only support p-distances.
+        form : str, optional
+            'condensed' (default) or 'square'.
+        out : str or numpy.ndarray, optional
+            Path of a .npy file to memory-map, or array to write into.
+        workers : int, optional
+            Number of processes, None to use all CPUs.
+
+        Returns
+        -------
+        numpy.ndarray
+            Distances in sequence order.
+
+        See also
+        --------
+        bseq.distance.distance_matrix
+
+        """
+        return distance_matrix(self, model=model, form=form, out=out,
+                               workers=workers)
+
+    def compact(self):
+        """Copies the alignment matrix of a filtered alignment into its own
+        array.
+
+        Filtered alignments returned by `filter_sites` and
+        `filter_sequences` keep a reference to the matrix of the original
+        alignment until they are compacted, sequences are added to them,
+        or, if they select rows or columns by index, their whole matrix is
+        first read. Compacting also releases the spare rows kept for adding
+        sequences.
+
+        Returns
+        -------
+        Alignment
+            This alignment.
+
+        """
+        if self._rows is not None or self._cols is not None or \
+                self._buffer is not None:
+            matrix = self._aln_matrix
+            if not matrix.flags.owndata:
+                matrix = matrix.copy()
+            self._aln_matrix = matrix
+            self._buffer = None
+        return self
+
     @property
     def sequences(self):
         """Returns a read-only copy of the alignment as a list of
@@ -92,9 +388,19 @@ class Alignment(object):
 
     @property
     def i(self):
-        """Returns a read-only copy of the alignment matrix.
+        """Returns the alignment matrix as a read-only uint8 array of
+        character codes, with one row per sequence.
+        """
+        matrix = self._aln_matrix.view()
+        matrix.flags.writeable = False
+        return matrix
+
+    @property
+    def chars(self):
+        """Returns the alignment matrix as a read-only array of single
+        characters. This is a view of `i` with the 'S1' dtype.
         """
-        return self._aln_matrix
+        return self.i.view('S1')
 
     def add_sequence_obj(self, sequence_obj):
         """Adds a Sequence object containing a single aligned sequence
@@ -120,13 +426,24 @@ class Alignment(object):
         if not self.aln_type:
             self.aln_type = seq_annot.seq_type
         assert self.aln_type == seq_annot.seq_type
-        self._records_lookup_d[seq_annot.name] = len(self._records)
+        codes = sequence_obj._codes()  # pylint: disable=protected-access
+        n_rows, n_cols = self._shape
+        if n_rows and len(codes) != n_cols:
+            raise ValueError('sequence {} has length {}, but the alignment '
+                             'has length {}.'.format(
+                                 seq_annot.name, len(codes), n_cols))
+        # Rows are written into a buffer that doubles in size when full,
+        # so adding n sequences copies O(n) rows in total. The buffer is
+        # only reused if the matrix has not been replaced since. A filtered
+        # alignment has no buffer, and its rows are copied here.
+        if self._buffer is None or self._base.base is not self._buffer \
+                or n_rows == len(self._buffer):
+            self._buffer = _grow_rows(self._aln_matrix[:n_rows], len(codes),
+                                      max(4, 2 * n_rows))
+        self._buffer[n_rows] = codes
+        self._aln_matrix = self._buffer[:n_rows+1]
+        self._records_lookup_d[seq_annot.name] = n_rows
         self._records.append(seq_annot)
-        seq_array = np.array(list(sequence_obj.sequence))
-        if self._aln_matrix.shape[-1] == 0:
-            self._aln_matrix = np.array([seq_array,])
-        else:
-            self._aln_matrix = np.vstack((self._aln_matrix, seq_array))
 
     def add_sequence(self, name, sequence, seq_type, description=None):
         """Adds a single alignmed sequence to the alignment.
@@ -201,6 +518,8 @@ class Alignment(object):
         Alignment
             New alignment object with excluded sites removed from the
             alignment. The number of entries in the alignment does not change.
+            It shares the matrix of this alignment until it is compacted
+            or sequences are added to it, see `compact`.
 
         See also
         --------
@@ -208,25 +527,21 @@ class Alignment(object):
         filter_sequences
 
         """
-        keep_coords = set(range(self._aln_matrix.shape[0]))
+        n_cols = self._shape[1]
+        keep = np.ones(n_cols, dtype=bool)
         for marker in marker_names:
-            coords = set()
             if isinstance(marker, str) and marker in self.markers.keys():
-                coords = set(self.markers[marker].coords(
-                    exclude_char, inverse=True))
-            elif isinstance(marker, Marker):
-                coords = set(marker.coords(exclude_char, inverse=True))
-            else:
+                marker = self.markers[marker]
+            elif not isinstance(marker, Marker):
                 raise ValueError()
-            keep_coords = keep_coords.intersection(coords)
-        new_aln = deepcopy(self)
-        new_aln._aln_matrix = self._aln_matrix[:, coords]  # pylint: disable=protected-access
-        # Filter markers
-        for name, marker in new_aln.markers.items():
-            new_marker_sequence = ''.join(
-                np.array(list(marker.sequence))[coords]
-            )
-            new_aln.markers[name]._encode(new_marker_sequence)  # pylint: disable=protected-access
+            for (start, end), char in zip(marker._pos_list, marker._char_list):  # pylint: disable=protected-access
+                if char == exclude_char:
+                    keep[start:end] = False
+        keep_coords = np.flatnonzero(keep)
+        new_aln = self._derive(cols=_as_selection(keep_coords, n_cols))
+        if len(keep_coords) < n_cols:
+            new_aln.markers = {name: marker._subset(keep_coords)  # pylint: disable=protected-access
+                               for name, marker in self.markers.items()}
         return new_aln
 
     def filter_sequences(self, *sequence_names):
@@ -243,8 +558,9 @@ class Alignment(object):
         Returns
         -------
         Alignment
-            New alignment object with excluded sites removed from the
-            alignment. The number of entries in the alignment does not change.
+            New alignment object containing only the specified entries, in
+            the given order. It shares the matrix of this alignment until it
+            is compacted or sequences are added to it, see `compact`.
 
         See also
         --------
@@ -260,11 +576,12 @@ class Alignment(object):
                 positions.append(i)
                 new_records.append(self._records[i])
 
-        new_aln = deepcopy(self)
-        new_aln._aln_matrix = self._aln_matrix[positions]  # pylint: disable=protected-access
+        new_aln = self._derive(
+            rows=_as_selection(positions, self._shape[0]))
         new_aln._records = new_records  # pylint: disable=protected-access
-        new_aln._records_lookup_d = {k:v for k, v in self._records_lookup_d # pylint: disable=protected-access
-                                     if k in sequence_names}
+        new_aln._records_lookup_d = {  # pylint: disable=protected-access
+            record.name: i for i, record in enumerate(new_records)
+        }
         return new_aln
 
     def use_all_filters(self, exclude_char='X'):
@@ -307,31 +624,159 @@ class Alignment(object):
             `>{self.name}\n{self.seq}\n>{self.name}\n{self.seq}`.
 
         """
-        fasta_string = ''
-        for i, record in enumerate(self._records):
-            fasta_string += \
-                fasta_formatted_string(record.name,
-                                       self._aln_matrix[i],
-                                       description=record.description,
-                                       line_width=line_width)
-        return fasta_string
+        buffer = io.StringIO()
+        write_fasta(buffer, self, line_width=line_width)
+        return buffer.getvalue()
+
+    def save(self, path):
+        """Saves the alignment in the bseq binary alignment format.
+
+        The file contains a header with the sequence names, descriptions and
+        run-length encoded markers, followed by the raw alignment matrix
+        stored column by column. Use `Alignment.load` to read it back.
+
+        Parameters
+        ----------
+        path : str
+            Path to the output file.
+
+        See also
+        --------
+        load
+
+        """
+        matrix = self._aln_matrix
+        header = {
+            'name': self.name,
+            'description': self.description,
+            'aln_type': self.aln_type,
+            'records': [list(record) for record in self._records],
+            'markers': [
+                {
+                    'class': type(marker).__name__,
+                    'name': marker.name,
+                    'description': marker.description,
+                    'char_description': marker.char_description,
+                    'runs': [[start, end, char] for (start, end), char
+                             in zip(marker._pos_list, marker._char_list)],  # pylint: disable=protected-access
+                }
+                for marker in self.markers.values()
+            ],
+            'dtype': matrix.dtype.str,
+            'shape': list(matrix.shape),
+            'order': 'F',
+        }
+        header_bytes = json.dumps(header).encode()
+        offset = _BINARY_PREFIX.size + len(header_bytes)
+        padding = -offset % _BINARY_ALIGN
+        with open(path, 'wb') as f:
+            f.write(_BINARY_PREFIX.pack(_BINARY_MAGIC, _BINARY_VERSION,
+                                        len(header_bytes) + padding))
+            f.write(header_bytes + b' ' * padding)
+            # Write blocks of columns so that memory use stays bounded
+            # regardless of the size of the alignment.
+            n_cols = matrix.shape[-1] if matrix.ndim == 2 else 0
+            step = max(1, (1 << 26) // max(1, matrix.shape[0] *
+                                           matrix.itemsize))
+            for start in range(0, n_cols, step):
+                np.ascontiguousarray(
+                    matrix[:, start:start+step].T).tofile(f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Loads an alignment saved with `Alignment.save`.
+
+        Parameters
+        ----------
+        path : str
+            Path to the binary alignment file.
+        mmap : bool, optional
+            If True (default), the alignment matrix is memory-mapped
+            read-only from the file instead of being read into memory.
+            Only the parts of the matrix that are accessed are read from
+            disk. If False, the whole matrix is read into memory.
+
+        Returns
+        -------
+        Alignment
+            NuclAlignment, ProtAlignment or CodonAlignment depending on
+            the type of the saved alignment.
+
+        Raises
+        ------
+        ValueError
+            If the file is not a bseq binary alignment, or if its matrix
+            is not stored as uint8 character codes.
+
+        See also
+        --------
+        save
+
+        """
+        with open(path, 'rb') as f:
+            prefix = f.read(_BINARY_PREFIX.size)
+            if len(prefix) != _BINARY_PREFIX.size:
+                raise ValueError('not a bseq binary alignment file.')
+            magic, version, header_size = _BINARY_PREFIX.unpack(prefix)
+            if magic != _BINARY_MAGIC or version != _BINARY_VERSION:
+                raise ValueError('not a bseq binary alignment file.')
+            header = json.loads(f.read(header_size).decode())
+            offset = _BINARY_PREFIX.size + header_size
+            shape = tuple(header['shape'])
+            dtype = np.dtype(header['dtype'])
+            if dtype != np.uint8:
+                raise ValueError('unsupported alignment matrix type '
+                                 '{}.'.format(dtype))
+            if not np.prod(shape):
+                matrix = np.empty(shape, dtype=dtype)
+            elif mmap:
+                matrix = np.memmap(path, dtype=dtype, mode='r',
+                                   offset=offset, shape=shape,
+                                   order=header['order'])
+            else:
+                f.seek(offset)
+                matrix = np.fromfile(f, dtype=dtype,
+                                     count=int(np.prod(shape))).reshape(
+                                         shape, order=header['order'])
+
+        aln_class = _ALIGNMENT_TYPES.get(header['aln_type'], cls) \
+            if cls is Alignment else cls
+        if aln_class is Alignment:
+            aln = aln_class(header['name'], header['description'],
+                            aln_type=header['aln_type'])
+        else:
+            aln = aln_class(header['name'], header['description'])
+        aln._records = [SequenceAnnotation(*record)  # pylint: disable=protected-access
+                        for record in header['records']]
+        aln._records_lookup_d = {  # pylint: disable=protected-access
+            record.name: i for i, record in enumerate(aln._records)  # pylint: disable=protected-access
+        }
+        aln._aln_matrix = matrix  # pylint: disable=protected-access
+        for marker in header['markers']:
+            marker_class = _MARKER_CLASSES.get(marker['class'], Marker)
+            aln.markers[marker['name']] = marker_class._from_runs(  # pylint: disable=protected-access
+                marker['name'], marker['char_description'],
+                [run[:2] for run in marker['runs']],
+                [run[2] for run in marker['runs']],
+                description=marker['description'])
+        return aln
 
     def __len__(self):
-        return self._aln_matrix.shape[-1]
+        return self._shape[-1]
 
     def __getitem__(self, i):
         if isinstance(i, int):
-            return self._aln_matrix[:, i]
+            return _decode_chars(self._select(cols=i))
         elif isinstance(i, slice):
-            return self._aln_matrix[:, i]
+            return _decode_chars(self._select(cols=i))
         elif isinstance(i, str):
             if i in self._records_lookup_d.keys():
                 pos = self._records_lookup_d[i]
-                return self._aln_matrix[pos]
+                return _decode_chars(self._select(rows=pos))
         return IndexError()
 
     def __iter__(self):
-        return iter(self._aln_matrix.transpose())
+        return (_decode_chars(column) for column in self._aln_matrix.T)
 
     # def __str__(self):
     #     pass
@@ -641,22 +1086,163 @@ class CodonAlignment(Alignment):
         super().add_sequence(name, sequence, seq_type, description=description)
 
     def __len__(self):
-        return int(self._aln_matrix.shape[-1] / 3)
+        return int(self._shape[-1] / 3)
 
     def __getitem__(self, i):
         if isinstance(i, int):  # self[0] returns the first alignment column
             x = int(i/3)
-            return self._aln_matrix[:, x:x+3]
+            return _decode_chars(self._select(cols=slice(x, x+3)))
         elif isinstance(i, slice):  # self[0:2] returns the first 2 columns
             start = i.start * 3
             end = i.stop * 3
-            return self._aln_matrix[:, start:end]
+            return _decode_chars(self._select(cols=slice(start, end)))
         elif isinstance(i, str):  # self['test'] returns the sample's sequence
             if i in self._records_lookup_d.keys():
                 pos = self._records_lookup_d[i]
-                return self._aln_matrix[pos]
+                return _decode_chars(self._select(rows=pos))
         raise TypeError('Alignment can only be indexed by integer, slice, \
                         or string.')
 
     def __iter__(self):
-        return iter(self._aln_matrix)
+        return (_decode_chars(row) for row in self._aln_matrix)
+
+
+_ALIGNMENT_TYPES = {
+    'nucleotide': NuclAlignment,
+    'protein': ProtAlignment,
+    'codon': CodonAlignment,
+}
+
+
+class AlignmentBuilder(object):
+    """Collects aligned sequences into a preallocated matrix and freezes
+    them into an Alignment.
+
+    Rows are written into a uint8 buffer that is allocated for the
+    expected number of sequences and doubles in size when full. `build`
+    returns an Alignment whose matrix is a view of the buffer, so the
+    sequences are not copied again.
+
+    Attributes
+    ----------
+    name : str
+        Name of the alignment.
+    description : str
+        Description of the alignment.
+    aln_type : str
+        Type of alignment to build: 'nucleotide', 'protein', or 'codon'.
+
+    """
+    def __init__(self, name, aln_type, description=None, expected_rows=None):
+        """Creates a new builder.
+
+        Parameters
+        ----------
+        name : str
+            Name of the alignment.
+        aln_type : str
+            Type of alignment to build.
+        description : str, optional
+            Description of the alignment.
+        expected_rows : int, optional
+            Expected number of sequences. The buffer is allocated for this
+            many rows when the first sequence is added.
+
+        """
+        if aln_type not in _ALIGNMENT_TYPES:
+            raise ValueError('aln_type must be "nucleotide", "protein", '
+                             'or "codon".')
+        self.name = name
+        self.description = description
+        self.aln_type = aln_type
+        self._expected_rows = expected_rows or 4
+        self._buffer = None
+        self._records = []
+        self._records_lookup_d = dict()
+        self._built = False
+
+    def add_sequence(self, name, sequence, description=None):
+        """Adds an aligned sequence string.
+
+        Parameters
+        ----------
+        name : str
+            Name of the sequence.
+        sequence : str
+            Aligned sequence.
+        description : str, optional
+            Description of the sequence.
+
+        """
+        self.add_sequence_obj(Sequence(name, sequence, description=description,
+                                       seq_type=self.aln_type))
+
+    def add_sequence_obj(self, sequence_obj):
+        """Adds a Sequence object containing an aligned sequence.
+
+        Parameters
+        ----------
+        sequence_obj : Sequence
+
+        Raises
+        ------
+        ValueError
+            If the builder was already built, if the name is already used,
+            or if the sequence length differs from the previous sequences.
+
+        """
+        self._add_codes(sequence_obj.name,
+                        sequence_obj._codes(),  # pylint: disable=protected-access
+                        sequence_obj.description)
+
+    def _add_codes(self, name, codes, description=None):
+        """Adds an aligned sequence given as a uint8 array of character
+        codes, or as bytes, without creating a Sequence object.
+        """
+        if self._built:
+            raise ValueError('cannot add sequences after build.')
+        if name in self._records_lookup_d:
+            raise ValueError('duplicate sequence name {}.'.format(name))
+        n_rows = len(self._records)
+        if self._buffer is None:
+            self._buffer = np.empty((self._expected_rows, len(codes)),
+                                    dtype=np.uint8)
+        elif len(codes) != self._buffer.shape[1]:
+            raise ValueError('sequence {} has length {}, but the alignment '
+                             'has length {}.'.format(
+                                 name, len(codes), self._buffer.shape[1]))
+        elif n_rows == len(self._buffer):
+            self._buffer = _grow_rows(self._buffer, len(codes),
+                                      2 * len(self._buffer))
+        self._buffer[n_rows] = np.frombuffer(codes, dtype=np.uint8)
+        self._records_lookup_d[name] = n_rows
+        self._records.append(SequenceAnnotation(
+            name, description, self.aln_type))
+
+    def build(self):
+        """Returns the Alignment of the added sequences.
+
+        The alignment matrix is a view of the builder's buffer, so no
+        sequence is copied. The builder cannot be used afterwards.
+
+        Returns
+        -------
+        Alignment
+            NuclAlignment, ProtAlignment, or CodonAlignment depending on
+            `aln_type`.
+
+        """
+        # pylint: disable=protected-access
+        aln = _ALIGNMENT_TYPES[self.aln_type](self.name, self.description)
+        if self._records:
+            aln._records = self._records
+            aln._records_lookup_d = self._records_lookup_d
+            aln._aln_matrix = self._buffer[:len(self._records)]
+            # Spare rows are reused if more sequences are added later
+            aln._buffer = self._buffer
+        self._buffer = None
+        self._built = True
+        return aln
+
+    def __len__(self):
+        return len(self._records)
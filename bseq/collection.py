@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""Compact data structure for large sets of sequences.
+
+A SequenceCollection stores the residues of all its sequences in one
+contiguous byte buffer, with an array of offsets marking where each
+sequence starts. Names and descriptions are stored the same way, in
+packed string tables. This avoids keeping one Python object per sequence,
+which dominates memory use for large sets of short reads.
+
+Sequence objects are created on demand when a sequence is accessed. They
+are views that read their characters from the packed buffer.
+
+"""
+from array import array
+import numpy as np
+from bseq.sequence import SEQUENCE_CLASSES, _VIEW_CLASSES
+
+
+class _PackedStrings(object):
+    """Immutable table of strings stored in a single byte buffer.
+    """
+    __slots__ = ('_data', '_offsets')
+
+    def __init__(self, data, offsets):
+        self._data = data
+        self._offsets = offsets
+
+    def __getitem__(self, i):
+        return bytes(
+            self._data[self._offsets[i]:self._offsets[i+1]]).decode()
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    @property
+    def nbytes(self):
+        """Returns the number of bytes used by the table.
+        """
+        return self._data.nbytes + self._offsets.nbytes
+
+
+class _CollectionBuilder(object):
+    """Accumulates sequences into growable buffers before they are frozen
+    into a SequenceCollection.
+    """
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array('q', [0])
+        self.names = bytearray()
+        self.name_offsets = array('q', [0])
+        self.descriptions = bytearray()
+        self.description_offsets = array('q', [0])
+
+    def append(self, name, sequence, description=None):
+        """Appends a sequence given as bytes.
+        """
+        self.data += sequence
+        self.offsets.append(len(self.data))
+        self.names += name.encode()
+        self.name_offsets.append(len(self.names))
+        if description:
+            self.descriptions += description.encode()
+        self.description_offsets.append(len(self.descriptions))
+
+    def build(self, seq_type):
+        """Creates the collection. The buffers are shared with the collection
+        and must not be modified afterwards.
+        """
+        def as_array(buffer, dtype):
+            return np.frombuffer(buffer, dtype=dtype) if len(buffer) \
+                else np.empty(0, dtype=dtype)
+        return SequenceCollection(
+            as_array(self.data, np.uint8),
+            as_array(self.offsets, np.int64),
+            _PackedStrings(as_array(self.names, np.uint8),
+                           as_array(self.name_offsets, np.int64)),
+            _PackedStrings(as_array(self.descriptions, np.uint8),
+                           as_array(self.description_offsets, np.int64)),
+            seq_type=seq_type)
+
+
+class SequenceCollection(object):
+    """Memory-compact, read-only collection of sequences of the same type.
+
+    Attributes
+    ----------
+    seq_type : str
+        nucleotide, protein, or codon
+    names
+    lengths
+    nbytes
+
+    Notes
+    -----
+    The SequenceCollection object is indexable using [] like a list.
+    If the key used is an integer, it returns the sequence at that position.
+    But if the key used is a string, it retrieves like a dictionary key and
+    looks up the list of sequence names for a match.
+    Each access creates a new sequence view (NuclSequenceView,
+    ProtSequenceView or CodonSequenceView) whose parent is the collection.
+    It shares the memory of the collection and is only decoded when its
+    `sequence` is read.
+
+    """
+    __slots__ = ('seq_type', '_data', '_offsets', '_names', '_descriptions',
+                 '_lookup_d')
+
+    def __init__(self, data, offsets, names, descriptions,
+                 seq_type='nucleotide'):
+        """Creates a new collection from packed buffers.
+
+        Use `SequenceCollection.from_sequences` or
+        `bseq.reader.read_fasta_collection` to create a collection from
+        Sequence objects or from a FASTA file.
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+            uint8 array containing the residues of all sequences.
+        offsets : numpy.ndarray
+            int64 array of length n + 1 where sequence i occupies
+            `data[offsets[i]:offsets[i+1]]`.
+        names : _PackedStrings
+            Table of sequence names.
+        descriptions : _PackedStrings
+            Table of sequence descriptions. Empty strings stand for
+            sequences without a description.
+        seq_type : str, optional
+            Type of the sequences. Choices are 'nucleotide', 'protein',
+            or 'codon'.
+
+        """
+        if seq_type not in SEQUENCE_CLASSES:
+            raise ValueError('seq_type must be "nucleotide", "protein", '
+                             'or "codon".')
+        self.seq_type = seq_type
+        self._data = data
+        self._offsets = offsets
+        self._names = names
+        self._descriptions = descriptions
+        self._lookup_d = None
+
+    @classmethod
+    def from_sequences(cls, sequences, seq_type=None):
+        """Creates a collection from Sequence objects.
+
+        Parameters
+        ----------
+        sequences : iterable of Sequence
+            Sequences to copy into the collection.
+        seq_type : str, optional
+            Type of the sequences. By default, the type of the first
+            sequence is used, or 'nucleotide' if there are no sequences.
+
+        Returns
+        -------
+        SequenceCollection
+
+        """
+        builder = _CollectionBuilder()
+        for seq_obj in sequences:
+            if seq_type is None:
+                seq_type = seq_obj.seq_type
+            builder.append(seq_obj.name, seq_obj.sequence.encode(),
+                           seq_obj.description)
+        return builder.build(seq_type or 'nucleotide')
+
+    @property
+    def names(self):
+        """Returns the list of sequence names.
+        """
+        return [self._names[i] for i in range(len(self))]
+
+    @property
+    def lengths(self):
+        """Returns the number of characters in each sequence as an array.
+        """
+        return np.diff(self._offsets)
+
+    @property
+    def nbytes(self):
+        """Returns the number of bytes used to store the collection.
+        """
+        return self._data.nbytes + self._offsets.nbytes + \
+            self._names.nbytes + self._descriptions.nbytes
+
+    def name(self, i):
+        """Returns the name of the sequence at position `i`.
+        """
+        return self._names[i]
+
+    def description(self, i):
+        """Returns the description of the sequence at position `i`,
+        or None if it has no description.
+        """
+        return self._descriptions[i] or None
+
+    def codes(self, i):
+        """Returns the characters of the sequence at position `i` as
+        a read-only uint8 array sharing memory with the collection.
+        """
+        return self._codes(self._offsets[i], self._offsets[i+1])
+
+    def index(self, name):
+        """Returns the position of the sequence with the given name.
+
+        The name lookup table is built on first use.
+
+        Raises
+        ------
+        KeyError
+            If no sequence has the given name.
+
+        """
+        if self._lookup_d is None:
+            self._lookup_d = {self._names[i]: i for i in range(len(self))}
+        return self._lookup_d[name]
+
+    def _codes(self, start=0, stop=None):
+        """Returns the characters from `start` to `stop` of the packed
+        buffer as a read-only uint8 array. This lets sequence views use
+        the collection as their parent.
+        """
+        codes = self._data[start:stop]
+        codes.flags.writeable = False
+        return codes
+
+    def _sequence_obj(self, i):
+        # The view reads its characters from the packed buffer, so that
+        # accessing a sequence does not decode it
+        seq_obj = _VIEW_CLASSES[self.seq_type](
+            self, int(self._offsets[i]), int(self._offsets[i+1]),
+            name=self._names[i])
+        seq_obj.description = self.description(i)
+        return seq_obj
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, str):
+            return self._sequence_obj(self.index(i))
+        if isinstance(i, slice):
+            return [self._sequence_obj(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('collection index out of range')
+        return self._sequence_obj(i)
+
+    def __iter__(self):
+        return (self._sequence_obj(i) for i in range(len(self)))
+
+    def __contains__(self, name):
+        try:
+            self.index(name)
+        except KeyError:
+            return False
+        return True
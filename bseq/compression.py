@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""Helper functions for reading compressed files.
+
+Compression is detected from the magic bytes at the start of the file,
+so file extensions do not matter. Supported formats are gzip, BGZF
+(blocked gzip, as produced by bgzip and samtools), xz and bzip2.
+
+BGZF files consist of many small, independently compressed gzip blocks.
+These blocks are decompressed in parallel on a thread pool. zlib releases
+the GIL while inflating, so the threads run concurrently on multi-core
+machines.
+
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import bz2
+import gzip
+import io
+import lzma
+import os
+import struct
+import zlib
+
+
+GZIP_MAGIC = b'\x1f\x8b'
+XZ_MAGIC = b'\xfd7zXZ\x00'
+BZ2_MAGIC = b'BZh'
+
+_BGZF_HEADER_SIZE = 18
+_BGZF_FOOTER_SIZE = 8
+
+
+def detect_compression(path):
+    """Detects the compression format of a file from its magic bytes.
+
+    Parameters
+    ----------
+    path : str
+        Path to the file.
+
+    Returns
+    -------
+    str or None
+        'bgzf', 'gzip', 'xz' or 'bz2', or None if the file is
+        not compressed.
+
+    """
+    with open(path, 'rb') as f:
+        head = f.read(_BGZF_HEADER_SIZE)
+    if head.startswith(GZIP_MAGIC):
+        if _is_bgzf_header(head):
+            return 'bgzf'
+        return 'gzip'
+    if head.startswith(XZ_MAGIC):
+        return 'xz'
+    if head.startswith(BZ2_MAGIC):
+        return 'bz2'
+    return None
+
+
+def _is_bgzf_header(head):
+    """Checks for the FEXTRA flag and the 'BC' subfield that mark
+    a BGZF block.
+    """
+    return len(head) == _BGZF_HEADER_SIZE and bool(head[3] & 4) and \
+        head[12:14] == b'BC' and head[14:16] == b'\x02\x00'
+
+
+def _inflate_block(cdata, crc, size):
+    """Decompresses the raw deflate data of a single BGZF block.
+    """
+    data = zlib.decompress(cdata, -15)
+    if len(data) != size or zlib.crc32(data) != crc:
+        raise OSError('BGZF block failed the integrity check.')
+    return data
+
+
+def _iter_bgzf_blocks(f):
+    """Yields the compressed payload, CRC32 and uncompressed size of each
+    BGZF block in the file.
+    """
+    while True:
+        header = f.read(_BGZF_HEADER_SIZE)
+        if not header:
+            return
+        if not _is_bgzf_header(header):
+            raise OSError('invalid BGZF block header.')
+        block_size = struct.unpack('<H', header[16:18])[0] + 1
+        rest = f.read(block_size - _BGZF_HEADER_SIZE)
+        if len(rest) != block_size - _BGZF_HEADER_SIZE:
+            raise OSError('truncated BGZF block.')
+        crc, size = struct.unpack('<II', rest[-_BGZF_FOOTER_SIZE:])
+        yield rest[:-_BGZF_FOOTER_SIZE], crc, size
+
+
+class BgzfReader(io.RawIOBase):
+    """Read-only binary stream over a BGZF file that decompresses blocks
+    in parallel.
+
+    Blocks are submitted to a thread pool ahead of the reader, and the
+    decompressed data is returned in file order. At most a fixed number of
+    blocks are in flight at a time, so memory use stays bounded.
+
+    """
+    def __init__(self, path, threads=None):
+        """Opens the BGZF file.
+
+        Parameters
+        ----------
+        path : str
+            Path to the BGZF file.
+        threads : int, optional
+            Number of decompression threads. Defaults to the number
+            of CPUs.
+
+        """
+        super().__init__()
+        self._f = open(path, 'rb')
+        threads = threads or os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(max_workers=threads)
+        self._max_pending = threads * 4
+        self._pending = deque()
+        self._blocks = _iter_bgzf_blocks(self._f)
+        self._buffer = b''
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while self._pos >= len(self._buffer):
+            self._fill_pending()
+            if not self._pending:
+                return 0
+            self._buffer = self._pending.popleft().result()
+            self._pos = 0
+        n = min(len(b), len(self._buffer) - self._pos)
+        b[:n] = self._buffer[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def close(self):
+        if not self.closed:
+            for future in self._pending:
+                future.cancel()
+            self._executor.shutdown(wait=True)
+            self._f.close()
+        super().close()
+
+    def _fill_pending(self):
+        while len(self._pending) < self._max_pending:
+            block = next(self._blocks, None)
+            if block is None:
+                return
+            self._pending.append(
+                self._executor.submit(_inflate_block, *block))
+
+
+def open_binary(path, threads=None):
+    """Opens a file for reading bytes, decompressing it transparently.
+
+    Parameters
+    ----------
+    path : str
+        Path to the file. The file may be uncompressed, or compressed
+        with gzip, BGZF, xz or bzip2.
+    threads : int, optional
+        Number of threads used to decompress BGZF files. Defaults to
+        the number of CPUs.
+
+    Returns
+    -------
+    file object
+        Binary file object returning the uncompressed contents.
+
+    """
+    compression = detect_compression(path)
+    if compression == 'bgzf':
+        return io.BufferedReader(BgzfReader(path, threads=threads),
+                                 buffer_size=1 << 20)
+    if compression == 'gzip':
+        return gzip.open(path, 'rb')
+    if compression == 'xz':
+        return lzma.open(path, 'rb')
+    if compression == 'bz2':
+        return bz2.open(path, 'rb')
+    return open(path, 'rb')
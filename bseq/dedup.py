@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Collapsing of identical sequences.
+
+Sequences are grouped by a BLAKE2b hash of their characters, so each
+sequence is read once and never compared with the others character by
+character. With 128-bit digests, two different sequences getting the same
+hash is vanishingly unlikely.
+
+"""
+from collections import namedtuple
+import hashlib
+from bseq.sequence import SEQUENCE_CLASSES
+from bseq.writer import _as_byte_matrix
+
+
+DuplicateGroup = namedtuple('DuplicateGroup', 'representative, names, count')
+
+
+def _iter_hashed(records):
+    """Yields the name, content hash and a callable returning the Sequence
+    object of each sequence of an Alignment, a SequenceCollection, or an
+    iterable of Sequence objects.
+    """
+    # pylint: disable=protected-access
+    if hasattr(records, '_aln_matrix'):
+        if not records._records:
+            return
+        seq_class = SEQUENCE_CLASSES[records.aln_type]
+        matrix = _as_byte_matrix(records._aln_matrix)
+        for record, row in zip(records._records, matrix):
+            digest = hashlib.blake2b(row.tobytes(), digest_size=16)
+            yield (record.name, digest.hexdigest(),
+                   lambda record=record, row=row: seq_class(
+                       record.name, row.tobytes().decode(),
+                       description=record.description))
+    elif hasattr(records, 'codes'):
+        for i in range(len(records)):
+            digest = hashlib.blake2b(records.codes(i), digest_size=16)
+            yield (records.name(i), digest.hexdigest(),
+                   lambda i=i: records[i])
+    else:
+        for seq_obj in records:
+            yield (seq_obj.name, seq_obj.content_hash,
+                   lambda seq_obj=seq_obj: seq_obj)
+
+
+def deduplicate(records):
+    """Groups identical sequences together.
+
+    Parameters
+    ----------
+    records : Alignment, SequenceCollection, or iterable of Sequence
+        Sequences to deduplicate, for example the list returned by
+        `read_fasta_file`.
+
+    Returns
+    -------
+    list of DuplicateGroup
+        One group per distinct sequence, in order of first occurrence.
+        `representative` is the first sequence of the group, `names` lists
+        the names of all its members including the representative, and
+        `count` is the number of members.
+
+    See also
+    --------
+    bseq.sequence.Sequence.content_hash
+
+    """
+    groups = dict()
+    for name, content_hash, get_sequence in _iter_hashed(records):
+        group = groups.get(content_hash)
+        if group is None:
+            groups[content_hash] = (get_sequence(), [name])
+        else:
+            group[1].append(name)
+    return [DuplicateGroup(representative, names, len(names))
+            for representative, names in groups.values()]
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""Pairwise evolutionary distances between the sequences of an alignment.
+
+Rows of the alignment are encoded as one-hot blocks, with one column per
+allele and site, so that the number of identical sites, comparable sites,
+and transitions between every pair of sequences in two blocks of rows are
+each given by a single matrix product. Sites with a gap or an ambiguous
+character in either sequence are left out of the comparison of that pair
+(pairwise deletion).
+
+The distance matrix is computed in tiles of `block_size` x `block_size`
+pairs, which can be spread over a pool of processes, and each tile is
+written into the output as soon as it is done. The output can be a
+memory-mapped .npy file, so the whole matrix never needs to fit in memory.
+
+Models
+------
+p
+    Proportion of differing sites.
+jc69
+    Jukes and Cantor (1969).
+k2p
+    Kimura two-parameter (1980), with separate transition and
+    transversion rates.
+tn93
+    Tamura and Nei (1993), with separate purine and pyrimidine transition
+    rates and unequal base frequencies estimated from the whole alignment.
+
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import mmap
+import os
+import numpy as np
+
+
+DISTANCE_MODELS = ('p', 'jc69', 'k2p', 'tn93')
+
+# Number of sequences per side of a tile
+_BLOCK_SIZE = 512
+
+# Number of one-hot cells encoded at a time for each block of sequences
+_ENCODE_CELLS = 1 << 24
+
+# Alignment matrix and model shared with the worker processes, and the
+# shared memory block holding the matrix, kept so that it stays mapped
+_WORKER_STATE = dict()
+_WORKER_BLOCKS = []
+
+
+def _plane_table(alphabet):
+    """Returns an array mapping character codes to allele numbers, with
+    len(alphabet) for gaps and ambiguous characters. Lowercase characters
+    are mapped like uppercase ones, and U like T.
+    """
+    table = np.full(256, len(alphabet), dtype=np.uint8)
+    for i, char in enumerate(alphabet):
+        table[ord(char)] = table[ord(char.lower())] = i
+    if 'T' in alphabet and 'U' not in alphabet:
+        table[ord('U')] = table[ord('u')] = alphabet.index('T')
+    return table
+
+
+def _count_tile(matrix, tile, table, n_planes, model):
+    """Returns the counts needed by `model` for every pair of sequences of
+    two blocks of rows: comparable sites, identical sites, and for the
+    nucleotide models, A-G and C-T transitions.
+    """
+    rows_i, rows_j = (slice(*bounds) for bounds in tile)
+    n_i, n_j = (end - start for start, end in tile)
+    n_cols = matrix.shape[1]
+    step = max(1, _ENCODE_CELLS // (n_planes * max(n_i, n_j, 1)))
+    # Sites are encoded in chunks to bound memory use. Products are exact
+    # in float32 within a chunk, and are summed in float64.
+    counts = np.zeros((4, n_i, n_j))
+    for start in range(0, n_cols, step):
+        cols = slice(start, start + step)
+        planes_i = table[matrix[rows_i, cols]]
+        planes_j = table[matrix[rows_j, cols]]
+        valid_i = (planes_i < n_planes).astype(np.float32)
+        valid_j = (planes_j < n_planes).astype(np.float32)
+        counts[0] += valid_i @ valid_j.T
+        onehot_i = [(planes_i == k).astype(np.float32)
+                    for k in range(n_planes)]
+        onehot_j = onehot_i if rows_i == rows_j else \
+            [(planes_j == k).astype(np.float32) for k in range(n_planes)]
+        counts[1] += np.hstack(onehot_i) @ np.hstack(onehot_j).T
+        if model in ('k2p', 'tn93'):
+            # Alleles are A, C, G, T
+            counts[2] += np.hstack((onehot_i[0], onehot_i[2])) @ \
+                np.hstack((onehot_j[2], onehot_j[0])).T
+            counts[3] += np.hstack((onehot_i[1], onehot_i[3])) @ \
+                np.hstack((onehot_j[3], onehot_j[1])).T
+    return counts
+
+
+def _distances(counts, model, freqs):
+    """Returns the distances of `model` from the counts of `_count_tile`.
+    Pairs without comparable sites get NaN, and pairs too divergent for
+    the model get infinity.
+    """
+    n_sites, n_same, n_ag, n_ct = counts
+    with np.errstate(divide='ignore', invalid='ignore'):
+        diff = (n_sites - n_same) / n_sites
+        if model == 'p':
+            dist = diff
+        elif model == 'jc69':
+            dist = -0.75 * np.log(np.maximum(1 - diff * 4 / 3, 0))
+        else:
+            p_ag = n_ag / n_sites
+            p_ct = n_ct / n_sites
+            q = diff - p_ag - p_ct
+            if model == 'k2p':
+                dist = -0.5 * np.log(np.maximum(1 - 2*(p_ag + p_ct) - q, 0)) \
+                    - 0.25 * np.log(np.maximum(1 - 2*q, 0))
+            else:
+                g_a, g_c, g_g, g_t = freqs
+                g_r = g_a + g_g
+                g_y = g_c + g_t
+                k_1 = 2 * g_a * g_g / g_r
+                k_2 = 2 * g_c * g_t / g_y
+                k_3 = 2 * (g_r * g_y - g_a * g_g * g_y / g_r -
+                           g_c * g_t * g_r / g_y)
+                w_1 = 1 - p_ag / k_1 - q / (2 * g_r)
+                w_2 = 1 - p_ct / k_2 - q / (2 * g_y)
+                w_3 = 1 - q / (2 * g_r * g_y)
+                dist = -k_1 * np.log(np.maximum(w_1, 0)) \
+                    - k_2 * np.log(np.maximum(w_2, 0)) \
+                    - k_3 * np.log(np.maximum(w_3, 0))
+    # Identical sequences give -0.0 from -log(1)
+    dist += 0.0
+    dist[n_sites == 0] = np.nan
+    return dist
+
+
+def _tile_distances(matrix, tile, table, n_planes, model, freqs):
+    return _distances(_count_tile(matrix, tile, table, n_planes, model),
+                      model, freqs)
+
+
+def _share_matrix(matrix):
+    """Returns how worker processes can open the alignment matrix without
+    receiving a copy of it, and the shared memory block to release after
+    the workers are done, if any.
+
+    A matrix memory-mapped from a file, as returned by `Alignment.load`,
+    is mapped again from the same file by each worker. Other matrices are
+    copied once into shared memory.
+    """
+    if isinstance(matrix, np.memmap) and isinstance(matrix.base, mmap.mmap) \
+            and matrix.filename:
+        order = 'C' if matrix.flags.c_contiguous else 'F'
+        return ('memmap', matrix.filename, matrix.dtype.str, matrix.offset,
+                matrix.shape, order), None
+    block = shared_memory.SharedMemory(create=True, size=matrix.nbytes)
+    np.ndarray(matrix.shape, dtype=matrix.dtype, buffer=block.buf)[:] = matrix
+    return ('shared', block.name, matrix.dtype.str, matrix.shape), block
+
+
+def _open_matrix(source):
+    """Opens the alignment matrix described by `_share_matrix` in a worker
+    process. Returns the matrix and the shared memory block it uses.
+    """
+    if source[0] == 'memmap':
+        _, filename, dtype, offset, shape, order = source
+        return np.memmap(filename, dtype=dtype, mode='r', offset=offset,
+                         shape=shape, order=order), None
+    _, name, dtype, shape = source
+    block = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, dtype=dtype, buffer=block.buf), block
+
+
+def _init_worker(source, table, n_planes, model, freqs):
+    matrix, block = _open_matrix(source)
+    _WORKER_BLOCKS.append(block)
+    _WORKER_STATE.update(matrix=matrix, table=table, n_planes=n_planes,
+                         model=model, freqs=freqs)
+
+
+def _worker_tile(tile):
+    return _tile_distances(tile=tile, **_WORKER_STATE)
+
+
+def _write_tile(out, dist, tile, n_seqs, square):
+    """Writes the distances of a tile into a square or condensed matrix.
+    """
+    (i_start, i_end), (j_start, j_end) = tile
+    if square:
+        out[i_start:i_end, j_start:j_end] = dist
+        if i_start != j_start:
+            out[j_start:j_end, i_start:i_end] = dist.T
+        return
+    # Condensed matrices hold the pairs i < j row by row
+    for i in range(i_start, i_end):
+        first = max(j_start, i + 1)
+        if first >= j_end:
+            continue
+        offset = n_seqs * i - i * (i + 1) // 2 + first - i - 1
+        out[offset:offset + j_end - first] = dist[i - i_start,
+                                                  first - j_start:]
+
+
+def distance_matrix(aln, model='p', form='condensed', out=None, workers=1,
+                    block_size=_BLOCK_SIZE):
+    """Computes the distances between all pairs of sequences of an
+    alignment.
+
+    Parameters
+    ----------
+    aln : Alignment
+        Alignment of nucleotide or codon sequences. Protein alignments only
+        support p-distances.
+    model : str, optional
+        'p' (default), 'jc69', 'k2p', or 'tn93'. See the module
+        documentation.
+    form : str, optional
+        'condensed' (default) for the distances of the pairs i < j listed
+        row by row, as returned by `scipy.spatial.distance.pdist`, or
+        'square' for the full symmetric matrix.
+    out : str or numpy.ndarray, optional
+        Where to write the distances. If a path, a .npy file is created and
+        memory-mapped, and can be read back with `numpy.load` and
+        `mmap_mode`. If an array, it must have the shape of the output.
+        By default, a new array is returned.
+    workers : int, optional
+        Number of processes. 1 (default) computes in the current process,
+        and None uses all CPUs. Workers map a matrix loaded with
+        `Alignment.load` from its file again. Other matrices are copied
+        once into shared memory.
+    block_size : int, optional
+        Number of sequences per side of the tiles of pairs.
+
+    Returns
+    -------
+    numpy.ndarray
+        float64 distances, NaN for pairs without any comparable site and
+        infinity for pairs too divergent for the model.
+
+    Raises
+    ------
+    ValueError
+        If the model is not known or cannot be used with the alignment
+        type, or if `out` does not have the shape of the output.
+
+    """
+    # pylint: disable=protected-access
+    if model not in DISTANCE_MODELS:
+        raise ValueError('model must be one of {}.'.format(
+            ', '.join(DISTANCE_MODELS)))
+    if form not in ('condensed', 'square'):
+        raise ValueError('form must be "condensed" or "square".')
+    stats = aln.site_stats()
+    if model != 'p' and stats.alphabet != 'ACGT':
+        raise ValueError('model {} only applies to nucleotide '
+                         'alignments.'.format(model))
+    matrix = aln._aln_matrix
+    n_seqs = matrix.shape[0]
+    shape = (n_seqs, n_seqs) if form == 'square' else \
+        (n_seqs * (n_seqs - 1) // 2,)
+    if out is None:
+        out = np.empty(shape)
+    elif isinstance(out, str):
+        out = np.lib.format.open_memmap(out, mode='w+', dtype=np.float64,
+                                        shape=shape)
+    elif out.shape != shape:
+        raise ValueError('out has shape {}, but the output has shape '
+                         '{}.'.format(out.shape, shape))
+    totals = stats.counts.sum(axis=0)
+    freqs = totals / max(totals.sum(), 1)
+    state = (_plane_table(stats.alphabet), len(stats.alphabet), model, freqs)
+    bounds = [(start, min(start + block_size, n_seqs))
+              for start in range(0, n_seqs, block_size)]
+    tiles = [(bounds[i], bounds[j]) for i in range(len(bounds))
+             for j in range(i, len(bounds))]
+    if workers is None:
+        workers = os.cpu_count()
+    if workers > 1 and len(tiles) > 1 and matrix.size:
+        # Workers open the matrix themselves instead of each receiving
+        # a pickled copy
+        source, block = _share_matrix(matrix)
+        try:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=_init_worker,
+                                     initargs=(source,) + state) as pool:
+                for tile, dist in zip(tiles, pool.map(_worker_tile, tiles)):
+                    _write_tile(out, dist, tile, n_seqs, form == 'square')
+        finally:
+            if block is not None:
+                block.close()
+                block.unlink()
+    else:
+        for tile in tiles:
+            dist = _tile_distances(matrix, tile, *state)
+            _write_tile(out, dist, tile, n_seqs, form == 'square')
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
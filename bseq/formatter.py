@@ -22,16 +22,10 @@ def fasta_formatted_string(name, sequence, description=None, line_width=None):
         the second line is `sequence`.
 
     """
-    string = '>' + name
-    if description:
-        string += ' ' + description
-    string += '\n'
+    header = '>' + name + (' ' + description if description else '')
     if line_width:
-        last = 0
-        for i in range(line_width, len(sequence), line_width):
-            string += sequence[i-line_width:i] + '\n'
-            last = i
-        string += sequence[last:]
-        return string + '\n'
-    string += sequence
-    return string + '\n'
+        lines = [sequence[i:i+line_width]
+                 for i in range(0, len(sequence), line_width)] or ['']
+    else:
+        lines = [sequence]
+    return '\n'.join([header] + lines) + '\n'
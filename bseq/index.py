@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""Indexed random access to FASTA files.
+
+A FASTA index records where each sequence starts in the file and how its
+lines are laid out, in the same spirit as the samtools faidx format.
+With the index, any sequence, or any range within a sequence, can be
+retrieved by name without reading the rest of the file.
+
+The index is stored in a sidecar file next to the FASTA file and is
+reused across runs. The sidecar also records the size and modification
+time of the FASTA file, and is rebuilt automatically when either changes.
+
+"""
+from collections import namedtuple
+import mmap
+import os
+import numpy as np
+from bseq.compression import detect_compression
+from bseq.reader import _parse_header, _sequence_class, \
+    _iter_record_spans, _map_file
+
+
+INDEX_SUFFIX = '.bfai'
+_INDEX_MAGIC = '#bseq-fasta-index'
+
+FastaIndexRecord = namedtuple('FastaIndexRecord',
+                              'name, description, length, offset, '
+                              'line_bases, line_width')
+
+
+def _line_layout(data, body_start, body_end):
+    """Returns the number of residues, residues per line, and bytes per line
+    of a record's sequence lines, or None if lines other than the last one
+    do not all have the same length.
+    """
+    body = np.frombuffer(data, dtype=np.uint8, count=body_end - body_start,
+                         offset=body_start)
+    newlines = np.flatnonzero(body == ord('\n'))
+    line_ends = np.append(newlines, len(body)) if \
+        (not len(newlines) or newlines[-1] != len(body) - 1) else newlines
+    line_starts = np.append(0, line_ends[:-1] + 1)
+    line_lengths = line_ends - line_starts
+    carriage = np.zeros(len(line_ends), dtype=bool)
+    nonempty = line_lengths > 0
+    carriage[nonempty] = body[line_ends[nonempty] - 1] == ord('\r')
+    residues = line_lengths - carriage
+    # Blank lines are only allowed at the end of the record
+    while len(residues) and residues[-1] == 0:
+        residues = residues[:-1]
+        line_lengths = line_lengths[:-1]
+    if not len(residues):
+        return 0, 0, 0
+    line_bases = int(residues[0])
+    line_width = int(line_lengths[0]) + 1
+    if np.any(residues[:-1] != line_bases) or residues[-1] > line_bases:
+        return None
+    return int(residues.sum()), line_bases, line_width
+
+
+def _scan_fasta(data):
+    """Builds the index records for the FASTA data.
+    """
+    records = []
+    names = set()
+    for header, body_start, body_end in _iter_record_spans(data):
+        name, description = _parse_header(header)
+        if name in names:
+            raise ValueError('duplicate sequence name {}.'.format(name))
+        names.add(name)
+        layout = _line_layout(data, body_start, body_end)
+        if layout is None:
+            raise ValueError('sequence {} has lines of different lengths and '
+                             'cannot be indexed.'.format(name))
+        length, line_bases, line_width = layout
+        records.append(FastaIndexRecord(name, description, length,
+                                        body_start, line_bases, line_width))
+    return records
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _scan_file(path):
+    if detect_compression(path):
+        raise ValueError('compressed FASTA files cannot be indexed.')
+    data = _map_file(path)
+    try:
+        return _scan_fasta(data)
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+
+def _write_index(index_path, records, signature):
+    with open(index_path, 'w') as f:
+        f.write('{}\t{}\t{}\n'.format(_INDEX_MAGIC, *signature))
+        for record in records:
+            f.write('{}\t{}\t{}\t{}\t{}\t{}\n'.format(
+                record.name, record.length, record.offset,
+                record.line_bases, record.line_width,
+                '' if record.description is None else record.description))
+
+
+def _read_index(index_path, signature):
+    """Reads the index sidecar file.
+
+    Returns None if the file does not exist, is malformed, or was built for
+    a FASTA file with a different size or modification time.
+
+    """
+    try:
+        with open(index_path, 'r') as f:
+            magic, size, mtime = f.readline().rstrip('\n').split('\t')
+            if magic != _INDEX_MAGIC or (int(size), int(mtime)) != signature:
+                return None
+            records = []
+            for line in f:
+                name, length, offset, line_bases, line_width, description = \
+                    line.rstrip('\n').split('\t', 5)
+                records.append(FastaIndexRecord(
+                    name, description if description else None, int(length),
+                    int(offset), int(line_bases), int(line_width)))
+            return records
+    except (OSError, ValueError):
+        return None
+
+
+def build_fasta_index(path, index_path=None):
+    """Scans the FASTA file and writes its index to a sidecar file.
+
+    Parameters
+    ----------
+    path : str
+        Path to the FASTA file.
+    index_path : str, optional
+        Path to the index file. By default, the index is written next to
+        the FASTA file with the '.bfai' suffix.
+
+    Returns
+    -------
+    list of FastaIndexRecord
+
+    Raises
+    ------
+    ValueError
+        If the file is compressed, if a sequence name is duplicated, or if
+        the lines of a sequence do not all have the same length.
+
+    """
+    if index_path is None:
+        index_path = path + INDEX_SUFFIX
+    signature = _file_signature(path)
+    records = _scan_file(path)
+    _write_index(index_path, records, signature)
+    return records
+
+
+def load_fasta_index(path, index_path=None):
+    """Returns the index of the FASTA file, building it if the sidecar file
+    is missing or out of date.
+
+    Parameters
+    ----------
+    path : str
+        Path to the FASTA file.
+    index_path : str, optional
+        Path to the index file. By default, the index is read from
+        the '.bfai' file next to the FASTA file.
+
+    Returns
+    -------
+    list of FastaIndexRecord
+
+    """
+    if index_path is None:
+        index_path = path + INDEX_SUFFIX
+    records = _read_index(index_path, _file_signature(path))
+    if records is None:
+        try:
+            records = build_fasta_index(path, index_path=index_path)
+        except PermissionError:
+            # Index cannot be saved, e.g. read-only directory. Keep it
+            # in memory only.
+            records = _scan_file(path)
+    return records
+
+
+class IndexedFasta(object):
+    """Random access to the sequences of a FASTA file by name.
+
+    The FASTA file is memory-mapped, and only the bytes of the requested
+    sequence are read.
+
+    Attributes
+    ----------
+    path : str
+        Path to the FASTA file.
+    seq_type : str
+        nucleotide, protein, or codon
+    records : dict
+        Keys are sequence names and values are the corresponding
+        FastaIndexRecord.
+
+    Notes
+    -----
+    The IndexedFasta object is indexable using [] with a sequence name,
+    like a dictionary. Use the `fetch` method to retrieve only part of a
+    sequence.
+
+    """
+    def __init__(self, path, seq_type='nucleotide', index_path=None):
+        """Opens the FASTA file for random access.
+
+        Parameters
+        ----------
+        path : str
+            Path to the FASTA file.
+        seq_type : str, optional
+            Type of sequence expected. Choices are 'nucleotide',
+            'protein', or 'codon'.
+        index_path : str, optional
+            Path to the index file. By default, the index is stored
+            next to the FASTA file with the '.bfai' suffix.
+
+        """
+        self.path = path
+        self.seq_type = seq_type
+        self._seq_class = _sequence_class(seq_type)
+        self.records = {
+            record.name: record
+            for record in load_fasta_index(path, index_path=index_path)
+        }
+        self._data = _map_file(path)
+
+    def fetch(self, name, start=None, end=None):
+        """Retrieves a sequence, or part of a sequence, by name.
+
+        Parameters
+        ----------
+        name : str
+            Name of the sequence.
+        start : int, optional
+            Position of the first character to retrieve, counting from zero.
+            By default, starts at the beginning of the sequence.
+        end : int, optional
+            Position after the last character to retrieve. By default,
+            ends at the end of the sequence.
+
+        Returns
+        -------
+        Sequence
+            NuclSequence, ProtSequence or CodonSequence depending on
+            `seq_type`.
+
+        Raises
+        ------
+        KeyError
+            If no sequence has the given name.
+
+        """
+        record = self.records[name]
+        start, end, _ = slice(start, end).indices(record.length)
+        end = max(start, end)
+        first = self._byte_offset(record, start)
+        last = self._byte_offset(record, end)
+        raw = self._data[first:last].translate(None, b'\r\n')
+        return self._seq_class(record.name, raw.decode(), record.description)
+
+    def keys(self):
+        """Returns the names of the sequences in the file.
+        """
+        return self.records.keys()
+
+    def close(self):
+        """Releases the memory-mapped file.
+        """
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    @staticmethod
+    def _byte_offset(record, pos):
+        if not record.line_bases:
+            return record.offset
+        return record.offset + (pos // record.line_bases) * record.line_width \
+            + pos % record.line_bases
+
+    def __getitem__(self, name):
+        return self.fetch(name)
+
+    def __contains__(self, name):
+        return name in self.records
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,445 @@
+# -*- coding: utf-8 -*-
+"""K-mer and minimizer index for finding subsequences in sequence sets.
+
+The index maps k-mers to postings, the (sequence, position) pairs where
+each k-mer occurs. Postings are stored in compressed sparse row form: a
+sorted array of distinct k-mer codes, an array of offsets into the
+postings, and the sequence numbers and positions of all postings sorted
+by k-mer.
+
+With a minimizer window `w`, only the minimizer of each run of `w`
+consecutive k-mers is indexed, which makes the index several times
+smaller. Patterns must then be at least `k + w - 1` bases long to be
+found through the index.
+
+A query looks up a k-mer or minimizer of the pattern, and only compares
+the pattern with the sequences and positions listed in its postings.
+Queries with mismatches split the pattern into `mismatches + 1` segments,
+at least one of which must match exactly.
+
+When all k-mers are indexed (`w` = 1), segments shorter than `k` are
+looked up as prefixes of the indexed k-mers, which are contiguous in the
+sorted array of k-mer codes. The segments are placed so that the k-mer
+starting at each segment lies inside the occurrence. Occurrences where
+that k-mer contains a character other than A, C, G and T are found from
+the edges of the runs of such characters in the indexed sequences.
+Patterns that cannot be looked up in either way are compared with every
+position of every sequence, in batches of positions.
+
+"""
+from collections import namedtuple
+import numpy as np
+from bseq.collection import SequenceCollection, _PackedStrings
+from bseq.nucleotide import _kmer_windows, _BASE_CODES, _INVALID_BASE, \
+    reverse_complement
+
+
+KmerHit = namedtuple('KmerHit', 'name, index, position, strand, mismatches')
+
+# Number of candidate positions compared with the pattern at a time
+_VERIFY_BATCH = 1 << 16
+
+# Number of candidate positions generated at a time when scanning all
+# sequences
+_SCAN_BATCH = 1 << 22
+
+# Case-insensitive comparison of patterns and sequences
+_UPPER = np.arange(256, dtype=np.uint8)
+_UPPER[ord('a'):ord('z') + 1] -= 32
+
+
+def _window_minima(kmers, window):
+    """Returns the index of the minimizer of each run of `window`
+    consecutive k-mers.
+
+    K-mers are ordered by a hash of their code rather than by the code
+    itself, so that low-complexity k-mers such as poly-A are not always
+    selected.
+    """
+    hashed = kmers * np.uint64(0x9E3779B97F4A7C15)
+    hashed ^= hashed >> np.uint64(29)
+    windows = np.lib.stride_tricks.sliding_window_view(hashed, window)
+    return windows.argmin(axis=1) + np.arange(len(windows))
+
+
+def _minimizers(positions, kmers, window):
+    """Returns the positions and codes of the minimizers among k-mers.
+    No minimizer is returned if there are fewer than `window` k-mers.
+    """
+    if window <= 1:
+        return positions, kmers
+    if len(kmers) < window:
+        return positions[:0], kmers[:0]
+    selected = np.unique(_window_minima(kmers, window))
+    return positions[selected], kmers[selected]
+
+
+class KmerIndex(object):
+    """Index of the k-mers or minimizers of a set of nucleotide sequences.
+
+    Attributes
+    ----------
+    k : int
+        Length of indexed k-mers.
+    window : int
+        Number of consecutive k-mers from which one minimizer is indexed.
+        1 if all k-mers are indexed.
+    collection : SequenceCollection
+        Indexed sequences.
+
+    """
+    def __init__(self, records, k=11, window=1):
+        """Builds an index over nucleotide sequences.
+
+        Parameters
+        ----------
+        records : SequenceCollection or iterable of Sequence
+            Sequences to index, for example the list returned by
+            `read_fasta_file`.
+        k : int, optional
+            Length of indexed k-mers, from 1 to 32.
+        window : int, optional
+            Minimizer window. If greater than 1, only the minimizer of each
+            run of `window` consecutive k-mers is indexed.
+
+        """
+        if window < 1:
+            raise ValueError('window must be at least 1.')
+        if not isinstance(records, SequenceCollection):
+            records = SequenceCollection.from_sequences(
+                records, seq_type='nucleotide')
+        self.k = k
+        self.window = window
+        self.collection = records
+        # K-mers are computed over all sequences at once, then k-mers
+        # overlapping two sequences are dropped
+        # pylint: disable=protected-access
+        offsets = records._offsets
+        positions, kmers = _kmer_windows(records._data, k)
+        ids = np.searchsorted(offsets, positions, side='right') - 1
+        inside = positions + k <= offsets[ids + 1]
+        positions, kmers, ids = positions[inside], kmers[inside], ids[inside]
+        if window > 1:
+            n_windows = max(len(kmers) - window + 1, 0)
+            minima = _window_minima(kmers, window) if n_windows \
+                else np.empty(0, dtype=np.int64)
+            # Windows spanning two sequences are skipped
+            same = ids[:n_windows] == ids[window-1:window-1+n_windows]
+            selected = np.unique(minima[same])
+            positions, kmers, ids = \
+                positions[selected], kmers[selected], ids[selected]
+        positions = positions - offsets[ids]
+        order = np.argsort(kmers, kind='stable')
+        self._keys, starts = np.unique(kmers[order], return_index=True)
+        self._starts = np.append(starts, len(kmers)).astype(np.int64)
+        self._ids = ids[order]
+        self._positions = positions[order]
+        self._invalid_edges = None
+
+    @property
+    def min_length(self):
+        """Returns the shortest pattern length that can be looked up in
+        the index through its k-mers or minimizers. See `find` for how
+        shorter patterns and segments are searched.
+        """
+        return self.k + self.window - 1
+
+    @property
+    def nbytes(self):
+        """Returns the number of bytes used by the index, excluding the
+        indexed sequences.
+        """
+        return self._keys.nbytes + self._starts.nbytes + \
+            self._ids.nbytes + self._positions.nbytes
+
+    def postings(self, kmer):
+        """Returns the sequence numbers and positions where a k-mer occurs.
+
+        With a minimizer window, only occurrences where the k-mer is a
+        minimizer are returned.
+
+        Parameters
+        ----------
+        kmer : str or int
+            K-mer string of length `k`, or k-mer code.
+
+        Returns
+        -------
+        tuple of numpy.ndarray
+            Sequence numbers and positions.
+
+        """
+        if isinstance(kmer, str):
+            codes = _kmer_windows(
+                np.frombuffer(kmer.encode(), dtype=np.uint8), self.k)[1]
+            if len(kmer) != self.k or len(codes) != 1:
+                return np.empty(0, dtype=np.int64), \
+                    np.empty(0, dtype=np.int64)
+            kmer = codes[0]
+        i = np.searchsorted(self._keys, np.uint64(kmer))
+        if i == len(self._keys) or self._keys[i] != np.uint64(kmer):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        start, end = self._starts[i], self._starts[i+1]
+        return self._ids[start:end], self._positions[start:end]
+
+    def find(self, pattern, mismatches=0, both_strands=False):
+        """Finds the occurrences of a pattern in the indexed sequences.
+
+        Parameters
+        ----------
+        pattern : str
+            Nucleotide pattern made of A, C, G and T. Comparison is not
+            case-sensitive.
+        mismatches : int, optional
+            Maximum number of mismatching positions.
+        both_strands : bool, optional
+            If True, the reverse complement of the pattern is also searched.
+
+        Returns
+        -------
+        list of KmerHit
+            Occurrences sorted by sequence number, position and strand.
+
+        Notes
+        -----
+        The pattern is split into `mismatches + 1` segments that are
+        looked up in the index. With a minimizer window, segments must be
+        at least `min_length` bases long. Without one, segments shorter
+        than `k` are looked up as k-mer prefixes, which needs a pattern at
+        least `k + mismatches` bases long when there are mismatches, and
+        `k` bases otherwise. Other patterns, and segments that contain
+        characters other than A, C, G and T, are searched by comparing the
+        pattern with every position of every sequence.
+
+        """
+        strands = [('+', pattern)]
+        if both_strands:
+            strands.append(('-', reverse_complement(pattern)))
+        hits = []
+        for strand, query in strands:
+            codes = _UPPER[np.frombuffer(query.encode(), dtype=np.uint8)]
+            for ids, starts in self._candidates(codes, mismatches):
+                ids, starts, counts = self._verify(codes, ids, starts,
+                                                   mismatches)
+                hits.extend(
+                    KmerHit(self.collection.name(i), i, start, strand, n)
+                    for i, start, n in zip(ids.tolist(), starts.tolist(),
+                                           counts.tolist()))
+        hits.sort(key=lambda hit: (hit.index, hit.position, hit.strand))
+        return hits
+
+    def names_containing(self, pattern, mismatches=0, both_strands=False):
+        """Returns the names of the sequences containing a pattern.
+
+        See `find` for the parameters.
+
+        Returns
+        -------
+        list of str
+            Names in index order.
+
+        """
+        indexes = sorted({hit.index for hit in
+                          self.find(pattern, mismatches=mismatches,
+                                    both_strands=both_strands)})
+        return [self.collection.name(i) for i in indexes]
+
+    def _candidates(self, codes, mismatches):
+        """Yields batches of sequence numbers and start positions where the
+        pattern may occur.
+        """
+        n_segments = mismatches + 1
+        segment_length = len(codes) // n_segments
+        if segment_length >= self.min_length:
+            seeds = self._segment_seeds(codes, n_segments, segment_length)
+        elif self.window == 1 and mismatches and \
+                len(codes) - self.k >= mismatches:
+            # The k-mer starting at the last segment must end inside the
+            # pattern
+            seeds = self._prefix_seeds(codes, n_segments, min(
+                segment_length, (len(codes) - self.k) // mismatches))
+        else:
+            seeds = None
+        if seeds is None:
+            yield from self._all_positions(len(codes))
+            return
+        ids = np.concatenate([ids for ids, _ in seeds])
+        starts = np.concatenate([starts for _, starts in seeds])
+        if len(seeds) > 1:
+            pairs = np.unique(np.stack([ids, starts], axis=1), axis=0)
+            ids, starts = pairs[:, 0], pairs[:, 1]
+        yield ids, starts
+
+    def _segment_seeds(self, codes, n_segments, segment_length):
+        """Returns the candidates of each segment of the pattern, found
+        through its rarest k-mer or minimizer, or None if a segment cannot
+        be looked up.
+        """
+        seeds = []
+        for j in range(n_segments):
+            offset = j * segment_length
+            segment = codes[offset:offset + segment_length]
+            positions, kmers = _minimizers(
+                *_kmer_windows(segment, self.k), self.window)
+            if len(kmers) == 0:
+                # Segment has non-ACGT characters and cannot be looked up
+                return None
+            # Any k-mer or minimizer of the segment is also indexed where
+            # the segment occurs, so the rarest one is used
+            best = None
+            for position, kmer in zip(positions.tolist(), kmers.tolist()):
+                ids, starts = self.postings(kmer)
+                if best is None or len(ids) < len(best[0]):
+                    best = ids, starts - position - offset
+            seeds.append(best)
+        return seeds
+
+    def _prefix_seeds(self, codes, n_segments, segment_length):
+        """Returns the candidates of each segment of the pattern, found
+        through the k-mers that start with the segment, and the candidates
+        near runs of non-ACGT characters, where these k-mers are not
+        indexed. Returns None if a segment cannot be looked up.
+        """
+        shift = 2 * (self.k - segment_length)
+        seeds = []
+        for j in range(n_segments):
+            offset = j * segment_length
+            kmers = _kmer_windows(codes[offset:offset + segment_length],
+                                  segment_length)[1]
+            if len(kmers) == 0:
+                return None
+            # Python integers, as the upper bound overflows for k = 32
+            low = int(kmers[0]) << shift
+            high = (int(kmers[0]) + 1) << shift
+            first = np.searchsorted(self._keys, np.uint64(low))
+            last = len(self._keys) if high >= 1 << 64 else \
+                np.searchsorted(self._keys, np.uint64(high))
+            start, end = self._starts[first], self._starts[last]
+            seeds.append((self._ids[start:end],
+                          self._positions[start:end] - offset))
+        # An occurrence whose seed k-mer was not indexed contains a non-ACGT
+        # character, and since it has few mismatches, the first or last
+        # character of its run
+        # pylint: disable=protected-access
+        edges = self._get_invalid_edges()
+        offsets = self.collection._offsets
+        ids = np.searchsorted(offsets, edges, side='right') - 1
+        shifts = np.arange(len(codes))
+        seeds.append((np.repeat(ids, len(codes)),
+                      ((edges - offsets[ids])[:, None] - shifts).ravel()))
+        return seeds
+
+    def _get_invalid_edges(self):
+        """Returns the positions in the packed sequence data of the first
+        and last characters of each run of non-ACGT characters.
+        The positions are found on first use.
+        """
+        if self._invalid_edges is None:
+            invalid = _BASE_CODES[self.collection._data] == _INVALID_BASE  # pylint: disable=protected-access
+            before = np.concatenate(([False], invalid[:-1]))
+            after = np.concatenate((invalid[1:], [False]))
+            self._invalid_edges = np.flatnonzero(
+                invalid & ~(before & after))
+        return self._invalid_edges
+
+    def _all_positions(self, length):
+        """Yields every position of every sequence as candidates, for
+        patterns that cannot be looked up in the index. Candidates are
+        numbered across sequences and yielded `_SCAN_BATCH` at a time.
+        """
+        n_starts = np.maximum(self.collection.lengths - length + 1, 0)
+        totals = np.cumsum(n_starts)
+        n_total = int(totals[-1]) if len(totals) else 0
+        for first in range(0, n_total, _SCAN_BATCH):
+            numbers = np.arange(first, min(first + _SCAN_BATCH, n_total))
+            ids = np.searchsorted(totals, numbers, side='right')
+            yield ids, numbers - (totals[ids] - n_starts[ids])
+
+    def _verify(self, codes, ids, starts, mismatches):
+        """Compares the pattern with the sequences at candidate positions
+        and keeps those with at most `mismatches` mismatching positions.
+        """
+        # pylint: disable=protected-access
+        data = self.collection._data
+        offsets = self.collection._offsets
+        lengths = offsets[ids + 1] - offsets[ids] if len(ids) else ids
+        inside = (starts >= 0) & (starts + len(codes) <= lengths)
+        ids, starts = ids[inside], starts[inside]
+        keep = []
+        counts = []
+        columns = np.arange(len(codes))
+        for first in range(0, len(ids), _VERIFY_BATCH):
+            batch = slice(first, first + _VERIFY_BATCH)
+            rows = (offsets[ids[batch]] + starts[batch])[:, None] + columns
+            n_mismatches = np.count_nonzero(_UPPER[data[rows]] != codes,
+                                            axis=1)
+            keep.append(n_mismatches <= mismatches)
+            counts.append(n_mismatches)
+        if not keep:
+            return ids, starts, np.empty(0, dtype=np.int64)
+        keep = np.concatenate(keep)
+        return ids[keep], starts[keep], np.concatenate(counts)[keep]
+
+    def save(self, path):
+        """Writes the index and the indexed sequences to a NumPy .npz file.
+
+        Parameters
+        ----------
+        path : str
+            Path to the output file. It is used as is, without adding
+            a .npz extension.
+
+        See also
+        --------
+        load
+
+        """
+        # pylint: disable=protected-access
+        collection = self.collection
+        # Writing to an open file keeps np.savez from appending .npz to
+        # the path
+        with open(path, 'wb') as f:
+            np.savez(f,
+                     k=np.array(self.k), window=np.array(self.window),
+                     keys=self._keys, starts=self._starts,
+                     ids=self._ids, positions=self._positions,
+                     data=collection._data, offsets=collection._offsets,
+                     names=collection._names._data,
+                     name_offsets=collection._names._offsets,
+                     descriptions=collection._descriptions._data,
+                     description_offsets=collection._descriptions._offsets)
+
+    @classmethod
+    def load(cls, path):
+        """Reads an index written by `save`.
+
+        Parameters
+        ----------
+        path : str
+            Path to the .npz file.
+
+        Returns
+        -------
+        KmerIndex
+
+        """
+        # pylint: disable=protected-access
+        with np.load(path, allow_pickle=False) as arrays:
+            index = cls.__new__(cls)
+            index.k = int(arrays['k'])
+            index.window = int(arrays['window'])
+            index._keys = arrays['keys']
+            index._starts = arrays['starts']
+            index._ids = arrays['ids']
+            index._positions = arrays['positions']
+            index._invalid_edges = None
+            index.collection = SequenceCollection(
+                arrays['data'], arrays['offsets'],
+                _PackedStrings(arrays['names'], arrays['name_offsets']),
+                _PackedStrings(arrays['descriptions'],
+                               arrays['description_offsets']),
+                seq_type='nucleotide')
+        return index
+
+    def __len__(self):
+        return len(self.collection)
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""Sequence records that load their sequence from a file on demand.
+
+A lazy record only keeps the name, description, byte offset and length
+of a sequence in a FASTA file. The sequence itself is read from the file
+the first time it is needed, so passes that only look at names and
+lengths use almost no memory.
+
+Loaded sequences are either kept by each record, or held in a bounded
+least-recently-used cache shared by all records of the same file.
+
+"""
+from collections import OrderedDict
+import mmap
+import os
+from bseq.sequence import NuclSequence, ProtSequence, CodonSequence
+
+
+class FastaSource(object):
+    """Loads sequences of an uncompressed FASTA file from byte ranges.
+
+    Attributes
+    ----------
+    path : str
+        Path to the FASTA file.
+    cache_size : int or None
+        Maximum number of loaded sequences kept in the shared cache. If
+        None, each record keeps its own sequence once loaded. If 0,
+        sequences are read from the file on every access.
+
+    """
+    def __init__(self, path, cache_size=None):
+        """Creates a new source for the FASTA file.
+
+        Parameters
+        ----------
+        path : str
+            Path to the uncompressed FASTA file.
+        cache_size : int, optional
+            Maximum number of loaded sequences kept in the shared cache.
+
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._data = None
+
+    def load(self, offset, end):
+        """Returns the sequence stored between two byte offsets,
+        without line breaks.
+
+        Parameters
+        ----------
+        offset : int
+            Byte offset where the sequence lines start.
+        end : int
+            Byte offset where the sequence lines end.
+
+        Returns
+        -------
+        str
+
+        """
+        if offset in self._cache:
+            self._cache.move_to_end(offset)
+            return self._cache[offset]
+        if self._data is None:
+            with open(self.path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    self._data = b''
+                else:
+                    self._data = mmap.mmap(f.fileno(), 0,
+                                           access=mmap.ACCESS_READ)
+        sequence = b''.join(self._data[offset:end].split()).decode()
+        if self.cache_size:
+            self._cache[offset] = sequence
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return sequence
+
+    def close(self):
+        """Releases the memory-mapped file and the cached sequences.
+
+        Records can still be loaded afterwards, and map the file again.
+        """
+        self._cache.clear()
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __getstate__(self):
+        # The file is mapped again when a copy loads its first sequence
+        state = self.__dict__.copy()
+        state['_cache'] = OrderedDict()
+        state['_data'] = None
+        return state
+
+
+class _LazySequenceMixin(object):
+    """Replaces the stored sequence of a Sequence subclass with one loaded
+    from a FastaSource on first access.
+    """
+    __slots__ = ()
+
+    def _init_lazy(self, name, description, seq_type,
+                   source, offset, end, length):
+        self.name = name
+        self.description = description
+        self.seq_type = seq_type
+        self._source = source
+        self._offset = offset
+        self._end = end
+        self._length = length
+        self._loaded = None
+        self._content_hash = None
+        self._clear_caches()
+
+    @property
+    def source(self):
+        """Returns the FastaSource the sequence is loaded from. All records
+        read from the same file share it.
+        """
+        return self._source
+
+    @property
+    def offset(self):
+        """Returns the byte offset where the sequence lines start
+        in the file.
+        """
+        return self._offset
+
+    @property
+    def is_loaded(self):
+        """Returns whether the sequence is held by this record.
+        """
+        return self._loaded is not None
+
+    @property
+    def _sequence(self):
+        if self._loaded is not None:
+            return self._loaded
+        sequence = self._source.load(self._offset, self._end)
+        if self._source.cache_size is None:
+            self._loaded = sequence
+        return sequence
+
+    def _get_views(self):
+        # Views are only kept along with the sequence
+        if self._source.cache_size is None:
+            return super()._get_views()
+        return self._make_views()
+
+    def __len__(self):
+        return self._length
+
+
+class LazyNuclSequence(_LazySequenceMixin, NuclSequence):
+    """NuclSequence whose sequence is loaded from a file on first access.
+
+    See also
+    --------
+    NuclSequence
+    FastaSource
+
+    """
+    __slots__ = ('_source', '_offset', '_end', '_length', '_loaded')
+
+    def __init__(self, name, source, offset, end, length, description=None):
+        """Creates a new lazy nucleotide sequence record.
+
+        Parameters
+        ----------
+        name : str
+            Name of the sequence.
+        source : FastaSource
+            File the sequence is loaded from.
+        offset : int
+            Byte offset where the sequence lines start.
+        end : int
+            Byte offset where the sequence lines end.
+        length : int
+            Number of characters in the sequence.
+        description : str, optional
+            Description of the sequence.
+
+        """
+        # pylint: disable=super-init-not-called
+        self._init_lazy(name, description, 'nucleotide',
+                        source, offset, end, length)
+
+
+class LazyProtSequence(_LazySequenceMixin, ProtSequence):
+    """ProtSequence whose sequence is loaded from a file on first access.
+
+    See also
+    --------
+    ProtSequence
+    FastaSource
+
+    """
+    __slots__ = ('_source', '_offset', '_end', '_length', '_loaded')
+
+    def __init__(self, name, source, offset, end, length, description=None):
+        """Creates a new lazy protein sequence record.
+
+        Parameters
+        ----------
+        name : str
+            Name of the sequence.
+        source : FastaSource
+            File the sequence is loaded from.
+        offset : int
+            Byte offset where the sequence lines start.
+        end : int
+            Byte offset where the sequence lines end.
+        length : int
+            Number of characters in the sequence.
+        description : str, optional
+            Description of the sequence.
+
+        """
+        # pylint: disable=super-init-not-called
+        self._init_lazy(name, description, 'protein',
+                        source, offset, end, length)
+
+
+class LazyCodonSequence(_LazySequenceMixin, CodonSequence):
+    """CodonSequence whose sequence is loaded from a file on first access.
+
+    See also
+    --------
+    CodonSequence
+    FastaSource
+
+    """
+    __slots__ = ('_source', '_offset', '_end', '_length', '_loaded')
+
+    def __init__(self, name, source, offset, end, length, description=None):
+        """Creates a new lazy codon sequence record.
+
+        Parameters
+        ----------
+        name : str
+            Name of the sequence.
+        source : FastaSource
+            File the sequence is loaded from.
+        offset : int
+            Byte offset where the sequence lines start.
+        end : int
+            Byte offset where the sequence lines end.
+        length : int
+            Number of nucleotides in the sequence.
+        description : str, optional
+            Description of the sequence.
+
+        """
+        # pylint: disable=super-init-not-called
+        self._init_lazy(name, description, 'codon',
+                        source, offset, end, length)
+
+    def __len__(self):
+        return self._length // 3
+
+
+_LAZY_SEQUENCE_CLASSES = {
+    'nucleotide': LazyNuclSequence,
+    'protein': LazyProtSequence,
+    'codon': LazyCodonSequence,
+}
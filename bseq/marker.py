@@ -1,10 +1,25 @@
 # -*- coding: utf-8 -*-
 """Data structure models for marker sequences in alignments.
 """
-from collections import Iterable
 import numpy as np
 
 
+# Character code of alignment gaps
+_GAP = ord('-')
+
+
+def _runs(site_codes):
+    """Returns the (start, end) positions of each run of equal values in an
+    array, and the value of each run.
+    """
+    # Runs start where the value differs from the previous site
+    starts = np.flatnonzero(site_codes[1:] != site_codes[:-1]) + 1
+    starts = np.concatenate(([0], starts)) if len(site_codes) \
+        else starts[:0]
+    ends = np.append(starts[1:], len(site_codes))
+    return list(zip(starts.tolist(), ends.tolist())), site_codes[starts]
+
+
 class Marker(object):
     """Annotates sites in the alignment using a marker sequence
     to label various types of sites.
@@ -206,6 +221,64 @@ class Marker(object):
                         c, ', '.join(allowed_chars))
                     )
 
+    @classmethod
+    def _from_runs(cls, name, char_description, pos_list, char_list,
+                   description=None):
+        """Creates a marker directly from its run-length encoding, without
+        building the marker sequence string.
+
+        Parameters
+        ----------
+        name : str
+            Name of the marker.
+        char_description : dict
+            Keys are allowed characters and values are description of what
+            the particular marker character means.
+        pos_list : iterable of tuple of (int, int)
+            Start (inclusive) and end (exclusive) positions of each run.
+        char_list : iterable of str
+            Marker character of each run.
+        description : str, optional
+            Description for this marker sequence.
+
+        Returns
+        -------
+        Marker
+
+        """
+        marker = cls.__new__(cls)
+        marker.name = name
+        marker.description = description
+        marker.char_description = char_description
+        marker._pos_list = tuple(tuple(pos) for pos in pos_list)
+        marker._char_list = tuple(char_list)
+        marker.check_sequence(marker._char_list,
+                              list(marker.char_description.keys()))
+        return marker
+
+    def _subset(self, coords):
+        """Returns a marker of the same class containing only the given
+        positions, computed from the run-length encoding.
+
+        Parameters
+        ----------
+        coords : numpy.ndarray
+            Sorted positions to keep.
+
+        Returns
+        -------
+        Marker
+
+        """
+        lengths = [end - start for start, end in self._pos_list]
+        chars, char_ids = np.unique(np.array(self._char_list, dtype=str),
+                                    return_inverse=True)
+        site_chars = np.repeat(char_ids.reshape(-1), lengths)[coords]
+        pos_list, run_chars = _runs(site_chars)
+        return type(self)._from_runs(
+            self.name, self.char_description, pos_list,
+            chars[run_chars].tolist(), description=self.description)
+
     def _encode(self, sequence):
         """Encodes the marker sequence string into a list of coordinates.
 
@@ -265,6 +338,74 @@ class ConsAlignMarker(Marker):
         super().__init__(name, char_description, marker_sequence,
                          description=description)
 
+    @classmethod
+    def from_alignments(cls, aln, other_aln,
+                        name='ConsAlign_marker_sequence', description=None):
+        """Creates a ConsAlign marker by comparing two alignments of the
+        same sequences.
+
+        A site of `aln` is consistent ('C') if `other_aln` has a site that
+        aligns exactly the same residues of every sequence, and
+        inconsistent ('N') otherwise. Sites made only of gaps are
+        inconsistent. Sequences are matched by name.
+
+        Parameters
+        ----------
+        aln : Alignment
+            Alignment whose sites are marked.
+        other_aln : Alignment
+            Another alignment of the same sequences, for example made by
+            a different program.
+        name : str, optional
+            Name of the marker.
+        description : str, optional
+            Description for the marker.
+
+        Returns
+        -------
+        ConsAlignMarker
+            Marker with one character per site of `aln`.
+
+        Raises
+        ------
+        ValueError
+            If the alignments do not contain the same sequences.
+
+        """
+        # pylint: disable=protected-access
+        names = [record.name for record in aln._records]
+        if sorted(names) != sorted(r.name for r in other_aln._records):
+            raise ValueError('alignments do not contain the same sequences.')
+        matrix = aln._aln_matrix
+        other = other_aln._aln_matrix[
+            [other_aln._records_lookup_d[n] for n in names]]
+        residues = matrix != _GAP
+        other_residues = other != _GAP
+        if (residues.sum(axis=1) != other_residues.sum(axis=1)).any() or \
+                (matrix[residues] != other[other_residues]).any():
+            raise ValueError('alignments do not contain the same sequences.')
+        consistent = residues.any(axis=0)
+        if consistent.any():
+            # Number of each residue within its sequence, -1 for gaps
+            numbers = np.where(residues, np.cumsum(residues, axis=1) - 1, -1)
+            other_numbers = np.where(
+                other_residues, np.cumsum(other_residues, axis=1) - 1, -1)
+            # Site of `other_aln` holding the same residue as the first
+            # ungapped sequence of each site of `aln`. Residues of
+            # `other_aln` are listed row by row.
+            first = residues.argmax(axis=0)
+            row_starts = np.concatenate(
+                ([0], np.cumsum(other_residues.sum(axis=1))[:-1]))
+            other_sites = np.nonzero(other_residues)[1]
+            match = other_sites[row_starts[first] +
+                                numbers[first, np.arange(len(first))]]
+            consistent &= (other_numbers[:, match] == numbers).all(axis=0)
+        pos_list, run_flags = _runs(consistent)
+        return cls._from_runs(
+            name, {'C': 'consistent site', 'N': 'inconsistent site'},
+            pos_list, ['C' if flag else 'N' for flag in run_flags.tolist()],
+            description=description)
+
     def consistent_sites(self, aligned_sequence, marker_char='C'):
         """Returns the aligned sequence containing only the consistent sites
         according to the ConsAlign marker sequence.
@@ -428,6 +569,44 @@ class GapMarker(Marker):
         super().__init__(name, char_description, marker_sequence,
                          description=description)
 
+    @classmethod
+    def from_alignment(cls, aln, max_gap_fraction=0.0,
+                       name='Gap_marker_sequence', description=None):
+        """Creates a gap marker from the gaps of an alignment.
+
+        Gaps are counted over every column of the alignment matrix at once,
+        and the marker is encoded from the runs of gapped and ungapped
+        sites without building the marker sequence string.
+
+        Parameters
+        ----------
+        aln : Alignment
+            Alignment to mark.
+        max_gap_fraction : float, optional
+            Sites where the fraction of sequences with a gap ('-') is
+            greater than this value are marked 'X', other sites are marked
+            'O'. By default, any site with a gap is marked.
+        name : str, optional
+            Name of the GapMarker.
+        description : str, optional
+            Description for the marker.
+
+        Returns
+        -------
+        GapMarker
+            Marker with one character per site of the alignment.
+
+        """
+        matrix = aln._aln_matrix  # pylint: disable=protected-access
+        n_gaps = np.count_nonzero(matrix == _GAP, axis=0)
+        gapped = n_gaps > max_gap_fraction * matrix.shape[0]
+        pos_list, run_flags = _runs(gapped)
+        return cls._from_runs(
+            name, {'O': 'ungapped site',
+                   'X': 'site has at least one gap present'},
+            pos_list, ['X' if flag else 'O' for flag in run_flags.tolist()],
+            description=description)
+
     def remove_gaps(self, aligned_sequence, marker_char='X'):
         """Returns the aligned sequence containing only the sites
         that do not have gaps based on the gap marker sequence.
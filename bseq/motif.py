@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""IUPAC-aware motif search.
+
+A motif such as `GGNCC` or `RGATCY` is compiled into one bitmask per
+position, where each bit stands for one base (A=1, C=2, G=4, T=8) or one
+amino acid. The searched sequence is converted to bitmasks in the same
+way, so ambiguity codes are understood in both the motif and the
+sequence. Matches are found with one vectorized comparison per motif
+position over the whole sequence, or over all rows of an alignment at
+once.
+
+By default, an ambiguous character in the sequence only matches if every
+base or amino acid it stands for is allowed by the motif. With
+`match_ambiguous=True`, it matches if any of them is allowed. Gaps never
+match.
+
+"""
+import numpy as np
+from bseq.writer import _as_byte_matrix
+
+
+_NUCL_BASES = {
+    'A': 'A', 'C': 'C', 'G': 'G', 'T': 'T', 'U': 'T',
+    'R': 'AG', 'Y': 'CT', 'S': 'CG', 'W': 'AT', 'K': 'GT', 'M': 'AC',
+    'B': 'CGT', 'D': 'AGT', 'H': 'ACT', 'V': 'ACG', 'N': 'ACGT',
+}
+_AMINO_ACIDS = 'ACDEFGHIKLMNPQRSTVWYOU*'
+_PROT_AMBIGUITY = {
+    'B': 'DN', 'Z': 'EQ', 'J': 'IL', 'X': _AMINO_ACIDS[:-1],
+}
+
+
+def _mask_table(alphabet, ambiguity, dtype):
+    """Returns an array mapping character codes to bitmasks, with bit `i`
+    standing for `alphabet[i]`. Characters outside the alphabet map to 0.
+    """
+    table = np.zeros(256, dtype=dtype)
+    symbols = {c: c for c in alphabet}
+    symbols.update(ambiguity)
+    for char, members in symbols.items():
+        mask = 0
+        for member in members:
+            mask |= 1 << alphabet.index(member)
+        table[ord(char)] = table[ord(char.lower())] = mask
+    return table
+
+
+_MASK_TABLES = {
+    'nucleotide': _mask_table('ACGT', _NUCL_BASES, np.uint8),
+    'protein': _mask_table(_AMINO_ACIDS, _PROT_AMBIGUITY, np.uint32),
+}
+
+# Complement of nucleotide bitmasks: A (1) <-> T (8), C (2) <-> G (4)
+_COMPLEMENT_MASKS = np.array(
+    [((m & 1) << 3) | ((m & 2) << 1) | ((m & 4) >> 1) | ((m & 8) >> 3)
+     for m in range(16)], dtype=np.uint8)
+
+
+class Motif(object):
+    """Motif compiled to per-position bitmasks.
+
+    Attributes
+    ----------
+    pattern : str
+        Motif using IUPAC codes.
+    seq_type : str
+        nucleotide or protein
+    masks : numpy.ndarray
+        Bitmask of the characters allowed at each position of the motif.
+
+    """
+    def __init__(self, pattern, seq_type='nucleotide'):
+        """Compiles a motif.
+
+        Parameters
+        ----------
+        pattern : str
+            Motif using IUPAC nucleotide or amino acid codes.
+        seq_type : str, optional
+            'nucleotide' or 'protein'. Codon sequences are searched as
+            nucleotides.
+
+        Raises
+        ------
+        ValueError
+            If the motif is empty or contains characters that are not
+            IUPAC codes.
+
+        """
+        if seq_type == 'codon':
+            seq_type = 'nucleotide'
+        if seq_type not in _MASK_TABLES:
+            raise ValueError('seq_type must be "nucleotide", "protein", '
+                             'or "codon".')
+        if not pattern:
+            raise ValueError('motif must not be empty.')
+        self.pattern = pattern
+        self.seq_type = seq_type
+        self.masks = _MASK_TABLES[seq_type][
+            np.frombuffer(pattern.encode(), dtype=np.uint8)]
+        if not self.masks.all():
+            raise ValueError('motif {} contains characters that are not '
+                             'IUPAC codes.'.format(pattern))
+
+    def reverse_complement(self):
+        """Returns the motif matching the reverse complement strand.
+        Only for nucleotide motifs.
+        """
+        if self.seq_type != 'nucleotide':
+            raise ValueError('only nucleotide motifs can be '
+                             'reverse complemented.')
+        motif = Motif.__new__(Motif)
+        motif.pattern = self.pattern
+        motif.seq_type = self.seq_type
+        motif.masks = _COMPLEMENT_MASKS[self.masks[::-1]]
+        return motif
+
+    def scan(self, codes, match_ambiguous=False):
+        """Returns where the motif matches in arrays of character codes.
+
+        Parameters
+        ----------
+        codes : numpy.ndarray
+            uint8 character codes of one sequence, or a matrix with one
+            sequence per row.
+        match_ambiguous : bool, optional
+            If True, ambiguous characters in the sequence match if any of
+            the characters they stand for is allowed by the motif.
+
+        Returns
+        -------
+        numpy.ndarray
+            Boolean array over the last axis, True where a match starts.
+
+        """
+        subject = _MASK_TABLES[self.seq_type][codes]
+        n_starts = subject.shape[-1] - len(self.masks) + 1
+        if n_starts <= 0:
+            return np.zeros(subject.shape[:-1] + (0,), dtype=bool)
+        hits = np.ones(subject.shape[:-1] + (n_starts,), dtype=bool)
+        for j, mask in enumerate(self.masks):
+            window = subject[..., j:j+n_starts]
+            if match_ambiguous:
+                hits &= (window & mask) != 0
+            else:
+                hits &= (window != 0) & ((window & ~mask) == 0)
+        return hits
+
+    def find(self, sequence, both_strands=False, match_ambiguous=False):
+        """Finds the start positions of the motif in a sequence.
+
+        Parameters
+        ----------
+        sequence : str or Sequence
+            Sequence to search.
+        both_strands : bool, optional
+            If True, also searches the reverse complement strand of
+            a nucleotide sequence.
+        match_ambiguous : bool, optional
+            See `scan`.
+
+        Returns
+        -------
+        numpy.ndarray or tuple of numpy.ndarray
+            Start positions of the matches. With `both_strands`, a tuple
+            of start positions on the forward strand and on the reverse
+            strand, both counted from the start of the forward strand.
+
+        """
+        if isinstance(sequence, str):
+            codes = np.frombuffer(sequence.encode(), dtype=np.uint8)
+        else:
+            codes = sequence._codes()  # pylint: disable=protected-access
+        forward = np.flatnonzero(self.scan(codes, match_ambiguous))
+        if not both_strands:
+            return forward
+        reverse = np.flatnonzero(
+            self.reverse_complement().scan(codes, match_ambiguous))
+        return forward, reverse
+
+
+def find_motif(sequence, pattern, both_strands=False, match_ambiguous=False,
+               seq_type=None):
+    """Finds the start positions of a motif in a sequence.
+
+    Parameters
+    ----------
+    sequence : str or Sequence
+        Sequence to search.
+    pattern : str or Motif
+        Motif using IUPAC codes.
+    both_strands : bool, optional
+        If True, also searches the reverse complement strand.
+    match_ambiguous : bool, optional
+        If True, ambiguous characters in the sequence match if any of the
+        characters they stand for is allowed by the motif.
+    seq_type : str, optional
+        Type of the motif, by default the type of the sequence, or
+        'nucleotide' for strings.
+
+    Returns
+    -------
+    numpy.ndarray or tuple of numpy.ndarray
+        See `Motif.find`.
+
+    """
+    motif = _compile(pattern, seq_type or getattr(sequence, 'seq_type',
+                                                  'nucleotide'))
+    return motif.find(sequence, both_strands=both_strands,
+                      match_ambiguous=match_ambiguous)
+
+
+def batch_find_motif(records, pattern, both_strands=False,
+                     match_ambiguous=False, seq_type=None):
+    """Finds the start positions of a motif in each sequence.
+
+    All rows of an alignment are searched at once. Positions in alignment
+    rows are alignment columns, and gaps inside a match prevent it.
+
+    Parameters
+    ----------
+    records : Alignment, SequenceCollection, or iterable of Sequence
+        Sequences to search.
+    pattern : str or Motif
+        Motif using IUPAC codes.
+    both_strands : bool, optional
+        If True, also searches the reverse complement strand.
+    match_ambiguous : bool, optional
+        See `find_motif`.
+    seq_type : str, optional
+        Type of the motif when `pattern` is a string. By default, the type
+        of the alignment, collection, or of each sequence.
+
+    Returns
+    -------
+    list
+        Result of `Motif.find` for each sequence.
+
+    """
+    if not (hasattr(records, '_aln_matrix') or hasattr(records, 'codes')):
+        return [find_motif(seq_obj, pattern, both_strands=both_strands,
+                           match_ambiguous=match_ambiguous,
+                           seq_type=seq_type)
+                for seq_obj in records]
+    motif = _compile(pattern, seq_type or getattr(records, 'aln_type', None)
+                     or getattr(records, 'seq_type', None) or 'nucleotide')
+    motifs = [motif]
+    if both_strands:
+        motifs.append(motif.reverse_complement())
+    if hasattr(records, '_aln_matrix'):
+        if not records._records:  # pylint: disable=protected-access
+            return []
+        matrix = _as_byte_matrix(records._aln_matrix)  # pylint: disable=protected-access
+        strands = [[np.flatnonzero(row) for row in
+                    m.scan(matrix, match_ambiguous)] for m in motifs]
+    else:
+        strands = [_scan_collection(records, m, match_ambiguous)
+                   for m in motifs]
+    if both_strands:
+        return list(zip(*strands))
+    return strands[0]
+
+
+def _scan_collection(collection, motif, match_ambiguous):
+    """Scans the whole residue buffer of a SequenceCollection at once and
+    splits the matches by sequence, dropping matches that span two
+    sequences.
+    """
+    # pylint: disable=protected-access
+    offsets = collection._offsets
+    starts = np.flatnonzero(motif.scan(collection._data, match_ambiguous))
+    ids = np.searchsorted(offsets, starts, side='right') - 1
+    inside = starts + len(motif.masks) <= offsets[ids + 1]
+    starts, ids = starts[inside], ids[inside]
+    bounds = np.searchsorted(ids, np.arange(len(collection) + 1))
+    return [starts[bounds[i]:bounds[i+1]] - offsets[i]
+            for i in range(len(collection))]
+
+
+def _compile(pattern, seq_type):
+    if isinstance(pattern, Motif):
+        return pattern
+    return Motif(pattern, seq_type=seq_type)
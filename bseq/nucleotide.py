@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""Vectorized utilities for nucleotide sequences.
+
+This module contains functions to compute reverse complements, GC content
+and k-mer counts of nucleotide sequences. Each function accepts a
+sequence string, and has a batch version that accepts an Alignment, a
+SequenceCollection, or an iterable of Sequence objects.
+
+All functions understand the IUPAC nucleotide codes in both upper and
+lower case. K-mers are encoded as integers using 2 bits per base in ACGT
+order (A=0, C=1, G=2, T=3), so that k-mers of up to 32 bases fit in a
+64-bit integer.
+
+"""
+from collections import Counter
+import numpy as np
+from bseq.writer import _as_byte_matrix
+
+
+# K-mer counts are returned as dense arrays of 4**k counts up to this k
+DENSE_KMER_MAX = 10
+KMER_MAX = 32
+
+_KMER_ALPHABET = 'ACGT'
+_INVALID_BASE = 4
+
+_COMPLEMENT = bytes.maketrans(
+    b'ACGTUMRWSYKVHDBNacgtumrwsykvhdbn',
+    b'TGCAAKYWSRMBDHVNtgcaakywsrmbdhvn')
+
+_BASE_CODES = np.full(256, _INVALID_BASE, dtype=np.uint8)
+for _i, _base in enumerate(_KMER_ALPHABET):
+    _BASE_CODES[ord(_base)] = _BASE_CODES[ord(_base.lower())] = _i
+_BASE_CODES[ord('U')] = _BASE_CODES[ord('u')] = 3
+
+# Characters counted as G or C, and as any unambiguous or strong/weak base,
+# when computing the GC content
+_GC_MASK = np.zeros(256, dtype=bool)
+_GC_MASK[np.frombuffer(b'GCSgcs', dtype=np.uint8)] = True
+_ACGT_MASK = np.zeros(256, dtype=bool)
+_ACGT_MASK[np.frombuffer(b'ACGTUSWacgtusw', dtype=np.uint8)] = True
+
+
+def _as_codes(sequence):
+    """Returns a sequence string or Sequence object as an array of
+    uint8 character codes.
+    """
+    if isinstance(sequence, np.ndarray):
+        return _as_byte_matrix(sequence)
+    if isinstance(sequence, str):
+        return np.frombuffer(sequence.encode(), dtype=np.uint8)
+    return sequence._codes()  # pylint: disable=protected-access
+
+
+def _iter_records_codes(records):
+    """Yields the character codes of each sequence of an Alignment,
+    a SequenceCollection, or an iterable of Sequence objects.
+    """
+    if hasattr(records, '_aln_matrix'):
+        yield from _as_byte_matrix(records._aln_matrix)  # pylint: disable=protected-access
+    elif hasattr(records, 'codes'):
+        for i in range(len(records)):
+            yield records.codes(i)
+    else:
+        for seq_obj in records:
+            yield _as_codes(seq_obj)
+
+
+def reverse_complement(sequence):
+    """Returns the reverse complement of a nucleotide sequence.
+
+    IUPAC ambiguity codes are complemented (for example, R becomes Y),
+    case is preserved, and U is complemented to A. Other characters such
+    as gaps are kept as they are.
+
+    Parameters
+    ----------
+    sequence : str
+        Nucleotide sequence.
+
+    Returns
+    -------
+    str
+
+    """
+    return sequence.encode().translate(_COMPLEMENT)[::-1].decode()
+
+
+def batch_reverse_complement(records):
+    """Returns the reverse complement of each sequence.
+
+    Parameters
+    ----------
+    records : Alignment, SequenceCollection, or iterable of Sequence
+        Nucleotide sequences.
+
+    Returns
+    -------
+    list of str
+
+    """
+    return [codes.tobytes().translate(_COMPLEMENT)[::-1].decode()
+            for codes in _iter_records_codes(records)]
+
+
+def gc_content(sequence):
+    """Returns the fraction of G and C bases in a nucleotide sequence.
+
+    S (G or C) is counted as a G or C base, and W (A or T) as an A or T
+    base. Gaps and other ambiguity codes are ignored.
+
+    Parameters
+    ----------
+    sequence : str or Sequence
+        Nucleotide sequence.
+
+    Returns
+    -------
+    float
+        GC content, or nan if the sequence has no countable base.
+
+    """
+    codes = _as_codes(sequence)
+    n_bases = np.count_nonzero(_ACGT_MASK[codes])
+    if not n_bases:
+        return float('nan')
+    return np.count_nonzero(_GC_MASK[codes]) / n_bases
+
+
+def batch_gc_content(records):
+    """Returns the GC content of each sequence.
+
+    The rows of an alignment are processed all at once.
+
+    Parameters
+    ----------
+    records : Alignment, SequenceCollection, or iterable of Sequence
+        Nucleotide sequences.
+
+    Returns
+    -------
+    numpy.ndarray
+        float array with the GC content of each sequence, or nan for
+        sequences without countable bases.
+
+    See also
+    --------
+    gc_content
+
+    """
+    if hasattr(records, '_aln_matrix'):
+        matrix = _as_byte_matrix(records._aln_matrix)  # pylint: disable=protected-access
+        if matrix.ndim != 2:
+            return np.empty(0)
+        n_bases = _ACGT_MASK[matrix].sum(axis=1)
+        n_gc = _GC_MASK[matrix].sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(n_bases > 0, n_gc / n_bases, np.nan)
+    return np.array([gc_content(codes)
+                     for codes in _iter_records_codes(records)], dtype=float)
+
+
+def kmer_codes(sequence, k, canonical=False):
+    """Returns the integer code of each k-mer of a nucleotide sequence.
+
+    K-mers are encoded with 2 bits per base in ACGT order, the first base
+    in the most significant bits. K-mers containing characters other
+    than A, C, G, T and U are skipped.
+
+    Parameters
+    ----------
+    sequence : str or Sequence
+        Nucleotide sequence.
+    k : int
+        Length of k-mers, from 1 to 32.
+    canonical : bool, optional
+        If True, the smaller code of each k-mer and of its reverse
+        complement is returned.
+
+    Returns
+    -------
+    numpy.ndarray
+        uint64 array of k-mer codes, in sequence order.
+
+    """
+    return _kmer_windows(_as_codes(sequence), k, canonical=canonical)[1]
+
+
+def _kmer_windows(codes, k, canonical=False):
+    """Returns the start positions and codes of the k-mers of an array of
+    character codes, skipping k-mers that contain other characters than
+    A, C, G, T and U.
+    """
+    if not 1 <= k <= KMER_MAX:
+        raise ValueError('k must be between 1 and {}.'.format(KMER_MAX))
+    bases = _BASE_CODES[codes]
+    n_kmers = len(bases) - k + 1
+    if n_kmers <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint64)
+    # A window is valid if it contains no invalid base
+    invalid = np.concatenate(([0], np.cumsum(bases == _INVALID_BASE)))
+    valid = invalid[k:] == invalid[:n_kmers]
+    values = bases.astype(np.uint64)
+    kmers = np.zeros(n_kmers, dtype=np.uint64)
+    for j in range(k):
+        kmers = (kmers << np.uint64(2)) | values[j:j+n_kmers]
+    kmers = kmers[valid]
+    if canonical:
+        complement = np.uint64(3) - values
+        rc_kmers = np.zeros(n_kmers, dtype=np.uint64)
+        for j in range(k):
+            rc_kmers |= complement[j:j+n_kmers] << np.uint64(2 * j)
+        kmers = np.minimum(kmers, rc_kmers[valid])
+    return np.flatnonzero(valid), kmers
+
+
+def decode_kmer(code, k):
+    """Returns the k-mer string of a k-mer code.
+
+    Parameters
+    ----------
+    code : int
+        K-mer code.
+    k : int
+        Length of the k-mer.
+
+    Returns
+    -------
+    str
+
+    """
+    code = int(code)
+    return ''.join(_KMER_ALPHABET[(code >> (2 * (k - 1 - j))) & 3]
+                   for j in range(k))
+
+
+def count_kmers(sequence, k, canonical=False):
+    """Counts the k-mers of a nucleotide sequence.
+
+    Parameters
+    ----------
+    sequence : str or Sequence
+        Nucleotide sequence.
+    k : int
+        Length of k-mers, from 1 to 32.
+    canonical : bool, optional
+        If True, each k-mer is counted together with its reverse
+        complement, under the smaller of the two codes.
+
+    Returns
+    -------
+    numpy.ndarray or Counter
+        If `k` is at most `DENSE_KMER_MAX`, an int64 array of 4**k counts
+        indexed by k-mer code. Otherwise, a Counter with the k-mer strings
+        present in the sequence as keys.
+
+    See also
+    --------
+    kmer_codes
+    decode_kmer
+
+    """
+    codes = kmer_codes(sequence, k, canonical=canonical)
+    if k <= DENSE_KMER_MAX:
+        return np.bincount(codes.astype(np.int64), minlength=4**k)
+    unique_codes, counts = np.unique(codes, return_counts=True)
+    return Counter({decode_kmer(code, k): int(n)
+                    for code, n in zip(unique_codes.tolist(),
+                                       counts.tolist())})
+
+
+def batch_count_kmers(records, k, canonical=False):
+    """Counts the k-mers of each sequence.
+
+    Parameters
+    ----------
+    records : Alignment, SequenceCollection, or iterable of Sequence
+        Nucleotide sequences.
+    k : int
+        Length of k-mers, from 1 to 32.
+    canonical : bool, optional
+        See `count_kmers`.
+
+    Returns
+    -------
+    numpy.ndarray or list of Counter
+        If `k` is at most `DENSE_KMER_MAX`, an int64 array with one row of
+        4**k counts per sequence. Otherwise, a list of Counter objects.
+
+    See also
+    --------
+    count_kmers
+
+    """
+    counts = [count_kmers(codes, k, canonical=canonical)
+              for codes in _iter_records_codes(records)]
+    if k <= DENSE_KMER_MAX:
+        if not counts:
+            return np.zeros((0, 4**k), dtype=np.int64)
+        return np.vstack(counts)
+    return counts
@@ -1,96 +1,968 @@
 # -*- coding: utf-8 -*-
 """Helper functions for reading files.
 """
-from bseq.sequence import NuclSequence, ProtSequence, CodonSequence
-from bseq.alignment import NuclAlignment, ProtAlignment, CodonAlignment
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import mmap
+import os
+import numpy as np
+from bseq.collection import _CollectionBuilder
+from bseq.compression import detect_compression, open_binary
+from bseq.lazy import FastaSource, _LAZY_SEQUENCE_CLASSES
+from bseq.sequence import SEQUENCE_CLASSES
+from bseq.alignment import NuclAlignment, ProtAlignment, CodonAlignment, \
+    SequenceAnnotation
 
 
-def read_fasta_file(path, seq_type='nucleotide'):
+# Size of each read from the underlying file when streaming records.
+# Large reads keep the number of system calls low while memory use stays
+# bounded by the chunk size plus the record currently being parsed.
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+_ALIGNMENT_CLASSES = {
+    'nucleotide': NuclAlignment,
+    'protein': ProtAlignment,
+    'codon': CodonAlignment,
+}
+
+
+def _sequence_class(seq_type):
+    """Returns the Sequence subclass associated with the sequence type.
+    """
+    if seq_type not in SEQUENCE_CLASSES:
+        raise ValueError('seq_type must be "nucleotide", "protein", '
+                         'or "codon".')
+    return SEQUENCE_CLASSES[seq_type]
+
+
+def _alignment_class(seq_type):
+    """Returns the Alignment subclass associated with the sequence type.
+    """
+    if seq_type not in _ALIGNMENT_CLASSES:
+        raise ValueError('seq_type must be "nucleotide", "protein", '
+                         'or "codon".')
+    return _ALIGNMENT_CLASSES[seq_type]
+
+
+def _parse_header(header):
+    """Splits a FASTA identifier line, without the leading ">",
+    into its name and description.
+
+    Parameters
+    ----------
+    header : bytes
+        Identifier line without the leading ">" character.
+
+    Returns
+    -------
+    tuple of (str, str or None)
+        Name and description. The description is None if the identifier
+        line has no text after the name.
+
+    """
+    parts = header.decode().strip().split(None, 1)
+    if not parts:
+        return '', None
+    if len(parts) == 1:
+        return parts[0], None
+    return parts[0], parts[1]
+
+
+class _FastaChunkParser(object):
+    """Incremental FASTA parser that consumes raw bytes in arbitrary
+    chunks and emits completed records.
+
+    Chunks do not need to be aligned to lines or records. Only the
+    incomplete trailing line and the record currently being assembled
+    are kept between calls to `feed`, so memory use does not depend on
+    the size of the input.
+
+    """
+    def __init__(self):
+        self._header = None
+        self._body = []
+        self._tail = b''
+
+    def feed(self, chunk):
+        """Parses a chunk of bytes.
+
+        Parameters
+        ----------
+        chunk : bytes
+            Next chunk of the FASTA input.
+
+        Returns
+        -------
+        list of tuple
+            Records completed by this chunk as (header, sequence) tuples,
+            where both values are bytes.
+
+        """
+        if self._tail:
+            chunk = self._tail + chunk
+        cut = chunk.rfind(b'\n') + 1
+        if not cut:
+            self._tail = chunk
+            return []
+        self._tail = chunk[cut:]
+        return self._parse_lines(chunk[:cut].split(b'\n'))
+
+    def close(self):
+        """Flushes the parser at the end of the input.
+
+        Returns
+        -------
+        list of tuple
+            Remaining records as (header, sequence) tuples.
+
+        """
+        records = self._parse_lines([self._tail])
+        self._tail = b''
+        if self._header is not None:
+            records.append((self._header, b''.join(self._body)))
+            self._header = None
+            self._body = []
+        return records
+
+    def _parse_lines(self, lines):
+        records = []
+        for line in lines:
+            if line.startswith(b'>'):
+                if self._header is not None:
+                    records.append((self._header, b''.join(self._body)))
+                self._header = line[1:]
+                self._body = []
+                continue
+            line = line.strip()
+            if not line:
+                continue
+            if self._header is None:
+                raise ValueError('sequence found before the first '
+                                 'FASTA identifier line.')
+            self._body.append(line)
+        return records
+
+
+def _iter_chunks(f, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields successive chunks of bytes read from a binary file object.
+    """
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _iter_raw_records(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields FASTA records as (header, sequence) tuples of bytes.
+    """
+    parser = _FastaChunkParser()
+    with open_binary(path) as f:
+        for chunk in _iter_chunks(f, chunk_size=chunk_size):
+            yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def _find_first_record(data):
+    """Returns the offset of the first identifier line in the FASTA data,
+    or -1 if there is none.
+
+    Raises
+    ------
+    ValueError
+        If anything other than whitespace comes before the first
+        identifier line, as in `_FastaChunkParser`.
+
+    """
+    if data[:1] == b'>':
+        return 0
+    start = data.find(b'\n>')
+    if data[:len(data) if start == -1 else start].strip():
+        raise ValueError('sequence found before the first '
+                         'FASTA identifier line.')
+    return start if start == -1 else start + 1
+
+
+def _iter_record_spans(data):
+    """Yields the location of each record in the FASTA data.
+
+    Parameters
+    ----------
+    data : bytes-like
+        Contents of the FASTA file. Can be a memory-mapped file.
+
+    Yields
+    ------
+    tuple of (bytes, int, int)
+        Identifier line without the leading ">", and the byte offsets where
+        the record's sequence lines start (inclusive) and end (exclusive).
+
+    """
+    size = len(data)
+    start = _find_first_record(data)
+    while start != -1:
+        eol = data.find(b'\n', start)
+        if eol == -1:
+            eol = size
+        next_start = data.find(b'\n>', eol)
+        body_end = size if next_start == -1 else next_start + 1
+        yield data[start+1:eol], min(eol + 1, size), body_end
+        start = -1 if next_start == -1 else next_start + 1
+
+
+def _map_file(path):
+    """Memory-maps the file as read-only. Empty files map to empty bytes.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _load_alignment_matrix(data):
+    """Parses FASTA alignment data into its identifier lines and a
+    preallocated matrix of bytes.
+
+    Record boundaries are located first, then the matrix is allocated
+    with one row per record and each sequence is written directly into
+    its row.
+
+    Parameters
+    ----------
+    data : bytes-like
+        Contents of the FASTA file. Can be a memory-mapped file.
+
+    Returns
+    -------
+    tuple of (list of bytes, numpy.ndarray)
+        Identifier lines without the leading ">", and a uint8 matrix with
+        one row per record.
+
+    """
+    spans = list(_iter_record_spans(data))
+    headers = [header for header, _, _ in spans]
+    if not spans:
+        return headers, np.empty((0, 0), dtype=np.uint8)
+    matrix = None
+    for i, (header, body_start, body_end) in enumerate(spans):
+        row = np.frombuffer(
+            data[body_start:body_end].translate(None, b'\r\n\t '),
+            dtype=np.uint8)
+        if matrix is None:
+            matrix = np.empty((len(spans), len(row)), dtype=np.uint8)
+        elif len(row) != matrix.shape[1]:
+            name, _ = _parse_header(header)
+            raise ValueError(
+                'sequence {} has length {}, expected {}.'.format(
+                    name, len(row), matrix.shape[1]))
+        matrix[i] = row
+    return headers, matrix
+
+
+def _load_alignment_matrix_parallel(path, workers):
+    """Parses byte ranges of the FASTA alignment on a process pool and
+    gathers the blocks of rows into a single matrix.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_load_range_matrix, path, start, end)
+                   for start, end in _parallel_ranges(path, workers)]
+        blocks = [future.result() for future in futures]
+    blocks = [(headers, block) for headers, block in blocks if headers]
+    if not blocks:
+        return [], np.empty((0, 0), dtype=np.uint8)
+    width = blocks[0][1].shape[1]
+    for headers, block in blocks:
+        if block.shape[1] != width:
+            name, _ = _parse_header(headers[0])
+            raise ValueError(
+                'sequence {} has length {}, expected {}.'.format(
+                    name, block.shape[1], width))
+    return [header for headers, _ in blocks for header in headers], \
+        np.concatenate([block for _, block in blocks])
+
+
+def _build_alignment(seq_type, name, description, labels, matrix):
+    """Creates an Alignment of the given type directly from sequence labels
+    and a uint8 matrix of aligned sequences.
+
+    Parameters
+    ----------
+    seq_type : str
+        Type of the aligned sequences.
+    name : str
+        Name of the alignment.
+    description : str
+        Description of the alignment.
+    labels : list of tuple of (str, str or None)
+        Name and description of each sequence, in matrix row order.
+    matrix : numpy.ndarray
+        uint8 matrix with one row per sequence.
+
+    Returns
+    -------
+    Alignment
+
+    """
+    alignment = _alignment_class(seq_type)(name, description)
+    if not labels:
+        return alignment
+    records = []
+    lookup = dict()
+    for seq_name, seq_description in labels:
+        if seq_name in lookup:
+            raise ValueError('duplicate sequence name {}.'.format(seq_name))
+        lookup[seq_name] = len(records)
+        records.append(SequenceAnnotation(seq_name, seq_description, seq_type))
+    alignment._records = records  # pylint: disable=protected-access
+    alignment._records_lookup_d = lookup  # pylint: disable=protected-access
+    alignment._aln_matrix = matrix  # pylint: disable=protected-access
+    return alignment
+
+
+def _split_ranges(data, n_ranges):
+    """Splits the FASTA data into byte ranges that each start at
+    a record boundary.
+
+    Parameters
+    ----------
+    data : bytes-like
+        Contents of the FASTA file. Can be a memory-mapped file.
+    n_ranges : int
+        Target number of ranges. Fewer ranges are returned if the data
+        does not contain enough records.
+
+    Returns
+    -------
+    list of tuple of (int, int)
+        Start (inclusive) and end (exclusive) byte offsets of each range.
+
+    """
+    size = len(data)
+    first = _find_first_record(data)
+    if first == -1:
+        return []
+    bounds = [first]
+    for k in range(1, n_ranges):
+        pos = data.find(b'\n>', max(bounds[-1], k * size // n_ranges))
+        if pos == -1:
+            break
+        if pos + 1 > bounds[-1]:
+            bounds.append(pos + 1)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _read_range(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return f.read(end - start)
+
+
+def _parse_range(path, start, end, seq_type):
+    """Parses the records in a byte range of the FASTA file.
+    Runs in a worker process.
+    """
+    parser = _FastaChunkParser()
+    raw_records = parser.feed(_read_range(path, start, end)) + parser.close()
+    seq_class = _sequence_class(seq_type)
+    return [_make_sequence(seq_class, header, seq)
+            for header, seq in raw_records]
+
+
+def _load_range_matrix(path, start, end):
+    """Parses the aligned records in a byte range of the FASTA file
+    into a matrix. Runs in a worker process.
+    """
+    return _load_alignment_matrix(_read_range(path, start, end))
+
+
+def _parallel_ranges(path, workers):
+    """Splits an uncompressed FASTA file into byte ranges for `workers`
+    worker processes. Several ranges are created per worker to balance
+    the load between them.
+    """
+    data = _map_file(path)
+    try:
+        return _split_ranges(data, workers * 4)
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+
+def _iter_fasta_parallel(path, seq_type, workers, ordered):
+    """Parses the FASTA file in byte ranges on a process pool, yielding
+    Sequence objects in file order or as soon as each range is parsed.
+    """
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(_parse_range, path, start, end, seq_type)
+                   for start, end in _parallel_ranges(path, workers)]
+        for future in (futures if ordered else as_completed(futures)):
+            yield from future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _use_workers(path, workers):
+    """Returns whether the file should be parsed on a process pool.
+    Compressed files are always parsed serially because they cannot be
+    split into independent byte ranges.
+    """
+    return workers is not None and workers > 1 and \
+        not detect_compression(path)
+
+
+def _make_sequence(seq_class, header, seq):
+    name, description = _parse_header(header)
+    return seq_class(name, seq.decode(), description)
+
+
+class _MatrixFiller(object):
+    """Writes blocks of residues into the rows of a preallocated uint8
+    matrix, as found in interleaved alignment formats.
+
+    If the final alignment length is not known in advance, the matrix is
+    allocated with an estimated number of columns and the number of
+    columns is doubled whenever a row would overflow it.
+
+    """
+    def __init__(self, n_rows, n_cols, fixed=False):
+        self.matrix = np.empty((n_rows, n_cols), dtype=np.uint8)
+        self.lengths = [0] * n_rows
+        self.fixed = fixed
+
+    def append(self, row, residues):
+        """Appends residues to the end of the given row.
+
+        Parameters
+        ----------
+        row : int
+            Row position in the matrix.
+        residues : bytes
+            Residue characters without whitespace.
+
+        """
+        start = self.lengths[row]
+        end = start + len(residues)
+        if end > self.matrix.shape[1]:
+            if self.fixed:
+                raise ValueError(
+                    'sequence in row {} is longer than the expected '
+                    'alignment length {}.'.format(row, self.matrix.shape[1]))
+            grown = np.empty((self.matrix.shape[0],
+                              max(end, 2 * self.matrix.shape[1])),
+                             dtype=np.uint8)
+            grown[:, :self.matrix.shape[1]] = self.matrix
+            self.matrix = grown
+        self.matrix[row, start:end] = np.frombuffer(residues, dtype=np.uint8)
+        self.lengths[row] = end
+
+    def finish(self, names):
+        """Checks that all rows have the same length and returns the
+        filled matrix.
+        """
+        length = self.lengths[0] if self.lengths else 0
+        for seq_name, row_length in zip(names, self.lengths):
+            if row_length != length:
+                raise ValueError(
+                    'sequence {} has length {}, expected {}.'.format(
+                        seq_name, row_length, length))
+        if self.fixed and length != self.matrix.shape[1]:
+            raise ValueError('sequences have length {}, expected {}.'.format(
+                length, self.matrix.shape[1]))
+        if length == self.matrix.shape[1]:
+            return self.matrix
+        return np.ascontiguousarray(self.matrix[:, :length])
+
+
+_WHITESPACE = b' \t\r\n'
+_WHITESPACE_MASK = np.zeros(256, dtype=bool)
+_WHITESPACE_MASK[np.frombuffer(_WHITESPACE, dtype=np.uint8)] = True
+
+# Number of bytes of a record checked for whitespace at a time
+_COUNT_BLOCK = 1 << 20
+
+
+def _estimate_columns(path, n_rows):
+    """Estimates the alignment length from the file size. Every row holds
+    one residue per column, so the alignment cannot be longer than the file
+    size divided by the number of rows, unless the file is compressed.
+    """
+    size = os.path.getsize(path)
+    if detect_compression(path):
+        size *= 4
+    return max(1, size // max(1, n_rows))
+
+
+def _read_named_blocks(path, skip_line, end_line=None):
+    """Reads an alignment made of blocks of "name residues" lines separated
+    by blank lines, as used by Clustal and Stockholm files.
+
+    Parameters
+    ----------
+    path : str
+        Path to the alignment file.
+    skip_line : callable
+        Returns True for lines that are not sequence lines, such as
+        headers, annotations or conservation lines.
+    end_line : bytes, optional
+        Line that marks the end of the alignment.
+
+    Returns
+    -------
+    tuple of (list of str, numpy.ndarray)
+        Sequence names in row order, and a uint8 matrix with one row
+        per sequence.
+
+    """
+    names = []
+    lookup = dict()
+    first_block = []
+    filler = None
+    with open_binary(path) as f:
+        for line in f:
+            stripped = line.strip()
+            if end_line is not None and stripped == end_line:
+                break
+            if not stripped:
+                if first_block and filler is None:
+                    filler = _MatrixFiller(
+                        len(names), _estimate_columns(path, len(names)))
+                    for row, residues in first_block:
+                        filler.append(row, residues)
+                continue
+            if skip_line(line):
+                continue
+            parts = stripped.split()
+            seq_name = parts[0].decode()
+            residues = parts[1] if len(parts) > 1 else b''
+            if seq_name not in lookup:
+                if filler is not None:
+                    raise ValueError('sequence {} is not present in the '
+                                     'first block.'.format(seq_name))
+                lookup[seq_name] = len(names)
+                names.append(seq_name)
+            if filler is None:
+                first_block.append((lookup[seq_name], residues))
+            else:
+                filler.append(lookup[seq_name], residues)
+    if filler is None:
+        filler = _MatrixFiller(len(names), _estimate_columns(path, len(names)))
+        for row, residues in first_block:
+            filler.append(row, residues)
+    return names, filler.finish(names)
+
+
+def iter_fasta(path, seq_type='nucleotide', chunk_size=DEFAULT_CHUNK_SIZE,
+               workers=None, ordered=True):
+    """Reads the FASTA file one record at a time.
+
+    Unlike `read_fasta_file`, records are parsed while the file is being
+    read and are yielded as soon as they are complete. Only one record is
+    held in memory at a time.
+
+    Parameters
+    ----------
+    path : str
+        Path to the FASTA file. The file may be compressed with gzip,
+        BGZF, xz or bzip2.
+    seq_type : str, optional
+        Type of sequence expected. Choices are 'nucleotide',
+        'protein', or 'codon'.
+    chunk_size : int, optional
+        Number of bytes read from the file at a time.
+    workers : int, optional
+        Number of worker processes. If greater than 1, the file is split
+        into byte ranges at record boundaries and the ranges are parsed in
+        parallel. Compressed files are always parsed in a single process.
+    ordered : bool, optional
+        If True (default), records are yielded in file order. If False,
+        records from each byte range are yielded as soon as the range is
+        parsed. Only used when `workers` is greater than 1.
+
+    Yields
+    ------
+    Sequence
+        NuclSequence, ProtSequence or CodonSequence depending on
+        `seq_type`.
+
+    See also
+    --------
+    read_fasta_file
+    iter_fasta_alignment
+
+    """
+    seq_class = _sequence_class(seq_type)
+    if _use_workers(path, workers):
+        yield from _iter_fasta_parallel(path, seq_type, workers, ordered)
+        return
+    for header, seq in _iter_raw_records(path, chunk_size=chunk_size):
+        yield _make_sequence(seq_class, header, seq)
+
+
+def iter_fasta_alignment(path, seq_type='nucleotide',
+                         chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+    """Reads the aligned sequences of a FASTA alignment one record at a time.
+
+    This behaves like `iter_fasta` but also checks that every sequence
+    has the same length as the first one, as expected from an alignment.
+
+    Parameters
+    ----------
+    path : str
+        Path to the FASTA file. The file may be compressed with gzip,
+        BGZF, xz or bzip2.
+    seq_type : str, optional
+        Type of sequence expected. Choices are 'nucleotide',
+        'protein', or 'codon'.
+    chunk_size : int, optional
+        Number of bytes read from the file at a time.
+    workers : int, optional
+        Number of worker processes used to parse the file.
+        See `iter_fasta`.
+
+    Yields
+    ------
+    Sequence
+        NuclSequence, ProtSequence or CodonSequence depending on
+        `seq_type`.
+
+    Raises
+    ------
+    ValueError
+        If an aligned sequence differs in length from the first sequence.
+
+    See also
+    --------
+    iter_fasta
+    read_fasta_alignment
+
+    """
+    length = None
+    for seq_obj in iter_fasta(path, seq_type=seq_type, chunk_size=chunk_size,
+                              workers=workers):
+        if length is None:
+            length = len(seq_obj.sequence)
+        elif len(seq_obj.sequence) != length:
+            raise ValueError(
+                'sequence {} has length {}, expected {}.'.format(
+                    seq_obj.name, len(seq_obj.sequence), length))
+        yield seq_obj
+
+
+def _read_fasta_lazy(path, seq_type, cache_size):
+    """Scans the FASTA file and returns lazy records that load their
+    sequence on first access.
+    """
+    _sequence_class(seq_type)
+    if detect_compression(path):
+        raise ValueError('lazy records require an uncompressed FASTA file.')
+    seq_class = _LAZY_SEQUENCE_CLASSES[seq_type]
+    source = FastaSource(path, cache_size=cache_size)
+    records = []
+    data = _map_file(path)
+    # Whitespace is counted in the mapped file, a block at a time, without
+    # copying the sequences
+    codes = np.frombuffer(data, dtype=np.uint8)
+    try:
+        for header, body_start, body_end in _iter_record_spans(data):
+            seq_name, seq_description = _parse_header(header)
+            n_whitespace = sum(
+                np.count_nonzero(_WHITESPACE_MASK[
+                    codes[start:min(start + _COUNT_BLOCK, body_end)]])
+                for start in range(body_start, body_end, _COUNT_BLOCK))
+            records.append(seq_class(seq_name, source, body_start, body_end,
+                                     body_end - body_start - n_whitespace,
+                                     description=seq_description))
+    finally:
+        # The array must be released before the map can be closed
+        del codes
+        if isinstance(data, mmap.mmap):
+            data.close()
+    return records
+
+
+def read_fasta_file(path, seq_type='nucleotide', workers=None,
+                    lazy=False, cache_size=None):
     """Reads the FASTA file and stores the contents
     as a list of Sequence objects.
 
     Parameters
     ----------
     path : str
-        Path to the FASTA file.
+        Path to the FASTA file. The file may be compressed with gzip,
+        BGZF, xz or bzip2.
     seq_type : str, optional
         Type of sequence expected. Choices are 'nucleotide',
         'protein', or 'codon'.
+    workers : int, optional
+        Number of worker processes used to parse the file.
+        See `iter_fasta`.
+    lazy : bool, optional
+        If True, only the name, description, byte offset and length of
+        each sequence are read. Each record loads its sequence from the
+        file when it is first accessed. The file must be uncompressed.
+        The records share a FastaSource, available as their `source`,
+        which keeps the file mapped until it is closed.
+    cache_size : int, optional
+        Only used when `lazy` is True. If None (default), each record keeps
+        its sequence once loaded. Otherwise, at most `cache_size` loaded
+        sequences are kept in a cache shared by all records, and the least
+        recently used sequences are read again from the file when needed.
 
     Returns
     -------
     list of Sequence objects
 
+    See also
+    --------
+    iter_fasta
+
     """
-    name = ''
-    description = ''
-    seq = []
-    sequence_list = []
-    with open(path, 'r') as f:
-        for line in f.readlines():
-            if line.startswith('>'):
-                if seq:
-                    seq_string = ''.join(seq)
-                    seq_obj = None
-                    if seq_type == 'nucleotide':
-                        seq_obj = NuclSequence(name, seq_string, description)
-                    elif seq_type == 'protein':
-                        seq_obj = ProtSequence(name, seq_string, description)
-                    elif seq_type == 'codon':
-                        seq_obj = CodonSequence(name, seq_string, description)
-                    else:
-                        raise ValueError('seq_type must be \
-                                          "nucleotide", "protein", \
-                                          or "codon".')
-                    sequence_list.append(seq_obj)
-                    seq = []
-                name, description = line[1:].rstrip().split(' ', 1)
-            else:
-                seq += [line.rstrip()]
-
-        if seq:
-            seq_string = ''.join(seq)
-            seq_obj = None
-            if seq_type == 'nucleotide':
-                seq_obj = NuclSequence(name, seq_string, description)
-            elif seq_type == 'protein':
-                seq_obj = ProtSequence(name, seq_string, description)
-            elif seq_type == 'codon':
-                seq_obj = CodonSequence(name, seq_string, description)
-            else:
-                raise ValueError('seq_type must be \
-                                    "nucleotide", "protein", \
-                                    or "codon".')
-            sequence_list.append(seq_obj)
-    return sequence_list
+    if lazy:
+        return _read_fasta_lazy(path, seq_type, cache_size)
+    return list(iter_fasta(path, seq_type=seq_type, workers=workers))
+
+
+def read_fasta_collection(path, seq_type='nucleotide',
+                          chunk_size=DEFAULT_CHUNK_SIZE):
+    """Reads the FASTA file into a compact SequenceCollection.
+
+    Residues, names and descriptions are appended to contiguous buffers
+    as the file is parsed, so no Sequence object is kept per record.
+
+    Parameters
+    ----------
+    path : str
+        Path to the FASTA file. The file may be compressed with gzip,
+        BGZF, xz or bzip2.
+    seq_type : str, optional
+        Type of sequence expected. Choices are 'nucleotide',
+        'protein', or 'codon'.
+    chunk_size : int, optional
+        Number of bytes read from the file at a time.
+
+    Returns
+    -------
+    SequenceCollection
+
+    See also
+    --------
+    read_fasta_file
+
+    """
+    _sequence_class(seq_type)
+    builder = _CollectionBuilder()
+    for header, seq in _iter_raw_records(path, chunk_size=chunk_size):
+        name, desc = _parse_header(header)
+        builder.append(name, seq, desc)
+    return builder.build(seq_type)
 
 def read_fasta_alignment(path, seq_type='nucleotide',
-                         name=None, description=None):
+                         name=None, description=None, workers=None):
     """Reads the FASTA alignment and stores the contents
     as an Alignment object.
 
     Parameters
     ----------
     path : str
-        Path to the FASTA file.
+        Path to the FASTA file. The file may be compressed with gzip,
+        BGZF, xz or bzip2.
     seq_type : str, optional
         Type of sequence expected. Choices are 'nucleotide',
         'protein', or 'codon'.
+    workers : int, optional
+        Number of worker processes. If greater than 1, byte ranges of the
+        file are parsed in parallel and the resulting blocks of rows are
+        copied into the alignment matrix in file order. Compressed files
+        are always parsed in a single process.
 
     Returns
     -------
     Alignment
 
+    Notes
+    -----
+    The file is scanned once and each sequence is written directly into
+    a preallocated alignment matrix, so loading time grows linearly with
+    the number of sequences.
+
+    See also
+    --------
+    iter_fasta_alignment
+
     """
-    alignment = None
-    if seq_type == 'nucleotide':
-        alignment = NuclAlignment(name, description)
-    elif seq_type == 'protein':
-        alignment = ProtAlignment(name, description)
-    elif seq_type == 'codon':
-        alignment = CodonAlignment(name, description)
+    _alignment_class(seq_type)
+    if _use_workers(path, workers):
+        headers, matrix = _load_alignment_matrix_parallel(path, workers)
+    elif detect_compression(path):
+        with open_binary(path) as f:
+            headers, matrix = _load_alignment_matrix(f.read())
+    else:
+        data = _map_file(path)
+        try:
+            headers, matrix = _load_alignment_matrix(data)
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+    return _build_alignment(seq_type, name, description,
+                            [_parse_header(h) for h in headers], matrix)
 
-    for seq_obj in read_fasta_file(path, seq_type=seq_type):
-        alignment.add_sequence_obj(seq_obj)
 
-    return alignment
+def read_phylip_alignment(path, seq_type='nucleotide', name=None,
+                          description=None, interleaved=True, strict=False):
+    """Reads the PHYLIP alignment and stores the contents
+    as an Alignment object.
+
+    The number of sequences and the alignment length are read from the
+    header line, the alignment matrix is allocated once, and each block of
+    residues is written into the matrix as it is read.
+
+    Parameters
+    ----------
+    path : str
+        Path to the PHYLIP file. The file may be compressed with gzip,
+        BGZF, xz or bzip2.
+    seq_type : str, optional
+        Type of sequence expected. Choices are 'nucleotide',
+        'protein', or 'codon'.
+    name : str, optional
+        Name of the alignment.
+    description : str, optional
+        Description of the alignment.
+    interleaved : bool, optional
+        If True (default), the file is in the interleaved format, where
+        the alignment is divided into blocks containing one line per
+        sequence. If False, the file is in the sequential format, where
+        each sequence is written in full before the next one.
+    strict : bool, optional
+        If True, sequence names are the first 10 characters of the line,
+        as in the original PHYLIP format. If False (default), sequence names
+        are separated from the residues by whitespace.
+
+    Returns
+    -------
+    Alignment
+
+    """
+    _alignment_class(seq_type)
+    names = []
+    filler = None
+    with open_binary(path) as f:
+        lines = (line for line in f if line.strip())
+        header = next(lines, b'').split()
+        if len(header) < 2:
+            raise ValueError('PHYLIP header must contain the number of '
+                             'sequences and the alignment length.')
+        n_rows, n_cols = int(header[0]), int(header[1])
+        filler = _MatrixFiller(n_rows, n_cols, fixed=True)
+        row = 0
+        for line in lines:
+            # In the sequential format, a row's residues may span several
+            # lines, starting with or after the line holding its name.
+            # The next name comes only once n_cols residues are read.
+            if len(names) < n_rows and (interleaved or len(names) == row):
+                if strict:
+                    seq_name, rest = line[:10].strip(), line[10:]
+                else:
+                    parts = line.strip().split(None, 1)
+                    seq_name = parts[0]
+                    rest = parts[1] if len(parts) > 1 else b''
+                names.append(seq_name.decode())
+            else:
+                rest = line
+            filler.append(row, rest.translate(None, _WHITESPACE))
+            if interleaved:
+                row = (row + 1) % n_rows
+            elif filler.lengths[row] >= n_cols:
+                row += 1
+                if row == n_rows:
+                    break
+    if len(names) != n_rows:
+        raise ValueError('expected {} sequences, found {}.'.format(
+            n_rows, len(names)))
+    matrix = filler.finish(names)
+    return _build_alignment(seq_type, name, description,
+                            [(seq_name, None) for seq_name in names], matrix)
+
+def read_clustal_alignment(path, seq_type='nucleotide', name=None,
+                           description=None):
+    """Reads the Clustal alignment and stores the contents
+    as an Alignment object.
+
+    The sequences found in the first block determine the number of rows of
+    the alignment matrix, and each following block is written directly
+    into the matrix.
+
+    Parameters
+    ----------
+    path : str
+        Path to the Clustal file. The file may be compressed with gzip,
+        BGZF, xz or bzip2.
+    seq_type : str, optional
+        Type of sequence expected. Choices are 'nucleotide',
+        'protein', or 'codon'.
+    name : str, optional
+        Name of the alignment.
+    description : str, optional
+        Description of the alignment.
+
+    Returns
+    -------
+    Alignment
+
+    """
+    _alignment_class(seq_type)
+
+    def skip_line(line):
+        # Conservation lines start with whitespace, and the header line
+        # names the program that produced the alignment.
+        return line[:1].isspace() or \
+            line.startswith((b'CLUSTAL', b'MUSCLE', b'PROBCONS'))
+
+    names, matrix = _read_named_blocks(path, skip_line)
+    return _build_alignment(seq_type, name, description,
+                            [(seq_name, None) for seq_name in names], matrix)
+
+def read_stockholm_alignment(path, seq_type='nucleotide', name=None,
+                             description=None):
+    """Reads the Stockholm alignment and stores the contents
+    as an Alignment object.
+
+    Sequence descriptions are taken from "#=GS <name> DE" annotation
+    lines. Other annotations are ignored. Gap characters are kept as
+    they appear in the file.
+
+    Parameters
+    ----------
+    path : str
+        Path to the Stockholm file. The file may be compressed with gzip,
+        BGZF, xz or bzip2.
+    seq_type : str, optional
+        Type of sequence expected. Choices are 'nucleotide',
+        'protein', or 'codon'.
+    name : str, optional
+        Name of the alignment.
+    description : str, optional
+        Description of the alignment.
+
+    Returns
+    -------
+    Alignment
+
+    """
+    _alignment_class(seq_type)
+    descriptions = dict()
+
+    def skip_line(line):
+        if not line.startswith(b'#'):
+            return False
+        parts = line.split(None, 3)
+        if len(parts) == 4 and parts[0] == b'#=GS' and parts[2] == b'DE':
+            descriptions[parts[1].decode()] = parts[3].strip().decode()
+        return True
+
+    names, matrix = _read_named_blocks(path, skip_line, end_line=b'//')
+    return _build_alignment(
+        seq_type, name, description,
+        [(seq_name, descriptions.get(seq_name)) for seq_name in names],
+        matrix)
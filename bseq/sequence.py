@@ -18,8 +18,15 @@ and CodonSequence for coding sequences.
 
 """
 from collections import Counter
+import hashlib
 import numpy as np
 from bseq.formatter import fasta_formatted_string
+from bseq.motif import find_motif
+from bseq.nucleotide import reverse_complement, gc_content, count_kmers
+
+
+# Caches of Sequence objects that are not copied or pickled
+_UNPICKLED_SLOTS = ('_views', '_codon_codes')
 
 
 class Sequence(object):
@@ -41,6 +48,9 @@ class Sequence(object):
         nucleotide, protein, or codon
     sequence : str
         Biological sequence
+    i
+    chars
+    content_hash
 
     See also
     --------
@@ -53,7 +63,13 @@ class Sequence(object):
     The Sequence object is indexable using [] and can be
     sliced like a string or a list.
 
+    Sequence and its subclasses use `__slots__` instead of a per-instance
+    `__dict__` to reduce the memory used by each object.
+
     """
+    __slots__ = ('name', 'description', 'seq_type', '_sequence', '_views',
+                 '_content_hash')
+
     def __init__(self, name, sequence, description=None, seq_type=None):
         """Creates a new instance of the Sequence object.
 
@@ -77,13 +93,96 @@ class Sequence(object):
         self.description = description
         self.seq_type = seq_type
         self._sequence = sequence
+        self._content_hash = None
+        self._clear_caches()
 
     @property
     def i(self):
-        """Always returns a read-only array of single characters,
-        even for codon sequences.
+        """Returns a read-only uint8 array of the character codes of the
+        sequence.
+
+        The array is created once, from the encoded sequence, and reused
+        on later accesses.
+        """
+        return self._get_views()[1]
+
+    @property
+    def chars(self):
+        """Returns a read-only array of single characters of the sequence.
+
+        This is a view of `i` with the 'S1' dtype and shares its memory.
+        """
+        return self._get_views()[2]
+
+    @property
+    def content_hash(self):
+        """Returns a hash of the characters of the sequence.
+
+        The hash is the hexadecimal BLAKE2b digest (128 bits) of the
+        encoded sequence. It does not depend on the name, description or
+        type of the sequence, and is the same across runs and machines.
+        It is computed once and reused.
+        """
+        if self._content_hash is None:
+            self._content_hash = hashlib.blake2b(
+                self._codes(), digest_size=16).hexdigest()
+        return self._content_hash
+
+    def _make_views(self):
+        """Creates the flat array of character codes, and the `i` and
+        `chars` views of it.
+        """
+        codes = self._base_codes()
+        return codes, codes, codes.view('S1')
+
+    def _base_codes(self):
+        """Returns the character codes of the sequence as a flat uint8
+        array.
+        """
+        return np.frombuffer(self._sequence.encode(), dtype=np.uint8)
+
+    def _get_views(self):
+        if self._views is None:
+            self._views = self._make_views()
+        return self._views
+
+    def _clear_caches(self):
+        """Drops the arrays computed from the sequence, which are created
+        again when needed.
         """
-        return np.array(self._sequence)
+        self._views = None
+
+    def _codes(self, start=0, stop=None):
+        """Returns the ASCII codes of the characters from `start`
+        to `stop` as a read-only uint8 array.
+        """
+        return self._get_views()[0][start:stop]
+
+    def view(self, start=None, stop=None, name=None):
+        """Returns a view of part of the sequence that shares its memory.
+
+        Unlike slicing, which returns a new string, the view keeps a
+        reference to this sequence and only reads its characters when
+        needed.
+
+        Parameters
+        ----------
+        start : int, optional
+            Start position of the view, counted like slice indexes.
+        stop : int, optional
+            End position of the view (exclusive).
+        name : str, optional
+            Name of the view. Defaults to the name of this sequence.
+
+        Returns
+        -------
+        SequenceView
+            View of the same sequence type as this sequence.
+
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        return _VIEW_CLASSES.get(self.seq_type, SequenceView)(
+            self, start, max(start, stop), name=name)
 
     @property
     def sequence(self):
@@ -150,6 +249,24 @@ class Sequence(object):
     def __contains__(self, x):
         return x in self._sequence
 
+    def __getstate__(self):
+        # Slots replaced by a property in a subclass, like the `_sequence`
+        # of views, packed and lazy sequences, hold no value. Cached
+        # arrays are rebuilt when needed.
+        state = dict()
+        for cls in type(self).__mro__:
+            for slot in cls.__dict__.get('__slots__', ()):
+                if isinstance(getattr(type(self), slot), property) or \
+                        slot in _UNPICKLED_SLOTS:
+                    continue
+                state[slot] = getattr(self, slot)
+        return state
+
+    def __setstate__(self, state):
+        self._clear_caches()
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
     def __str__(self):
         return self._sequence
 
@@ -182,10 +299,340 @@ class NuclSequence(Sequence):
     sliced like a string or a list.
 
     """
+    __slots__ = ()
+
     def __init__(self, name, sequence, description=None):
         super().__init__(name, sequence, description=description,
                          seq_type='nucleotide')
 
+    def pack(self):
+        """Returns a bit-packed copy of the nucleotide sequence.
+
+        Returns
+        -------
+        PackedNuclSequence
+
+        See also
+        --------
+        PackedNuclSequence
+
+        """
+        return PackedNuclSequence(self.name, self.sequence,
+                                  description=self.description)
+
+    def reverse_complement(self):
+        """Returns the reverse complement of the sequence.
+
+        Returns
+        -------
+        NuclSequence
+            New sequence with the same name and description.
+
+        See also
+        --------
+        bseq.nucleotide.reverse_complement
+
+        """
+        return NuclSequence(self.name, reverse_complement(self.sequence),
+                            description=self.description)
+
+    def gc_content(self):
+        """Returns the fraction of G and C bases in the sequence.
+
+        See also
+        --------
+        bseq.nucleotide.gc_content
+
+        """
+        return gc_content(self)
+
+    def count_kmers(self, k, canonical=False):
+        """Counts the k-mers of the sequence.
+
+        Parameters
+        ----------
+        k : int
+            Length of k-mers, from 1 to 32.
+        canonical : bool, optional
+            If True, each k-mer is counted together with its reverse
+            complement.
+
+        Returns
+        -------
+        numpy.ndarray or Counter
+            Dense array of 4**k counts for small `k`, otherwise a Counter
+            of k-mer strings.
+
+        See also
+        --------
+        bseq.nucleotide.count_kmers
+
+        """
+        return count_kmers(self, k, canonical=canonical)
+
+    def find_motif(self, pattern, both_strands=False, match_ambiguous=False):
+        """Finds the start positions of a motif in the sequence.
+
+        Parameters
+        ----------
+        pattern : str or Motif
+            Motif using IUPAC nucleotide codes, such as "GGNCC".
+        both_strands : bool, optional
+            If True, also searches the reverse complement strand.
+        match_ambiguous : bool, optional
+            If True, ambiguous bases in the sequence match if any of the
+            bases they stand for is allowed by the motif.
+
+        Returns
+        -------
+        numpy.ndarray or tuple of numpy.ndarray
+            Start positions of the matches. With `both_strands`, a tuple
+            of positions on the forward and reverse strands.
+
+        See also
+        --------
+        bseq.motif.find_motif
+
+        """
+        return find_motif(self, pattern, both_strands=both_strands,
+                          match_ambiguous=match_ambiguous,
+                          seq_type='nucleotide')
+
+class PackedNuclSequence(NuclSequence):
+    """Represents a nucleotide sequence stored as packed bits.
+
+    Sequences made only of A, C, G and T are stored using 2 bits per base.
+    Sequences containing IUPAC ambiguity codes or gaps ("-") are stored
+    using 4 bits per base, where each code is the bitmask of the bases it
+    represents (A=1, C=2, G=4, T=8, gap=0).
+
+    Lowercase (soft-masked) characters are packed like uppercase ones, and
+    the runs of lowercase characters are kept separately. RNA sequences
+    are packed with U stored as T.
+
+    Attributes
+    ----------
+    name : str
+        Name of the sequence.
+        This corresponds to the ID in the FASTA format.
+    description : str
+        Description and other information about the sequence.
+        This corresponds to the text after the ID, separated by a whitespace, in the FASTA format.
+    seq_type : str
+        nucleotide, protein, or codon
+    sequence : str
+        Biological sequence. Unpacked on each access.
+    bits : int
+        Number of bits used per base, either 2 or 4.
+
+    See also
+    --------
+    NuclSequence
+
+    Notes
+    -----
+    Counting, indexing, slicing and iteration work directly on the packed
+    data, unpacking only the part of the sequence that is needed. A
+    sequence cannot contain both T and U.
+
+    """
+    __slots__ = ('bits', '_length', '_packed', '_lower', '_rna')
+
+    def __init__(self, name, sequence, description=None, bits=None):
+        """Creates a new packed nucleotide sequence.
+
+        Parameters
+        ----------
+        name : str
+            Name of the sequence.
+        sequence : str
+            Nucleotide sequence.
+        description : str, optional
+            Description of the sequence.
+        bits : int, optional
+            Number of bits per base, 2 or 4. By default, 2 bits are used
+            if the sequence only contains A, C, G and T, and 4 bits
+            otherwise.
+
+        Raises
+        ------
+        ValueError
+            If the sequence contains characters that cannot be packed
+            with the given number of bits, or both T and U.
+
+        """
+        # pylint: disable=super-init-not-called
+        self.name = name
+        self.description = description
+        self.seq_type = 'nucleotide'
+        chars = np.frombuffer(sequence.encode(), dtype=np.uint8)
+        codes = _UPPERCASE[chars]
+        lower = codes != chars
+        rna = bool(np.any(codes == ord('U')))
+        if rna:
+            if np.any(codes == ord('T')):
+                raise ValueError('sequences containing both T and U '
+                                 'cannot be packed.')
+            codes[codes == ord('U')] = ord('T')
+        if bits is None:
+            bits = 2 if not np.any(_PACK2_CODES[codes] == _INVALID_CODE) \
+                else 4
+        if bits not in (2, 4):
+            raise ValueError('bits must be 2 or 4.')
+        packed_codes = (_PACK2_CODES if bits == 2 else _PACK4_CODES)[codes]
+        if np.any(packed_codes == _INVALID_CODE):
+            invalid = sorted(set(
+                sequence[i] for i in
+                np.flatnonzero(packed_codes == _INVALID_CODE)[:100]))
+            raise ValueError(
+                'character {} cannot be packed using {} bits.'.format(
+                    ', '.join(invalid), bits))
+        self.bits = bits
+        self._length = len(codes)
+        self._packed = _pack_codes(packed_codes, bits)
+        self._lower = _mask_runs(lower)
+        self._rna = rna
+        self._content_hash = None
+        self._clear_caches()
+
+    @property
+    def _sequence(self):
+        return self._unpack(0, self._length).tobytes().decode()
+
+    @property
+    def nbytes(self):
+        """Returns the number of bytes used to store the packed sequence.
+        """
+        return self._packed.nbytes + self._lower.nbytes
+
+    def count(self, char):
+        """Counts the number of times a given character occurs in the sequence.
+
+        Parameters
+        ----------
+        char : str
+            Character to count in the sequence
+
+        Returns
+        -------
+        int
+            Number of occurrences in the sequence
+
+        """
+        if len(char) != 1:
+            return self._sequence.count(char)
+        if ord(char) > 255:
+            return 0
+        if len(self._lower) or self._rna:
+            return int(sum(np.count_nonzero(block == ord(char))
+                           for block in self._iter_char_blocks()))
+        code = (_PACK2_CODES if self.bits == 2 else _PACK4_CODES)[ord(char)]
+        if code == _INVALID_CODE:
+            return 0
+        return int(sum(np.count_nonzero(block == code)
+                       for block in self._iter_code_blocks()))
+
+    def count_all(self):
+        """Counts the number of times each character occurs in the sequence.
+
+        Returns
+        -------
+        Counter
+            Keys are the characters present in the sequence and
+            values are the corresponding number of occurrences in the sequence
+
+        """
+        if len(self._lower) or self._rna:
+            counts = sum(np.bincount(block, minlength=256)
+                         for block in self._iter_char_blocks())
+            return Counter({chr(code): int(counts[code])
+                            for code in np.flatnonzero(counts)})
+        counts = np.zeros(1 << self.bits, dtype=np.int64)
+        for block in self._iter_code_blocks():
+            counts += np.bincount(block, minlength=1 << self.bits)
+        alphabet = _PACK2_ALPHABET if self.bits == 2 else _PACK4_ALPHABET
+        return Counter({alphabet[code]: int(n)
+                        for code, n in enumerate(counts) if n})
+
+    def _codes(self, start=0, stop=None):
+        """Returns the ASCII codes of the characters from `start`
+        to `stop` as a uint8 array.
+        """
+        return self._unpack(start, self._length if stop is None else stop)
+
+    def _get_views(self):
+        # Views are not cached, which would keep an unpacked copy of the
+        # sequence alive
+        codes = self._codes()
+        codes.flags.writeable = False
+        return codes, codes, codes.view('S1')
+
+    def _unpack(self, start, stop):
+        """Unpacks the characters from position `start` to `stop`
+        into an array of ASCII codes.
+        """
+        if stop <= start:
+            return np.empty(0, dtype=np.uint8)
+        per_byte = 8 // self.bits
+        first = start // per_byte
+        last = (stop + per_byte - 1) // per_byte
+        codes = _unpack_codes(self._packed[first:last], self.bits)
+        offset = first * per_byte
+        decode = _PACK2_DECODE if self.bits == 2 else _PACK4_DECODE
+        chars = decode[codes[start-offset:stop-offset]]
+        if self._rna:
+            chars[chars == ord('T')] = ord('U')
+        # Lowercase runs overlapping the range
+        runs = self._lower[np.searchsorted(self._lower[:, 1], start,
+                                           side='right'):
+                           np.searchsorted(self._lower[:, 0], stop)]
+        if len(runs):
+            # Runs are separated by at least one character, so their
+            # clipped bounds are all distinct
+            bounds = np.zeros(stop - start + 1, dtype=np.int8)
+            bounds[np.maximum(runs[:, 0] - start, 0)] += 1
+            bounds[np.minimum(runs[:, 1], stop) - start] -= 1
+            lower = np.cumsum(bounds[:-1], dtype=np.int8).astype(bool)
+            chars[lower] = _LOWERCASE[chars[lower]]
+        return chars
+
+    def _iter_code_blocks(self, block_size=1 << 20):
+        """Yields the packed codes of the sequence in blocks,
+        without decoding them to characters.
+        """
+        per_byte = 8 // self.bits
+        for first in range(0, len(self._packed), block_size):
+            codes = _unpack_codes(self._packed[first:first+block_size],
+                                  self.bits)
+            end = min(len(codes), self._length - first * per_byte)
+            yield codes[:end]
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(self._length)
+            if step == 1:
+                return self._unpack(start, stop).tobytes().decode()
+            return self._sequence[i]
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError('sequence index out of range')
+        return chr(self._unpack(i, i + 1)[0])
+
+    def _iter_char_blocks(self, block_size=1 << 20):
+        """Yields the characters of the sequence in blocks of ASCII
+        codes.
+        """
+        for first in range(0, self._length, block_size):
+            yield self._unpack(first, min(first + block_size, self._length))
+
+    def __iter__(self):
+        for block in self._iter_char_blocks():
+            yield from block.tobytes().decode()
+
 class ProtSequence(Sequence):
     """Represents a protein or amino acid sequence.
 
@@ -214,10 +661,36 @@ class ProtSequence(Sequence):
     sliced like a string or a list.
 
     """
+    __slots__ = ()
+
     def __init__(self, name, sequence, description=None):
         super().__init__(name, sequence, description=description,
                          seq_type='protein')
 
+    def find_motif(self, pattern, match_ambiguous=False):
+        """Finds the start positions of a motif in the sequence.
+
+        Parameters
+        ----------
+        pattern : str or Motif
+            Motif using IUPAC amino acid codes, such as "NXS".
+        match_ambiguous : bool, optional
+            If True, ambiguous amino acids in the sequence match if any of
+            the amino acids they stand for is allowed by the motif.
+
+        Returns
+        -------
+        numpy.ndarray
+            Start positions of the matches.
+
+        See also
+        --------
+        bseq.motif.find_motif
+
+        """
+        return find_motif(self, pattern, match_ambiguous=match_ambiguous,
+                          seq_type='protein')
+
 class CodonSequence(Sequence):
     """Represents a codon-based coding sequence.
 
@@ -249,10 +722,93 @@ class CodonSequence(Sequence):
     and notby nucleotide position.
 
     """
+    __slots__ = ('_codon_codes',)
+
     def __init__(self, name, sequence, description=None):
         super().__init__(name, sequence, description=description,
                          seq_type='codon')
 
+    def view(self, start=None, stop=None, name=None):
+        """Returns a view of a range of codons that shares the memory of
+        the sequence.
+
+        Parameters
+        ----------
+        start : int, optional
+            Index of the first codon of the view.
+        stop : int, optional
+            Index after the last codon of the view.
+        name : str, optional
+            Name of the view. Defaults to the name of this sequence.
+
+        Returns
+        -------
+        CodonSequenceView
+
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        return CodonSequenceView(self, start * 3, max(start, stop) * 3,
+                                 name=name)
+
+    @property
+    def i(self):
+        """Returns the complete codons of the sequence as a read-only
+        (n_codons, 3) uint8 array of character codes.
+
+        A trailing incomplete codon is not included. The array is created
+        once and reused on later accesses.
+        """
+        return self._get_views()[1]
+
+    @property
+    def chars(self):
+        """Returns the complete codons of the sequence as a read-only
+        (n_codons, 3) array of single characters.
+        """
+        return self._get_views()[2]
+
+    @property
+    def codon_matrix(self):
+        """Returns the complete codons of the sequence as a read-only
+        (n_codons, 3) array of uint8 character codes. Same as `i`.
+        """
+        return self._get_views()[1]
+
+    def _make_views(self):
+        codes = self._base_codes()
+        n_codons = len(codes) // 3
+        codons = codes[:n_codons*3].reshape(n_codons, 3)
+        return codes, codons, codons.view('S1')
+
+    def _clear_caches(self):
+        super()._clear_caches()
+        self._codon_codes = None
+
+    @property
+    def codon_codes(self):
+        """Returns the integer code of each complete codon.
+
+        Codons are numbered 0 to 63 in TCAG order (TTT=0, TTC=1, ...,
+        GGG=63), the order used by the NCBI genetic code tables.
+        Codons containing a gap or an ambiguous base are coded as 64.
+        The array is created once and kept along with `i`.
+
+        Returns
+        -------
+        numpy.ndarray
+            Read-only uint8 array of length `len(self)`.
+
+        """
+        if self._codon_codes is not None:
+            return self._codon_codes
+        codes = _codon_codes(self.codon_matrix)
+        codes.flags.writeable = False
+        # Sequences that do not keep their views, like lazy records with
+        # a shared cache, do not keep the codes either
+        if self._views is not None:
+            self._codon_codes = codes
+        return codes
+
     def count_codon(self, codon):
         """Counts the number of times a given codon occurs in the sequence.
 
@@ -267,39 +823,394 @@ class CodonSequence(Sequence):
             Number of occurrences in the sequence
 
         """
-        return sum([1 for c in self if c == codon])
+        if len(codon) != 3:
+            return 0
+        code = _CODON_INDEX.get(codon)
+        if code is not None:
+            return int(np.count_nonzero(self.codon_codes == code))
+        target = np.frombuffer(codon.encode(), dtype=np.uint8)
+        return int(np.count_nonzero(
+            np.all(self.codon_matrix == target, axis=1)))
 
     def count_codon_all(self):
-        """Counts the number of times each character occurs in the sequence.
+        """Counts the number of times each codon occurs in the sequence.
 
         Returns
         -------
         Counter
-            Keys are the characters present in the sequence and
+            Keys are the codons present in the sequence and
             values are the corresponding number of occurrences in the sequence
 
         """
-        return Counter(list(self))
+        matrix = self.codon_matrix
+        codes = self.codon_codes
+        counts = np.bincount(codes, minlength=_CODON_SENTINEL + 1)
+        counter = Counter({_CODON_STRINGS[code]: int(counts[code])
+                           for code in np.flatnonzero(counts[:-1])})
+        if counts[_CODON_SENTINEL]:
+            # Only codons with gaps or other characters are counted
+            # one by one
+            other = matrix[codes == _CODON_SENTINEL].tobytes().decode()
+            counter.update(other[i:i+3] for i in range(0, len(other), 3))
+        return counter
 
     def __len__(self):
-        return int(len(self._sequence) / 3)
+        return len(self._sequence) // 3
 
     def __getitem__(self, i):
-        if isinstance(i, int):
-            if i >= 0:
-                i = i * 3
-                return self._sequence[i:i+3]
-            i = len(self._sequence) + 1 - 1
-            return self._sequence[i-3:i]
-        elif isinstance(i, slice):
-            start = i.start * 3
-            end = (i.stop * 3) if isinstance(i.stop, int) \
-                  else len(self._sequence)
-            return self._sequence[start:end]
-        return IndexError()
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step == 1:
+                return self._sequence[start*3:max(start, stop)*3]
+            return ''.join(self._sequence[j*3:j*3+3]
+                           for j in range(start, stop, step))
+        n_codons = len(self)
+        if i < 0:
+            i += n_codons
+        if not 0 <= i < n_codons:
+            raise IndexError('codon index out of range')
+        return self._sequence[i*3:i*3+3]
 
     def __iter__(self):
-        return (self._sequence[i:i+3] for i in range(0, len(self._sequence), 3))
+        return (self._sequence[i:i+3] for i in range(0, len(self) * 3, 3))
 
     def __str__(self):
         return ' '.join(list(self))
+
+
+class _SequenceViewMixin(object):
+    """Replaces the stored sequence of a Sequence subclass with a part of
+    the characters of another sequence.
+    """
+    __slots__ = ()
+
+    def _init_view(self, parent, start, stop, name=None):
+        self.name = parent.name if name is None else name
+        self.description = parent.description
+        self.seq_type = parent.seq_type
+        # Views of views refer to the original sequence. Sequences of a
+        # SequenceCollection are views of its packed buffer, and stay the
+        # parent of their views.
+        if isinstance(parent, _SequenceViewMixin) and \
+                isinstance(parent.parent, Sequence):
+            start += parent.start
+            stop += parent.start
+            parent = parent.parent
+        self._parent = parent
+        self._start = start
+        self._stop = stop
+        self._content_hash = None
+        self._clear_caches()
+
+    @property
+    def parent(self):
+        """Returns the sequence this view belongs to.
+        """
+        return self._parent
+
+    @property
+    def start(self):
+        """Returns the position of the first character of the view in the
+        parent sequence.
+        """
+        return self._start
+
+    @property
+    def stop(self):
+        """Returns the position after the last character of the view in
+        the parent sequence.
+        """
+        return self._stop
+
+    @property
+    def _sequence(self):
+        return self._base_codes().tobytes().decode()
+
+    def _base_codes(self):
+        return self._parent._codes(self._start, self._stop)  # pylint: disable=protected-access
+
+    # Indexing, iteration and counting read the character codes directly,
+    # so that they do not decode the whole view on each call.
+    def __getitem__(self, i):
+        codes = self._codes()
+        if isinstance(i, slice):
+            return codes[i].tobytes().decode()
+        if i < 0:
+            i += len(codes)
+        if not 0 <= i < len(codes):
+            raise IndexError('sequence index out of range')
+        return chr(codes[i])
+
+    def __iter__(self):
+        codes = self._codes()
+        for first in range(0, len(codes), _VIEW_ITER_BLOCK):
+            yield from codes[first:first+_VIEW_ITER_BLOCK].tobytes().decode()
+
+    def __contains__(self, x):
+        if len(x) == 1 and ord(x) < 256:
+            return bool(np.any(self._codes() == ord(x)))
+        return x.encode() in self._codes().tobytes()
+
+    def count(self, char):
+        """Counts the number of times a given character occurs in the sequence.
+
+        Parameters
+        ----------
+        char : str
+            Character to count in the sequence
+
+        Returns
+        -------
+        int
+            Number of occurrences in the sequence
+
+        """
+        if len(char) != 1 or ord(char) > 255:
+            return self._codes().tobytes().count(char.encode())
+        return int(np.count_nonzero(self._codes() == ord(char)))
+
+    def count_all(self):
+        """Counts the number of times each character occurs in the sequence.
+
+        Returns
+        -------
+        Counter
+            Keys are the characters present in the sequence and
+            values are the corresponding number of occurrences in the sequence
+
+        """
+        counts = np.bincount(self._codes(), minlength=256)
+        return Counter({chr(code): int(counts[code])
+                        for code in np.flatnonzero(counts)})
+
+
+class SequenceView(_SequenceViewMixin, Sequence):
+    """Sequence made of part of another sequence, sharing its memory.
+
+    Attributes
+    ----------
+    name : str
+        Name of the sequence. Defaults to the name of the parent sequence.
+    description : str
+        Description of the parent sequence.
+    seq_type : str
+        nucleotide, protein, or codon
+    sequence : str
+        Biological sequence. Created from the parent on each access.
+    parent
+    start
+    stop
+
+    See also
+    --------
+    Sequence.view
+    NuclSequenceView
+    ProtSequenceView
+    CodonSequenceView
+
+    """
+    __slots__ = ('_parent', '_start', '_stop')
+
+    def __init__(self, parent, start, stop, name=None):
+        """Creates a view of part of a sequence.
+
+        Parameters
+        ----------
+        parent : Sequence
+            Sequence to view.
+        start : int
+            Position of the first character in the parent sequence.
+        stop : int
+            Position after the last character in the parent sequence.
+        name : str, optional
+            Name of the view. Defaults to the name of the parent.
+
+        """
+        # pylint: disable=super-init-not-called
+        self._init_view(parent, start, stop, name=name)
+
+    def __len__(self):
+        return self._stop - self._start
+
+
+class NuclSequenceView(_SequenceViewMixin, NuclSequence):
+    """NuclSequence made of part of another sequence, sharing its memory.
+
+    See also
+    --------
+    SequenceView
+    NuclSequence
+
+    """
+    __slots__ = ('_parent', '_start', '_stop')
+
+    def __init__(self, parent, start, stop, name=None):
+        # pylint: disable=super-init-not-called
+        self._init_view(parent, start, stop, name=name)
+
+    def __len__(self):
+        return self._stop - self._start
+
+
+class ProtSequenceView(_SequenceViewMixin, ProtSequence):
+    """ProtSequence made of part of another sequence, sharing its memory.
+
+    See also
+    --------
+    SequenceView
+    ProtSequence
+
+    """
+    __slots__ = ('_parent', '_start', '_stop')
+
+    def __init__(self, parent, start, stop, name=None):
+        # pylint: disable=super-init-not-called
+        self._init_view(parent, start, stop, name=name)
+
+    def __len__(self):
+        return self._stop - self._start
+
+
+class CodonSequenceView(_SequenceViewMixin, CodonSequence):
+    """CodonSequence made of whole codons of another codon sequence,
+    sharing its memory.
+
+    `start` and `stop` are nucleotide positions in the parent sequence.
+
+    See also
+    --------
+    SequenceView
+    CodonSequence
+
+    """
+    __slots__ = ('_parent', '_start', '_stop')
+
+    def __init__(self, parent, start, stop, name=None):
+        # pylint: disable=super-init-not-called
+        self._init_view(parent, start, stop, name=name)
+
+    def __len__(self):
+        return (self._stop - self._start) // 3
+
+    def __getitem__(self, i):
+        codes = self._codes()
+        n_codons = len(self)
+        if isinstance(i, slice):
+            start, stop, step = i.indices(n_codons)
+            if step == 1:
+                return codes[start*3:max(start, stop)*3].tobytes().decode()
+            codons = codes[:n_codons*3].reshape(n_codons, 3)
+            return codons[start:stop:step].tobytes().decode()
+        if i < 0:
+            i += n_codons
+        if not 0 <= i < n_codons:
+            raise IndexError('codon index out of range')
+        return codes[i*3:i*3+3].tobytes().decode()
+
+    def __iter__(self):
+        codes = self._codes()
+        block = _VIEW_ITER_BLOCK - _VIEW_ITER_BLOCK % 3
+        for first in range(0, len(self) * 3, block):
+            chars = codes[first:min(first + block, len(self) * 3)]
+            chars = chars.tobytes().decode()
+            for j in range(0, len(chars), 3):
+                yield chars[j:j+3]
+
+
+# Sequence class of each sequence type
+SEQUENCE_CLASSES = {
+    'nucleotide': NuclSequence,
+    'protein': ProtSequence,
+    'codon': CodonSequence,
+}
+
+# Number of characters decoded at a time when iterating over a view
+_VIEW_ITER_BLOCK = 1 << 16
+
+_VIEW_CLASSES = {
+    'nucleotide': NuclSequenceView,
+    'protein': ProtSequenceView,
+    'codon': CodonSequenceView,
+}
+
+
+# Lookup tables for codon codes. Bases are numbered in TCAG order, so the
+# code of a codon is its row number in the NCBI genetic code tables.
+_CODON_BASES = 'TCAG'
+_CODON_SENTINEL = 64
+_CODON_STRINGS = [a + b + c for a in _CODON_BASES for b in _CODON_BASES
+                  for c in _CODON_BASES]
+_CODON_INDEX = {codon: i for i, codon in enumerate(_CODON_STRINGS)}
+_CODON_BASE_CODES = np.full(256, _CODON_SENTINEL, dtype=np.uint8)
+_CODON_BASE_CODES[np.frombuffer(_CODON_BASES.encode(), dtype=np.uint8)] = \
+    np.arange(4)
+
+
+def _codon_codes(matrix, base_codes=_CODON_BASE_CODES):
+    """Returns the codon code of each row of an (n, 3) uint8 array of
+    character codes, with 64 for codons that are not made of T, C, A, G.
+
+    `base_codes` maps each character code to a base number from 0 to 3,
+    or to 64 for characters that are not bases.
+    """
+    bases = base_codes[matrix]
+    codes = (bases[:, 0] << 4) | (bases[:, 1] << 2) | bases[:, 2]
+    codes[np.any(bases == _CODON_SENTINEL, axis=1)] = _CODON_SENTINEL
+    return codes
+
+
+# Lookup tables for PackedNuclSequence. The 4-bit code of a character is
+# the bitmask of the bases it represents.
+_INVALID_CODE = 255
+_PACK2_ALPHABET = 'ACGT'
+_PACK4_ALPHABET = '-ACMGRSVTWYHKDBN'
+
+
+def _encoding_table(alphabet):
+    table = np.full(256, _INVALID_CODE, dtype=np.uint8)
+    table[np.frombuffer(alphabet.encode(), dtype=np.uint8)] = \
+        np.arange(len(alphabet))
+    return table
+
+
+_PACK2_CODES = _encoding_table(_PACK2_ALPHABET)
+_PACK4_CODES = _encoding_table(_PACK4_ALPHABET)
+_PACK2_DECODE = np.frombuffer(_PACK2_ALPHABET.encode(), dtype=np.uint8)
+_PACK4_DECODE = np.frombuffer(_PACK4_ALPHABET.encode(), dtype=np.uint8)
+_UPPERCASE = np.arange(256, dtype=np.uint8)
+_UPPERCASE[ord('a'):ord('z') + 1] -= 32
+_LOWERCASE = np.arange(256, dtype=np.uint8)
+_LOWERCASE[ord('A'):ord('Z') + 1] += 32
+
+
+def _mask_runs(mask):
+    """Returns the start (inclusive) and end (exclusive) positions of the
+    runs of True values of a boolean array, as an (n_runs, 2) array.
+    """
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask, [0])).astype(
+        np.int8)))
+    return edges.reshape(-1, 2)
+
+
+def _pack_codes(codes, bits):
+    """Packs an array of codes into bytes, most significant bits first.
+    """
+    per_byte = 8 // bits
+    padded = np.zeros(-(-len(codes) // per_byte) * per_byte, dtype=np.uint8)
+    padded[:len(codes)] = codes
+    padded = padded.reshape(-1, per_byte)
+    packed = np.zeros(len(padded), dtype=np.uint8)
+    for j in range(per_byte):
+        packed |= padded[:, j] << np.uint8(8 - bits * (j + 1))
+    return packed
+
+
+def _unpack_codes(packed, bits):
+    """Unpacks bytes into an array of codes, most significant bits first.
+    """
+    per_byte = 8 // bits
+    mask = np.uint8((1 << bits) - 1)
+    codes = np.empty((len(packed), per_byte), dtype=np.uint8)
+    for j in range(per_byte):
+        codes[:, j] = (packed >> np.uint8(8 - bits * (j + 1))) & mask
+    return codes.reshape(-1)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Nose tests for asynchronous reader functions.
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import tempfile
+from bseq.aio import aiter_fasta, aread_fasta_alignment
+
+
+async def chunked(data, size):
+    for i in range(0, len(data), size):
+        yield data[i:i+size]
+
+
+async def collect(agen):
+    return [item async for item in agen]
+
+
+class TestAioReader:
+    """Unit tests for aiter_fasta and aread_fasta_alignment
+    """
+    def setup(self):
+        self.fp = tempfile.NamedTemporaryFile(mode='w+')
+        lines = ['>Test1 This is a description',
+                 'ATGCATGCATGCAAA',
+                 'ATGCATGCATGCAAA',
+                 '>Test2 This is a another description',
+                 'CATGCATGCAAATTT',
+                 'CATGCATGCAAATTT',
+                 '']
+        self.data = '\n'.join(lines).encode()
+        self.fp.write('\n'.join(lines))
+        self.fp.flush()
+        self.path = self.fp.name
+
+    def teardown(self):
+        self.fp.close()
+
+    def test_aiter_fasta_path(self):
+        seqs = asyncio.run(collect(aiter_fasta(self.path, chunk_size=7)))
+        assert [s.name for s in seqs] == ['Test1', 'Test2']
+        assert seqs[0].sequence == 'ATGCATGCATGCAAA' * 2
+
+    def test_aiter_fasta_iterable(self):
+        seqs = asyncio.run(collect(aiter_fasta(chunked(self.data, 5),
+                                               seq_type='codon')))
+        assert [s.name for s in seqs] == ['Test1', 'Test2']
+        assert seqs[1].sequence == 'CATGCATGCAAATTT' * 2
+        assert seqs[1].seq_type == 'codon'
+
+    def test_aiter_fasta_stream(self):
+        async def run():
+            stream = asyncio.StreamReader()
+            stream.feed_data(self.data)
+            stream.feed_eof()
+            return await collect(aiter_fasta(stream, chunk_size=11))
+        seqs = asyncio.run(run())
+        assert [s.description for s in seqs] == \
+            ['This is a description', 'This is a another description']
+
+    def test_aread_fasta_alignment(self):
+        for source in [self.path, chunked(self.data, 9)]:
+            aln = asyncio.run(aread_fasta_alignment(source, name='test'))
+            assert aln.name == 'test'
+            assert len(aln) == 30
+            assert ''.join(aln['Test2']) == 'CATGCATGCAAATTT' * 2
+            assert aln._records[0].description == 'This is a description'  # pylint: disable=W0212
+
+    def test_aread_fasta_alignment_streamed(self):
+        # One-byte chunks split every line and record
+        aln = asyncio.run(aread_fasta_alignment(chunked(self.data, 1)))
+        assert aln.i.shape == (2, 30)
+        data = self.data + b'>Test3\nCATG\n'
+        try:
+            asyncio.run(aread_fasta_alignment(chunked(data, 9)))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('unequal sequence lengths not detected')
+
+    def test_executor(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            seqs = asyncio.run(collect(aiter_fasta(
+                chunked(self.data, 5), executor=executor)))
+            aln = asyncio.run(aread_fasta_alignment(
+                chunked(self.data, 5), executor=executor))
+        assert [s.name for s in seqs] == ['Test1', 'Test2']
+        assert aln.i.shape == (2, 30)
+        # Process pools would parse each chunk with a copy of the parser
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            for run in [lambda: collect(aiter_fasta(self.path,
+                                                    executor=executor)),
+                        lambda: aread_fasta_alignment(self.path,
+                                                      executor=executor)]:
+                try:
+                    asyncio.run(run())
+                except TypeError:
+                    pass
+                else:
+                    raise AssertionError('process pool not rejected')
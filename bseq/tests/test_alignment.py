@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 """Nose tests for Alignment and its subclasses.
 """
+import os
+import tempfile
 from bseq.sequence import NuclSequence
-from bseq.alignment import Alignment, CodonAlignment
-from bseq.marker import Marker
+from bseq.alignment import Alignment, NuclAlignment, CodonAlignment, \
+    AlignmentBuilder
+from bseq.marker import Marker, GapMarker
 import numpy as np
 
 
@@ -58,6 +61,179 @@ class TestAlignment:
                                                   ['A', 'T'], ['A', 'T']]
         assert list(self.aln['seq2']) == list('ATGTATGCATGCAAA')
 
+    def test_matrix_dtype(self):
+        assert self.aln.i.dtype == np.uint8
+        assert not self.aln.i.flags.writeable
+        assert self.aln.i.shape == (4, 15)
+        assert self.aln.chars[1].tobytes() == b'ATGTATGCATGCAAA'
+
+    def test_add_after_replace(self):
+        # Rows added after the matrix is replaced do not change the
+        # replaced matrix
+        matrix = self.aln._aln_matrix  # pylint: disable=W0212
+        self.aln._aln_matrix = matrix[:, :15]  # pylint: disable=W0212
+        self.aln.add_sequence('seq5', 'ATGCATGCATGCCCC', 'nucleotide')
+        assert self.aln.chars[4].tobytes() == b'ATGCATGCATGCCCC'
+        assert matrix.shape == (4, 15)
+        try:
+            self.aln.add_sequence('seq6', 'ATG', 'nucleotide')
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('sequence of another length was added')
+
+
+class TestAlignmentFilter:
+    def setup(self):
+        self.aln = Alignment('test')
+        self.aln.add_sequence('seq1', 'ATGCATGCATGCAAA', 'nucleotide')
+        self.aln.add_sequence('seq2', 'ATGTATGCATGCAAA', 'nucleotide')
+        self.aln.add_sequence('seq3', 'ATGCATGCATGCATA', 'nucleotide')
+        self.aln.add_markers(GapMarker('OOOXOOOOOOOOOXX'),
+                             Marker('test_marker', {'O': 'keep', 'X': 'drop'},
+                                    'XOOOOOOOOOOOOOO'))
+
+    def test_filter_sites(self):
+        aln = self.aln.filter_sites('Gap_marker_sequence')
+        assert len(aln) == 12
+        assert aln._base is self.aln._base  # pylint: disable=W0212
+        assert aln.chars[1].tobytes() == b'ATGATGCATGCA'
+        assert len(self.aln) == 15
+        assert aln.markers['Gap_marker_sequence'].sequence == 'O' * 12
+        assert aln.markers['test_marker'].encoded_sequence == '0X1O12'
+        assert isinstance(aln.markers['Gap_marker_sequence'], GapMarker)
+        aln = self.aln.use_all_filters()
+        assert aln.chars[0].tobytes() == b'TGATGCATGCA'
+
+    def test_filter_sequences(self):
+        aln = self.aln.filter_sequences('seq3', 'seq1', 'missing')
+        assert [r.name for r in aln._records] == ['seq3', 'seq1']  # pylint: disable=W0212
+        assert list(aln['seq1']) == list('ATGCATGCATGCAAA')
+        assert aln.chars[0].tobytes() == b'ATGCATGCATGCATA'
+        # Contiguous rows are a view of the original matrix
+        aln = self.aln.filter_sequences('seq2', 'seq3')
+        assert np.shares_memory(aln.i, self.aln.i)
+        assert aln.i.shape == (2, 15)
+
+    def test_chained(self):
+        aln = self.aln.filter_sites('test_marker') \
+            .filter_sequences('seq2', 'seq3').filter_sites('Gap_marker_sequence')
+        assert aln._base is self.aln._base  # pylint: disable=W0212
+        assert list(aln[0]) == list('TT')
+        assert [''.join(aln[i]) for i in range(len(aln))] == \
+            ['TT', 'GG', 'AA', 'TT', 'GG', 'CC', 'AA', 'TT', 'GG', 'CC', 'AA']
+        assert aln.chars[1].tobytes() == b'TGATGCATGCA'
+
+    def test_read_once(self):
+        aln = self.aln.filter_sequences('seq3', 'seq1')
+        assert aln._base is self.aln._base  # pylint: disable=W0212
+        matrix = aln._aln_matrix  # pylint: disable=W0212
+        # The selected rows are copied on the first read only
+        assert aln._aln_matrix is matrix  # pylint: disable=W0212
+        assert aln._base is matrix  # pylint: disable=W0212
+        assert aln.chars[1].tobytes() == b'ATGCATGCATGCAAA'
+        assert list(aln['seq3']) == list('ATGCATGCATGCATA')
+
+    def test_compact(self):
+        aln = self.aln.filter_sites('Gap_marker_sequence').compact()
+        assert aln._base is not self.aln._base  # pylint: disable=W0212
+        assert not np.shares_memory(aln.i, self.aln.i)
+        assert aln.chars[2].tobytes() == b'ATGATGCATGCA'
+
+    def test_add_to_filtered(self):
+        aln = self.aln.filter_sequences('seq1', 'seq2')
+        aln.add_sequence('seq4', 'ATGCATGCATGCCCC', 'nucleotide')
+        assert aln.chars[2].tobytes() == b'ATGCATGCATGCCCC'
+        assert self.aln.chars[2].tobytes() == b'ATGCATGCATGCATA'
+        assert len(self.aln._records) == 3  # pylint: disable=W0212
+
+
+class TestSiteStats:
+    def setup(self):
+        self.aln = Alignment('test')
+        self.aln.add_sequence('seq1', 'ACGT-N', 'nucleotide')
+        self.aln.add_sequence('seq2', 'ACGA-N', 'nucleotide')
+        self.aln.add_sequence('seq3', 'aCTu-R', 'nucleotide')
+
+    def test_counts(self):
+        stats = self.aln.site_stats()
+        assert stats.alphabet == 'ACGT'
+        assert stats.counts.tolist() == [[3, 0, 0, 0], [0, 3, 0, 0],
+                                         [0, 0, 2, 1], [1, 0, 0, 2],
+                                         [0, 0, 0, 0], [0, 0, 0, 0]]
+        assert stats.gaps.tolist() == [0, 0, 0, 0, 3, 0]
+        assert stats.ambiguous.tolist() == [0, 0, 0, 0, 0, 3]
+
+    def test_alleles(self):
+        stats = self.aln.site_stats()
+        assert stats.major.tolist() == ['A', 'C', 'G', 'T', '', '']
+        assert stats.minor.tolist() == ['', '', 'T', 'A', '', '']
+        assert stats.segregating.tolist() == \
+            [False, False, True, True, False, False]
+        assert np.allclose(stats.entropy,
+                           [0, 0, 0.9182958, 0.9182958, 0, 0])
+
+    def test_cache(self):
+        stats = self.aln.site_stats()
+        assert self.aln.site_stats() is stats
+        assert not stats.counts.flags.writeable
+        filtered = self.aln.filter_sequences('seq1', 'seq2')
+        assert filtered.site_stats().counts[2].tolist() == [0, 0, 2, 0]
+        self.aln.add_sequence('seq4', 'ACGTAA', 'nucleotide')
+        assert self.aln.site_stats() is not stats
+        assert self.aln.site_stats().counts[4].tolist() == [1, 0, 0, 0]
+
+    def test_protein(self):
+        aln = Alignment('test', aln_type='protein')
+        aln.add_sequence('seq1', 'MKX', 'protein')
+        aln.add_sequence('seq2', 'MR-', 'protein')
+        stats = aln.site_stats()
+        assert stats.counts.shape == (3, 20)
+        assert stats.major.tolist() == ['M', 'K', '']
+        assert stats.minor.tolist() == ['', 'R', '']
+        assert stats.ambiguous.tolist() == [0, 0, 1]
+
+
+class TestAlignmentBuilder:
+    def test_build(self):
+        builder = AlignmentBuilder('test', 'codon', expected_rows=2)
+        builder.add_sequence('seq1', 'ATGCATGCATGCAAA')
+        builder.add_sequence('seq2', 'ATGTATGCATGCAAA', description='second')
+        builder.add_sequence_obj(NuclSequence('seq3', 'ATGCATGCATGCATA'))
+        assert len(builder) == 3
+        buffer = builder._buffer  # pylint: disable=W0212
+        aln = builder.build()
+        assert isinstance(aln, CodonAlignment)
+        assert aln._aln_matrix.base is buffer  # pylint: disable=W0212
+        assert len(aln) == 5
+        assert aln._records[1].description == 'second'  # pylint: disable=W0212
+        assert aln._records[2].seq_type == 'codon'  # pylint: disable=W0212
+        assert aln.chars[2].tobytes() == b'ATGCATGCATGCATA'
+        aln.add_sequence('seq4', 'ATGCATGCATGCAAG', 'codon')
+        assert aln.chars[3].tobytes() == b'ATGCATGCATGCAAG'
+
+    def test_errors(self):
+        builder = AlignmentBuilder('test', 'nucleotide')
+        builder.add_sequence('seq1', 'ATGC')
+        for name, sequence in [('seq1', 'ATGC'), ('seq2', 'ATG')]:
+            try:
+                builder.add_sequence(name, sequence)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError('{} was added'.format(name))
+        builder.build()
+        try:
+            builder.add_sequence('seq3', 'ATGC')
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('sequence added after build')
+
+    def test_empty(self):
+        aln = AlignmentBuilder('empty', 'protein').build()
+        assert len(aln._records) == 0  # pylint: disable=W0212
+
 
 class TestCodonAlignment:
     def setup(self):
@@ -78,3 +254,46 @@ class TestCodonAlignment:
         assert list(map(lambda x: ''.join(x), self.aln[0:2])) == \
         ['ATGCAT', 'ATGTAT', 'ATGCAT', 'ATGCAT']
         assert list(self.aln['seq2']) == list('ATGTATGCATGCAAA')
+
+
+class TestAlignmentBinary:
+    def setup(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'test.bseq')
+        self.aln = NuclAlignment('test', description='binary test')
+        self.aln.add_sequence('seq1', 'ATGCATGCATGCAAA', 'nucleotide')
+        self.aln.add_sequence('seq2', 'ATGTATGCATGCAAA', 'nucleotide',
+                              description='second')
+        self.aln.add_markers(GapMarker('OOOXOOOOOOOOOXX'),
+                             Marker('test_marker', {'O': 'keep', 'X': 'drop'},
+                                    'XOOOOOOOOOOOOOO'))
+
+    def teardown(self):
+        self.dir.cleanup()
+
+    def test_save_load(self):
+        self.aln.save(self.path)
+        for mmap in [True, False]:
+            aln = Alignment.load(self.path, mmap=mmap)
+            assert isinstance(aln, NuclAlignment)
+            assert aln.name == 'test'
+            assert aln.description == 'binary test'
+            assert aln._records == self.aln._records  # pylint: disable=W0212
+            assert (aln.i == self.aln.i).all()
+            assert list(aln['seq2']) == list('ATGTATGCATGCAAA')
+            assert isinstance(aln.markers['Gap_marker_sequence'], GapMarker)
+            assert aln.markers['Gap_marker_sequence'].sequence == \
+                'OOOXOOOOOOOOOXX'
+            assert aln.markers['test_marker'].encoded_sequence == \
+                '0X1O15'
+
+    def test_load_mmap(self):
+        self.aln.save(self.path)
+        aln = Alignment.load(self.path)
+        assert isinstance(aln._aln_matrix, np.memmap)  # pylint: disable=W0212
+        assert not aln._aln_matrix.flags.writeable  # pylint: disable=W0212
+
+    def test_empty(self):
+        Alignment('empty').save(self.path)
+        aln = Alignment.load(self.path)
+        assert len(aln) == 0  # pylint: disable=C1801
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""Nose tests for the compact sequence collection.
+"""
+import tempfile
+from bseq.collection import SequenceCollection
+from bseq.reader import read_fasta_collection
+from bseq.sequence import NuclSequence, ProtSequence
+
+
+class TestSequenceCollection:
+    """Unit tests for SequenceCollection
+    """
+    def setup(self):
+        self.fp = tempfile.NamedTemporaryFile(mode='w+')
+        lines = ['>Test1 This is a description',
+                 'ATGCATGCATGCAAA',
+                 'ATGCATGCATGCAAA',
+                 '>Test2',
+                 'CATGCATGCAAATTT',
+                 '>Test3 Short',
+                 'CATG',
+                 '']
+        self.fp.write('\n'.join(lines))
+        self.fp.flush()
+        self.path = self.fp.name
+
+    def teardown(self):
+        self.fp.close()
+
+    def test_read(self):
+        collection = read_fasta_collection(self.path)
+        assert len(collection) == 3
+        assert collection.names == ['Test1', 'Test2', 'Test3']
+        assert list(collection.lengths) == [30, 15, 4]
+        assert collection.description(0) == 'This is a description'
+        assert collection.description(1) is None
+
+    def test_getitem(self):
+        collection = read_fasta_collection(self.path)
+        seq_obj = collection[0]
+        assert isinstance(seq_obj, NuclSequence)
+        assert seq_obj.name == 'Test1'
+        assert seq_obj.sequence == 'ATGCATGCATGCAAA' * 2
+        assert seq_obj.description == 'This is a description'
+        assert collection['Test3'].sequence == 'CATG'
+        assert collection[-1].name == 'Test3'
+        assert [s.name for s in collection[1:]] == ['Test2', 'Test3']
+        assert 'Test2' in collection
+        assert 'Test4' not in collection
+        try:
+            collection[3]
+        except IndexError:
+            pass
+        else:
+            raise AssertionError('IndexError not raised')
+
+    def test_getitem_shares_memory(self):
+        collection = read_fasta_collection(self.path)
+        seq_obj = collection[1]
+        assert seq_obj.parent is collection
+        assert seq_obj.i.base is not None
+        assert not seq_obj.i.flags.writeable
+        assert len(seq_obj) == 15
+        assert seq_obj[0] == 'C' and seq_obj[-3:] == 'TTT'
+        assert seq_obj.count('A') == 5
+        assert seq_obj.view(3, 7).sequence == 'GCAT'
+        assert collection[0].description == 'This is a description'
+        assert collection[1].description is None
+
+    def test_view_of_item(self):
+        collection = read_fasta_collection(self.path)
+        seq_obj = collection[0]
+        view = seq_obj.view(1, 3)
+        assert view.name == 'Test1'
+        assert view.description == 'This is a description'
+        assert view.parent is seq_obj
+        assert (view.start, view.stop) == (1, 3)
+        assert view.sequence == 'TG'
+        sub_view = view.view(1, 2, name='sub')
+        assert sub_view.name == 'sub'
+        assert sub_view.parent is seq_obj
+        assert (sub_view.start, sub_view.stop) == (2, 3)
+        assert sub_view.sequence == 'G'
+
+    def test_codes(self):
+        collection = read_fasta_collection(self.path)
+        codes = collection.codes(2)
+        assert codes.tobytes() == b'CATG'
+        assert not codes.flags.writeable
+
+    def test_iter_matches_read(self):
+        collection = read_fasta_collection(self.path)
+        assert [(s.name, s.sequence) for s in collection] == \
+            [('Test1', 'ATGCATGCATGCAAA' * 2),
+             ('Test2', 'CATGCATGCAAATTT'),
+             ('Test3', 'CATG')]
+
+    def test_from_sequences(self):
+        seqs = [ProtSequence('p1', 'MKV*'), ProtSequence('p2', 'MA', 'x')]
+        collection = SequenceCollection.from_sequences(seqs)
+        assert collection.seq_type == 'protein'
+        assert isinstance(collection['p2'], ProtSequence)
+        assert collection['p2'].description == 'x'
+        assert collection.nbytes > 0
+
+    def test_empty(self):
+        collection = SequenceCollection.from_sequences([])
+        assert len(collection) == 0
+        assert collection.names == []
+        assert list(collection) == []
+
+    def test_slots(self):
+        seq_obj = NuclSequence('a', 'ATG')
+        assert not hasattr(seq_obj, '__dict__')
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Nose tests for compressed file handling.
+"""
+import bz2
+import gzip
+import lzma
+import os
+import struct
+import tempfile
+import zlib
+from bseq.compression import detect_compression, open_binary
+from bseq.reader import read_fasta_file, read_fasta_alignment
+
+
+def bgzf_compress(data, block_size=16):
+    """Compresses data into BGZF blocks of at most `block_size` bytes.
+    """
+    blocks = []
+    for i in range(0, len(data), block_size) or [0]:
+        chunk = data[i:i+block_size]
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        cdata = compressor.compress(chunk) + compressor.flush()
+        header = b'\x1f\x8b\x08\x04' + b'\x00' * 4 + b'\x00\xff' + \
+            struct.pack('<H', 6) + b'BC' + struct.pack('<HH', 2,
+                                                       len(cdata) + 25)
+        blocks.append(header + cdata +
+                      struct.pack('<II', zlib.crc32(chunk), len(chunk)))
+    return b''.join(blocks)
+
+
+class TestCompression:
+    """Unit tests for detect_compression and open_binary
+    """
+    def setup(self):
+        self.dir = tempfile.TemporaryDirectory()
+        lines = ['>Test1 This is a description',
+                 'ATGCATGCATGCAAA',
+                 'ATGCATGCATGCAAA',
+                 '>Test2 This is a another description',
+                 'CATGCATGCAAATTT',
+                 'CATGCATGCAAATTT',
+                 '']
+        self.data = '\n'.join(lines).encode()
+        self.paths = {}
+        for compression, compress in [('gzip', gzip.compress),
+                                      ('bgzf', bgzf_compress),
+                                      ('xz', lzma.compress),
+                                      ('bz2', bz2.compress),
+                                      (None, bytes)]:
+            path = os.path.join(self.dir.name, 'test_{}'.format(compression))
+            with open(path, 'wb') as f:
+                f.write(compress(self.data))
+            self.paths[compression] = path
+
+    def teardown(self):
+        self.dir.cleanup()
+
+    def test_detect_compression(self):
+        for compression, path in self.paths.items():
+            assert detect_compression(path) == compression
+
+    def test_open_binary(self):
+        for path in self.paths.values():
+            with open_binary(path, threads=2) as f:
+                assert f.read() == self.data
+
+    def test_read_fasta_file(self):
+        for path in self.paths.values():
+            seq_list = read_fasta_file(path)
+            assert [s.name for s in seq_list] == ['Test1', 'Test2']
+            assert seq_list[1].sequence == 'CATGCATGCAAATTT' * 2
+
+    def test_read_fasta_alignment(self):
+        for path in self.paths.values():
+            aln = read_fasta_alignment(path)
+            assert len(aln) == 30
+            assert ''.join(aln['Test1']) == 'ATGCATGCATGCAAA' * 2
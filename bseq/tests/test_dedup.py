@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Nose tests for sequence deduplication.
+"""
+from bseq.sequence import NuclSequence
+from bseq.alignment import NuclAlignment
+from bseq.collection import SequenceCollection
+from bseq.dedup import deduplicate
+
+
+class TestDeduplicate:
+    """Unit tests for deduplicate
+    """
+    def setup(self):
+        self.seqs = [NuclSequence('a', 'ATGC'),
+                     NuclSequence('b', 'ATGG'),
+                     NuclSequence('c', 'ATGC', 'same as a'),
+                     NuclSequence('d', 'ATGC')]
+
+    def test_content_hash(self):
+        assert self.seqs[0].content_hash == self.seqs[2].content_hash
+        assert self.seqs[0].content_hash != self.seqs[1].content_hash
+        assert self.seqs[0].content_hash == \
+            self.seqs[0].pack().content_hash
+        # Stable across runs
+        assert NuclSequence('x', '').content_hash == \
+            'cae66941d9efbd404e4d88758ea67670'
+
+    def test_sequences(self):
+        groups = deduplicate(self.seqs)
+        assert len(groups) == 2
+        assert groups[0].representative is self.seqs[0]
+        assert groups[0].names == ['a', 'c', 'd']
+        assert groups[0].count == 3
+        assert groups[1].names == ['b']
+
+    def test_collection(self):
+        collection = SequenceCollection.from_sequences(self.seqs)
+        groups = deduplicate(collection)
+        assert [g.count for g in groups] == [3, 1]
+        assert groups[1].representative.sequence == 'ATGG'
+
+    def test_alignment(self):
+        aln = NuclAlignment('aln')
+        for seq in self.seqs:
+            aln.add_sequence_obj(seq)
+        groups = deduplicate(aln)
+        assert [g.names for g in groups] == [['a', 'c', 'd'], ['b']]
+        assert isinstance(groups[0].representative, NuclSequence)
+        assert groups[0].representative.sequence == 'ATGC'
+        assert deduplicate(NuclAlignment('empty')) == []
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""Nose tests for pairwise distances.
+"""
+import math
+import os
+import tempfile
+import numpy as np
+from bseq.alignment import Alignment
+from bseq.distance import distance_matrix, _share_matrix
+
+
+def _reference(seq1, seq2, model, freqs):
+    """Computes a distance one site at a time."""
+    pairs = [(a, b) for a, b in zip(seq1, seq2)
+             if a in 'ACGT' and b in 'ACGT']
+    n_sites = len(pairs)
+    diff = sum(a != b for a, b in pairs) / n_sites
+    p_ag = sum({a, b} == {'A', 'G'} for a, b in pairs) / n_sites
+    p_ct = sum({a, b} == {'C', 'T'} for a, b in pairs) / n_sites
+    q = diff - p_ag - p_ct
+    if model == 'p':
+        return diff
+    if model == 'jc69':
+        return -0.75 * math.log(1 - 4 / 3 * diff)
+    if model == 'k2p':
+        return -0.5 * math.log(1 - 2 * (p_ag + p_ct) - q) - \
+            0.25 * math.log(1 - 2 * q)
+    g_a, g_c, g_g, g_t = freqs
+    g_r, g_y = g_a + g_g, g_c + g_t
+    k_1 = 2 * g_a * g_g / g_r
+    k_2 = 2 * g_c * g_t / g_y
+    k_3 = 2 * (g_r * g_y - g_a * g_g * g_y / g_r - g_c * g_t * g_r / g_y)
+    return -k_1 * math.log(1 - p_ag / k_1 - q / (2 * g_r)) - \
+        k_2 * math.log(1 - p_ct / k_2 - q / (2 * g_y)) - \
+        k_3 * math.log(1 - q / (2 * g_r * g_y))
+
+
+class TestDistanceMatrix:
+    def setup(self):
+        self.seqs = [
+            'ATGCATGCATGCAAAGGCTTACCGATAGG',
+            'ATGTATGCGTGCAAAGGCTTACC-ATAGG',
+            'ATGCATGCATGCATAGGCTNACCGATCGG',
+            'GTGCATACATGCAAAGACTTACCGATAGA',
+            'ATGCTTGCAT--AAAGGCTTAACGATAGG',
+        ]
+        self.aln = Alignment('test')
+        for i, seq in enumerate(self.seqs):
+            self.aln.add_sequence('seq{}'.format(i + 1), seq, 'nucleotide')
+        counts = np.array([sum(seq.count(b) for seq in self.seqs)
+                           for b in 'ACGT'])
+        self.freqs = counts / counts.sum()
+        self.dir = tempfile.TemporaryDirectory()
+
+    def teardown(self):
+        self.dir.cleanup()
+
+    def test_models(self):
+        for model in ('p', 'jc69', 'k2p', 'tn93'):
+            dist = self.aln.distance_matrix(model=model, form='square')
+            assert dist.shape == (5, 5)
+            assert (np.diag(dist) == 0).all()
+            # Zeros are positive
+            assert not np.signbit(np.diag(dist)).any()
+            for i in range(5):
+                for j in range(5):
+                    if i != j:
+                        expected = _reference(self.seqs[i], self.seqs[j],
+                                              model, self.freqs)
+                        assert abs(dist[i, j] - expected) < 1e-12
+
+    def test_condensed(self):
+        square = self.aln.distance_matrix(model='k2p', form='square')
+        condensed = distance_matrix(self.aln, model='k2p', block_size=2)
+        assert condensed.shape == (10,)
+        expected = [square[i, j] for i in range(5) for j in range(i + 1, 5)]
+        assert np.allclose(condensed, expected)
+
+    def test_workers(self):
+        single = distance_matrix(self.aln, model='tn93', form='square',
+                                 block_size=2)
+        pooled = distance_matrix(self.aln, model='tn93', form='square',
+                                 block_size=2, workers=2)
+        assert np.allclose(single, pooled)
+
+    def test_workers_mmap(self):
+        path = os.path.join(self.dir.name, 'test.bseq')
+        self.aln.save(path)
+        aln = Alignment.load(path)
+        # Workers map the file again instead of receiving a copy
+        source, block = _share_matrix(aln._aln_matrix)  # pylint: disable=W0212
+        assert source[0] == 'memmap' and block is None
+        pooled = distance_matrix(aln, model='k2p', block_size=2, workers=2)
+        assert np.allclose(pooled, self.aln.distance_matrix(model='k2p'))
+
+    def test_out(self):
+        path = os.path.join(self.dir.name, 'dist.npy')
+        self.aln.distance_matrix(model='jc69', out=path)
+        loaded = np.load(path, mmap_mode='r')
+        assert np.allclose(loaded, self.aln.distance_matrix(model='jc69'))
+        out = np.zeros((5, 5))
+        assert self.aln.distance_matrix(form='square', out=out) is out
+        try:
+            self.aln.distance_matrix(form='square', out=np.zeros(10))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('output of the wrong shape was accepted')
+
+    def test_no_comparable_sites(self):
+        aln = Alignment('test')
+        aln.add_sequence('seq1', 'AC--', 'nucleotide')
+        aln.add_sequence('seq2', '--GT', 'nucleotide')
+        assert np.isnan(aln.distance_matrix())[0]
+
+    def test_protein(self):
+        aln = Alignment('test', aln_type='protein')
+        aln.add_sequence('seq1', 'MKVLA', 'protein')
+        aln.add_sequence('seq2', 'MRVX-', 'protein')
+        assert aln.distance_matrix().tolist() == [1 / 3]
+        try:
+            aln.distance_matrix(model='k2p')
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('k2p distances of proteins were computed')
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Nose tests for indexed FASTA access.
+"""
+import os
+import tempfile
+from bseq.index import IndexedFasta, build_fasta_index, load_fasta_index
+
+
+class TestIndexedFasta:
+    """Unit tests for IndexedFasta
+    """
+    def setup(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'test.fasta')
+        lines = ['>Test1 This is a description',
+                 'ATGCATGCAT',
+                 'GCAAAATGCA',
+                 'TGC',
+                 '>Test2',
+                 'CATGCATGCA',
+                 'AATTT',
+                 '']
+        with open(self.path, 'w') as f:
+            f.write('\n'.join(lines))
+
+    def teardown(self):
+        self.dir.cleanup()
+
+    def test_build_fasta_index(self):
+        records = build_fasta_index(self.path)
+        assert os.path.exists(self.path + '.bfai')
+        assert [r.name for r in records] == ['Test1', 'Test2']
+        assert records[0].description == 'This is a description'
+        assert records[0].length == 23
+        assert records[0].line_bases == 10
+        assert records[0].line_width == 11
+        assert records[1].length == 15
+        assert load_fasta_index(self.path) == records
+
+    def test_getitem(self):
+        with IndexedFasta(self.path) as fasta:
+            assert len(fasta) == 2
+            assert 'Test2' in fasta
+            seq = fasta['Test1']
+            assert seq.sequence == 'ATGCATGCATGCAAAATGCATGC'
+            assert seq.description == 'This is a description'
+            assert fasta['Test2'].sequence == 'CATGCATGCAAATTT'
+
+    def test_fetch(self):
+        with IndexedFasta(self.path) as fasta:
+            assert fasta.fetch('Test1', 8, 12).sequence == 'ATGC'
+            assert fasta.fetch('Test1', 10, 20).sequence == 'GCAAAATGCA'
+            assert fasta.fetch('Test1', start=20).sequence == 'TGC'
+            assert fasta.fetch('Test2', end=3).sequence == 'CAT'
+
+    def test_rebuild(self):
+        build_fasta_index(self.path)
+        with open(self.path, 'a') as f:
+            f.write('>Test3\nGATTACA\n')
+        with IndexedFasta(self.path) as fasta:
+            assert fasta['Test3'].sequence == 'GATTACA'
+
+    def test_irregular_lines(self):
+        with open(self.path, 'w') as f:
+            f.write('>Test1\nATG\nCATGC\nA\n')
+        try:
+            build_fasta_index(self.path)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('irregular line lengths not detected')
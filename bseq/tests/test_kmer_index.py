@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Nose tests for the k-mer index.
+"""
+import os
+import tempfile
+from bseq.sequence import NuclSequence
+from bseq.kmer_index import KmerIndex
+
+
+class TestKmerIndex:
+    """Unit tests for KmerIndex
+    """
+    def setup(self):
+        self.seqs = [
+            NuclSequence('seq1', 'ACGTTGCAAGGCTTACCGATAGGCTTAACG'),
+            NuclSequence('seq2', 'TTTTGGCTTACCGATAGGAAAAAAAAAAA'),
+            NuclSequence('seq3', 'CCCCCCCCNNGGCTTACCGTTAGGCCCC'),
+            NuclSequence('seq4', 'ACG'),
+        ]
+
+    def test_find_exact(self):
+        for window in (1, 3):
+            index = KmerIndex(self.seqs, k=5, window=window)
+            hits = index.find('GGCTTACCGATAGG')
+            assert [(h.name, h.position) for h in hits] == \
+                [('seq1', 9), ('seq2', 4)]
+            assert all(h.mismatches == 0 for h in hits)
+
+    def test_find_mismatches(self):
+        index = KmerIndex(self.seqs, k=5)
+        hits = index.find('GGCTTACCGATAGG', mismatches=1)
+        assert [h.name for h in hits] == ['seq1', 'seq2', 'seq3']
+        assert hits[2].mismatches == 1
+        assert hits[2].position == 10
+
+    def test_find_short_segments(self):
+        # Segments shorter than k are looked up as k-mer prefixes instead
+        # of scanning all sequences
+        index = KmerIndex(self.seqs, k=5)
+        index._all_positions = None  # pylint: disable=W0212
+        hits = index.find('GCTTACCGTTA', mismatches=1)
+        assert [(h.name, h.position, h.mismatches) for h in hits] == \
+            [('seq1', 10, 1), ('seq2', 5, 1), ('seq3', 11, 0)]
+        # The k-mers starting at the exact segments contain N
+        hits = index.find('CCCCAAGGCT', mismatches=2)
+        assert [(h.name, h.position, h.mismatches) for h in hits] == \
+            [('seq3', 4, 2)]
+
+    def test_find_short_pattern(self):
+        # Shorter than k: all sequences are scanned
+        index = KmerIndex(self.seqs, k=5)
+        assert index.names_containing('ACG') == ['seq1', 'seq4']
+
+    def test_find_both_strands(self):
+        index = KmerIndex(self.seqs, k=5)
+        hits = index.find('CCTATCGGTAAGCC', both_strands=True)
+        assert [(h.name, h.strand) for h in hits] == \
+            [('seq1', '-'), ('seq2', '-')]
+        assert index.find('CCTATCGGTAAGCC') == []
+
+    def test_postings(self):
+        index = KmerIndex(self.seqs, k=5)
+        ids, positions = index.postings('GGCTT')
+        assert sorted(zip(ids.tolist(), positions.tolist())) == \
+            [(0, 9), (0, 21), (1, 4), (2, 10)]
+        # K-mers spanning two sequences are not indexed
+        assert len(index.postings('AACGT')[0]) == 0
+
+    def test_save_load(self):
+        index = KmerIndex(self.seqs, k=5, window=2)
+        fd, path = tempfile.mkstemp(suffix='.npz')
+        os.close(fd)
+        try:
+            index.save(path)
+            loaded = KmerIndex.load(path)
+        finally:
+            os.remove(path)
+        assert loaded.k == 5
+        assert loaded.window == 2
+        assert len(loaded) == 4
+        assert loaded.find('GGCTTACCGATAGG') == \
+            index.find('GGCTTACCGATAGG')
+        assert loaded.collection['seq3'].sequence == self.seqs[2].sequence
+
+    def test_save_load_no_extension(self):
+        index = KmerIndex(self.seqs, k=5, window=2)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'index.kmers')
+            index.save(path)
+            assert os.listdir(tmpdir) == ['index.kmers']
+            loaded = KmerIndex.load(path)
+        assert loaded.find('GGCTTACCGATAGG') == \
+            index.find('GGCTTACCGATAGG')
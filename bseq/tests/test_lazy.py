@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Nose tests for lazily loaded sequence records.
+"""
+import copy
+import pickle
+import tempfile
+from bseq.lazy import LazyNuclSequence, LazyCodonSequence
+from bseq.reader import read_fasta_file
+
+
+class TestLazySequence:
+    """Unit tests for lazy records returned by read_fasta_file
+    """
+    def setup(self):
+        self.fp = tempfile.NamedTemporaryFile(mode='w+')
+        lines = ['>Test1 This is a description',
+                 'ATGCATGCATGCAAA',
+                 'ATGCATGCATGCAAA',
+                 '>Test2',
+                 'CATGCATGCAAATTT',
+                 '>Test3 Short',
+                 'CATG',
+                 '']
+        self.fp.write('\n'.join(lines))
+        self.fp.flush()
+        self.path = self.fp.name
+
+    def teardown(self):
+        self.fp.close()
+
+    def test_metadata(self):
+        seq_list = read_fasta_file(self.path, lazy=True)
+        assert all(isinstance(s, LazyNuclSequence) for s in seq_list)
+        assert [s.name for s in seq_list] == ['Test1', 'Test2', 'Test3']
+        assert [len(s) for s in seq_list] == [30, 15, 4]
+        assert seq_list[0].description == 'This is a description'
+        assert seq_list[1].offset == 68
+        assert not any(s.is_loaded for s in seq_list)
+
+    def test_load(self):
+        seq_list = read_fasta_file(self.path, lazy=True)
+        assert seq_list[0].sequence == 'ATGCATGCATGCAAA' * 2
+        assert seq_list[0].is_loaded
+        assert not seq_list[1].is_loaded
+        assert seq_list[2].count('C') == 1
+        assert seq_list[2].fasta_format() == '>Test3 Short\nCATG\n'
+
+    def test_cache(self):
+        seq_list = read_fasta_file(self.path, lazy=True, cache_size=1)
+        assert [s.sequence for s in seq_list] == \
+            ['ATGCATGCATGCAAA' * 2, 'CATGCATGCAAATTT', 'CATG']
+        assert not any(s.is_loaded for s in seq_list)
+        assert len(seq_list[0]._source._cache) == 1  # pylint: disable=W0212
+
+    def test_i(self):
+        seq_list = read_fasta_file(self.path, lazy=True)
+        assert seq_list[2].i.tobytes() == b'CATG'
+        assert seq_list[2].i is seq_list[2].i
+        # Views are not kept when loaded sequences are in the shared cache
+        seq_list = read_fasta_file(self.path, lazy=True, cache_size=1)
+        assert seq_list[2].i.tobytes() == b'CATG'
+        assert seq_list[2]._views is None  # pylint: disable=W0212
+
+    def test_codon(self):
+        seq_list = read_fasta_file(self.path, seq_type='codon', lazy=True)
+        assert isinstance(seq_list[1], LazyCodonSequence)
+        assert len(seq_list[1]) == 5
+        assert len(seq_list[2]) == 1
+        assert seq_list[1][1] == 'GCA'
+
+    def test_close(self):
+        seq_list = read_fasta_file(self.path, lazy=True, cache_size=2)
+        source = seq_list[0].source
+        assert all(s.source is source for s in seq_list)
+        with source:
+            assert seq_list[2].sequence == 'CATG'
+            assert source._data is not None  # pylint: disable=W0212
+        assert source._data is None  # pylint: disable=W0212
+        assert not source._cache  # pylint: disable=W0212
+        # Closed sources map the file again when needed
+        assert seq_list[1].sequence == 'CATGCATGCAAATTT'
+        source.close()
+
+    def test_copy_pickle(self):
+        for seq_type in ['nucleotide', 'protein', 'codon']:
+            seq_list = read_fasta_file(self.path, seq_type=seq_type,
+                                       lazy=True)
+            assert seq_list[1].sequence
+            for seq in seq_list:
+                for other in [copy.copy(seq), copy.deepcopy(seq),
+                              pickle.loads(pickle.dumps(seq))]:
+                    assert type(other) is type(seq)
+                    assert other.name == seq.name
+                    assert len(other) == len(seq)
+                    assert other.is_loaded == (seq is seq_list[1])
+                    assert other.sequence == seq.sequence
@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 """Nose tests for Alignment and its subclasses.
 """
-from bseq.marker import Marker, ConsAlignMarker
+from bseq.alignment import Alignment
+from bseq.marker import Marker, ConsAlignMarker, GapMarker
 
 
 class TestMarker:
@@ -48,6 +49,12 @@ class TestMarker:
                                   inverse=True) == \
             [0, 1, 2, 4, 5, 6, 7, 8, 9, 13, 14]
 
+    def test_subset(self):
+        marker = self.marker._subset([0, 1, 3, 4, 10, 13])
+        assert marker.sequence == 'OOXOXO'
+        # Runs of the same character are merged
+        assert self.marker._subset([0, 4, 13]).encoded_sequence == '0O3'
+
     def test_mask(self):
         sequence = 'ATTCAATATACCCAT'
         assert self.marker.mask(sequence, 'X') == 'ATT_AATATA___AT'
@@ -60,6 +67,34 @@ class TestConsAlignMarker:
         self.marker = ConsAlignMarker('CCCNCCCCCCNNNCC')
         self.sequence = 'ATTCAATATACCCAT'
 
+    def test_from_alignments(self):
+        aln = Alignment('aln1')
+        aln.add_sequence('seq1', 'AC-GT', 'nucleotide')
+        aln.add_sequence('seq2', 'A-CGT', 'nucleotide')
+        aln.add_sequence('seq3', 'ACCGT', 'nucleotide')
+        other = Alignment('aln2')
+        other.add_sequence('seq2', 'AC-GT', 'nucleotide')
+        other.add_sequence('seq3', 'ACCGT', 'nucleotide')
+        other.add_sequence('seq1', 'AC-GT', 'nucleotide')
+        marker = ConsAlignMarker.from_alignments(aln, other)
+        assert isinstance(marker, ConsAlignMarker)
+        assert marker.sequence == 'CNNCC'
+        assert ConsAlignMarker.from_alignments(other, aln).sequence == \
+            'CNNCC'
+        assert ConsAlignMarker.from_alignments(aln, aln).sequence == 'CCCCC'
+
+    def test_from_alignments_different_sequences(self):
+        aln = Alignment('aln1')
+        aln.add_sequence('seq1', 'AC-GT', 'nucleotide')
+        other = Alignment('aln2')
+        other.add_sequence('seq1', 'ACG-A', 'nucleotide')
+        try:
+            ConsAlignMarker.from_alignments(aln, other)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('different sequences were compared')
+
     def test_consistent_sites(self):
         assert self.marker.consistent_sites(self.sequence) == 'ATTAATATAAT'
 
@@ -81,3 +116,24 @@ class TestConsAlignMarker:
     def test_inconsistent_site_coords(self):
         assert self.marker.inconsistent_site_coords() == \
         [3, 10, 11, 12]
+
+
+class TestGapMarker:
+    def setup(self):
+        self.aln = Alignment('test')
+        self.aln.add_sequence('seq1', 'ATG-ATGCATG---A', 'nucleotide')
+        self.aln.add_sequence('seq2', 'ATGCATGCATGC--A', 'nucleotide')
+        self.aln.add_sequence('seq3', 'ATGCATGCATGCA-A', 'nucleotide')
+
+    def test_from_alignment(self):
+        marker = GapMarker.from_alignment(self.aln)
+        assert isinstance(marker, GapMarker)
+        assert marker.name == 'Gap_marker_sequence'
+        assert marker.sequence == 'OOOXOOOOOOOXXXO'
+        assert marker.encoded_sequence == '0O3X4O11X14O15'
+
+    def test_max_gap_fraction(self):
+        marker = GapMarker.from_alignment(self.aln, max_gap_fraction=0.5)
+        assert marker.sequence == 'OOOOOOOOOOOOXXO'
+        marker = GapMarker.from_alignment(self.aln, max_gap_fraction=1.0)
+        assert marker.sequence == 'O' * 15
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Nose tests for motif search.
+"""
+from bseq.sequence import NuclSequence, ProtSequence
+from bseq.alignment import NuclAlignment
+from bseq.collection import SequenceCollection
+from bseq.motif import Motif, find_motif, batch_find_motif
+
+
+class TestMotif:
+    """Unit tests for single sequences
+    """
+    def test_compile(self):
+        motif = Motif('RGATCY')
+        assert list(motif.masks) == [5, 4, 1, 8, 2, 10]
+        assert list(motif.reverse_complement().masks) == [5, 4, 1, 8, 2, 10]
+        try:
+            Motif('GG-CC')
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('ValueError not raised')
+
+    def test_find(self):
+        sequence = 'AGGACCTTGGTCCNGGNCCa'
+        assert list(find_motif(sequence, 'GGNCC')) == [1, 8, 14]
+        # N in the sequence may be any base, so it only matches N in the
+        # motif unless ambiguous matches are allowed
+        assert list(find_motif(sequence, 'GGNCC', match_ambiguous=True)) == \
+            [1, 8, 13, 14]
+        assert list(find_motif(sequence, 'CCA')) == [17]
+
+    def test_both_strands(self):
+        seq = NuclSequence('test', 'AGGTTTACCT')
+        forward, reverse = seq.find_motif('AGG', both_strands=True)
+        assert list(forward) == [0]
+        assert list(reverse) == [7]
+
+    def test_protein(self):
+        seq = ProtSequence('test', 'MNISNXSAB')
+        assert list(seq.find_motif('NXS')) == [1, 4]
+        assert list(seq.find_motif('B')) == [1, 4, 8]
+        assert list(seq.find_motif('D')) == []
+        assert list(seq.find_motif('D', match_ambiguous=True)) == [5, 8]
+
+    def test_short_sequence(self):
+        assert list(find_motif('AC', 'ACGT')) == []
+
+
+class TestBatchFindMotif:
+    """Unit tests for batch_find_motif
+    """
+    def setup(self):
+        self.seqs = [NuclSequence('a', 'GAATTCAAGAATTC'),
+                     NuclSequence('b', 'TTTTGAATTC'),
+                     NuclSequence('c', 'GAAT')]
+
+    def test_sequences(self):
+        hits = batch_find_motif(self.seqs, 'GAATTC')
+        assert [list(h) for h in hits] == [[0, 8], [4], []]
+
+    def test_collection(self):
+        collection = SequenceCollection.from_sequences(self.seqs)
+        hits = batch_find_motif(collection, 'GAATTC')
+        assert [list(h) for h in hits] == [[0, 8], [4], []]
+        # Matches spanning two sequences are dropped
+        hits = batch_find_motif(collection, 'TCTT')
+        assert [list(h) for h in hits] == [[], [], []]
+
+    def test_alignment(self):
+        aln = NuclAlignment('aln')
+        aln.add_sequence('a', 'GAATTCAA', 'nucleotide')
+        aln.add_sequence('b', 'GAA-TCAA', 'nucleotide')
+        aln.add_sequence('c', 'TTGAATTC', 'nucleotide')
+        hits = batch_find_motif(aln, 'GAATTC', both_strands=True)
+        assert [(list(f), list(r)) for f, r in hits] == \
+            [([0], [0]), ([], []), ([2], [2])]
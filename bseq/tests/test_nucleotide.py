@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Nose tests for the nucleotide utilities.
+"""
+import math
+from collections import Counter
+import numpy as np
+from bseq.sequence import NuclSequence
+from bseq.alignment import NuclAlignment
+from bseq.collection import SequenceCollection
+from bseq.nucleotide import reverse_complement, gc_content, kmer_codes, \
+    decode_kmer, count_kmers, batch_reverse_complement, batch_gc_content, \
+    batch_count_kmers
+
+
+class TestNucleotide:
+    """Unit tests for single sequences
+    """
+    def test_reverse_complement(self):
+        assert reverse_complement('ATGCA') == 'TGCAT'
+        assert reverse_complement('acgRYKMn-') == '-nKMRYcgt'
+        assert reverse_complement('AUG') == 'CAT'
+
+    def test_gc_content(self):
+        assert gc_content('GGCC') == 1.0
+        assert gc_content('ATGC') == 0.5
+        # S is counted as G or C, N and gaps are ignored
+        assert gc_content('ASNN--') == 0.5
+        assert math.isnan(gc_content('NN--'))
+
+    def test_kmer_codes(self):
+        assert list(kmer_codes('ACGT', 2)) == [1, 6, 11]
+        # K-mers containing N are skipped
+        assert list(kmer_codes('ACNGT', 2)) == [1, 11]
+        assert list(kmer_codes('ACGT', 2, canonical=True)) == [1, 6, 1]
+        assert decode_kmer(6, 2) == 'CG'
+        try:
+            kmer_codes('ACGT', 33)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('ValueError not raised')
+
+    def test_count_kmers_dense(self):
+        counts = count_kmers('AAAA', 2)
+        assert counts.shape == (16,)
+        assert counts[0] == 3
+        assert counts.sum() == 3
+
+    def test_count_kmers_hashed(self):
+        sequence = 'ACGTACGTACGTA'
+        counts = count_kmers(sequence, 12)
+        assert counts == Counter({'ACGTACGTACGT': 1, 'CGTACGTACGTA': 1})
+
+    def test_sequence_methods(self):
+        seq = NuclSequence('test', 'ATGCC', 'desc')
+        rev = seq.reverse_complement()
+        assert isinstance(rev, NuclSequence)
+        assert rev.sequence == 'GGCAT'
+        assert rev.description == 'desc'
+        assert seq.gc_content() == 0.6
+        assert seq.count_kmers(1).tolist() == [1, 2, 1, 1]
+        assert seq.pack().count_kmers(1).tolist() == [1, 2, 1, 1]
+
+
+class TestNucleotideBatch:
+    """Unit tests for batch versions
+    """
+    def setup(self):
+        self.seqs = [NuclSequence('a', 'GGCC'), NuclSequence('b', 'AT-N')]
+        self.aln = NuclAlignment('aln')
+        for seq in self.seqs:
+            self.aln.add_sequence_obj(seq)
+
+    def test_batch_reverse_complement(self):
+        assert batch_reverse_complement(self.seqs) == ['GGCC', 'N-AT']
+        assert batch_reverse_complement(self.aln) == ['GGCC', 'N-AT']
+
+    def test_batch_gc_content(self):
+        collection = SequenceCollection.from_sequences(self.seqs)
+        for records in (self.seqs, self.aln, collection):
+            gc = batch_gc_content(records)
+            assert np.array_equal(gc, [1.0, 0.0])
+
+    def test_batch_count_kmers(self):
+        counts = batch_count_kmers(self.aln, 2)
+        assert counts.shape == (2, 16)
+        assert counts[0].sum() == 3
+        assert counts[1].sum() == 1
+        counters = batch_count_kmers(self.seqs, 11)
+        assert counters == [Counter(), Counter()]
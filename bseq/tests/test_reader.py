@@ -2,7 +2,9 @@
 """Nose tests for reader functions.
 """
 import tempfile
-from bseq.reader import read_fasta_file, read_fasta_alignment
+from bseq.reader import read_fasta_file, read_fasta_alignment, \
+    iter_fasta, iter_fasta_alignment, _split_ranges, \
+    read_phylip_alignment, read_clustal_alignment, read_stockholm_alignment
 
 class TestReadFastaFile:
     """Unit tests for read_fasta_file
@@ -27,6 +29,50 @@ class TestReadFastaFile:
         seq_list = read_fasta_file(self.path)
         assert len(seq_list) == 2
 
+class TestIterFasta:
+    """Unit tests for iter_fasta
+    """
+    def setup(self):
+        self.fp = tempfile.NamedTemporaryFile(mode='w+')
+        lines = ['>Test1 This is a description',
+                 'ATGCATGCATGCAAA',
+                 'ATGCATGCATGCAAA',
+                 '>Test2',
+                 'CATGCATGCAAATTT',
+                 '',
+                 '>Test3 Short',
+                 'CATG']
+        self.fp.write('\n'.join(lines))
+        self.fp.seek(0)
+        self.path = self.fp.name
+
+    def teardown(self):
+        self.fp.close()
+
+    def test_iter_fasta(self):
+        seqs = iter_fasta(self.path)
+        seq = next(seqs)
+        assert seq.name == 'Test1'
+        assert seq.description == 'This is a description'
+        assert seq.sequence == 'ATGCATGCATGCAAA' * 2
+        assert seq.seq_type == 'nucleotide'
+        assert [s.name for s in seqs] == ['Test2', 'Test3']
+
+    def test_small_chunks(self):
+        seqs = list(iter_fasta(self.path, seq_type='protein', chunk_size=3))
+        assert [s.sequence for s in seqs] == \
+            ['ATGCATGCATGCAAA' * 2, 'CATGCATGCAAATTT', 'CATG']
+        assert seqs[1].description is None
+        assert seqs[2].seq_type == 'protein'
+
+    def test_iter_fasta_alignment(self):
+        try:
+            list(iter_fasta_alignment(self.path))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('unequal sequence lengths not detected')
+
 class TestReadFastaAlignment:
     """Unit tests for read_fasta_file
     """
@@ -50,3 +96,184 @@ class TestReadFastaAlignment:
         seq_list = read_fasta_alignment(self.path)
         assert len(seq_list) == 30
 
+
+    def test_read_fasta_alignment_records(self):
+        aln = read_fasta_alignment(self.path, name='test')
+        assert aln.name == 'test'
+        assert aln._aln_matrix.shape == (2, 30)  # pylint: disable=W0212
+        assert ''.join(aln['Test2']) == 'CATGCATGCAAATTT' * 2
+        assert aln._records[0].description == 'This is a description'  # pylint: disable=W0212
+
+    def test_unequal_lengths(self):
+        self.fp.seek(0, 2)
+        self.fp.write('>Test3\nCATG\n')
+        self.fp.flush()
+        try:
+            read_fasta_alignment(self.path)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('unequal sequence lengths not detected')
+
+    def test_text_before_first_record(self):
+        with tempfile.NamedTemporaryFile(mode='w+') as fp:
+            fp.write('ATGC\n' + self.fp.read())
+            fp.flush()
+            try:
+                read_fasta_alignment(fp.name)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError('text before the first record '
+                                     'not detected')
+
+class TestParallelRead:
+    """Unit tests for parsing FASTA files with worker processes
+    """
+    def setup(self):
+        self.fp = tempfile.NamedTemporaryFile(mode='w+')
+        lines = []
+        for i in range(50):
+            lines += ['>Test{} Description {}'.format(i, i),
+                      'ATGCATGCATGCAAA',
+                      'CATGCATGCAAA{:03d}'.format(i)]
+        self.fp.write('\n'.join(lines) + '\n')
+        self.fp.flush()
+        self.path = self.fp.name
+
+    def teardown(self):
+        self.fp.close()
+
+    def test_split_ranges(self):
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        ranges = _split_ranges(data, 8)
+        assert len(ranges) == 8
+        assert ranges[0][0] == 0
+        assert ranges[-1][1] == len(data)
+        for (_, end), (start, _) in zip(ranges[:-1], ranges[1:]):
+            assert end == start
+            assert data[start:start+1] == b'>'
+
+    def test_read_fasta_file(self):
+        serial = read_fasta_file(self.path)
+        parallel = read_fasta_file(self.path, workers=2)
+        assert [(s.name, s.description, s.sequence) for s in serial] == \
+            [(s.name, s.description, s.sequence) for s in parallel]
+
+    def test_iter_fasta_unordered(self):
+        names = sorted(s.name for s in iter_fasta(self.path, workers=2,
+                                                  ordered=False))
+        assert names == sorted('Test{}'.format(i) for i in range(50))
+
+    def test_read_fasta_alignment(self):
+        serial = read_fasta_alignment(self.path)
+        parallel = read_fasta_alignment(self.path, workers=3)
+        assert (serial.i == parallel.i).all()
+        assert serial._records == parallel._records  # pylint: disable=W0212
+
+    def test_text_before_first_record(self):
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        with tempfile.NamedTemporaryFile(mode='w+b') as fp:
+            fp.write(b'ATGC\n' + data)
+            fp.flush()
+            readers = [lambda: read_fasta_file(fp.name, workers=2),
+                       lambda: read_fasta_alignment(fp.name, workers=3)]
+            for reader in readers:
+                try:
+                    reader()
+                except ValueError:
+                    pass
+                else:
+                    raise AssertionError('text before the first record '
+                                         'not detected')
+
+
+class TestReadOtherAlignments:
+    """Unit tests for read_phylip_alignment, read_clustal_alignment and
+    read_stockholm_alignment
+    """
+    def setup(self):
+        self.fp = tempfile.NamedTemporaryFile(mode='w+')
+        self.path = self.fp.name
+
+    def teardown(self):
+        self.fp.close()
+
+    def write(self, lines):
+        self.fp.write('\n'.join(lines) + '\n')
+        self.fp.flush()
+
+    def check(self, aln):
+        assert [r.name for r in aln._records] == ['Test1', 'Test2']  # pylint: disable=W0212
+        assert ''.join(aln['Test1']) == 'ATGCATGCATGCAAA-'
+        assert ''.join(aln['Test2']) == 'CATGCATGCAAATTTG'
+
+    def test_read_phylip_interleaved(self):
+        self.write([' 2 16',
+                    'Test1 ATGCA TGCAT',
+                    'Test2 CATGC ATGCA',
+                    '',
+                    'GCAAA-',
+                    'AATTTG'])
+        self.check(read_phylip_alignment(self.path))
+
+    def test_read_phylip_sequential(self):
+        self.write(['2 16',
+                    'Test1     ATGCATGCAT',
+                    'GCAAA-',
+                    'Test2     CATGCATGCA',
+                    'AATTTG'])
+        self.check(read_phylip_alignment(self.path, interleaved=False,
+                                         strict=True))
+
+    def test_read_phylip_sequential_name_line(self):
+        # Names on their own line, followed by the residues
+        self.write(['2 16',
+                    'Test1',
+                    'ATGCATGCAT',
+                    'GCAAA-',
+                    'Test2 CATGCATGCA',
+                    'AATTTG'])
+        self.check(read_phylip_alignment(self.path, interleaved=False))
+
+    def test_read_phylip_wrong_length(self):
+        self.write(['2 15',
+                    'Test1 ATGCATGCATGCAAA-',
+                    'Test2 CATGCATGCAAATTTG'])
+        try:
+            read_phylip_alignment(self.path)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('wrong alignment length not detected')
+
+    def test_read_clustal(self):
+        self.write(['CLUSTAL W (1.83) multiple sequence alignment',
+                    '',
+                    'Test1      ATGCATGCAT 10',
+                    'Test2      CATGCATGCA 10',
+                    '           *  ** ',
+                    '',
+                    'Test1      GCAAA- 15',
+                    'Test2      AATTTG 16',
+                    ''])
+        self.check(read_clustal_alignment(self.path))
+
+    def test_read_stockholm(self):
+        self.write(['# STOCKHOLM 1.0',
+                    '#=GF ID test',
+                    '#=GS Test1 DE First sequence',
+                    '',
+                    'Test1 ATGCATGCAT',
+                    'Test2 CATGCATGCA',
+                    '#=GC SS_cons ..........',
+                    '',
+                    'Test1 GCAAA-',
+                    'Test2 AATTTG',
+                    '//'])
+        aln = read_stockholm_alignment(self.path)
+        self.check(aln)
+        assert aln._records[0].description == 'First sequence'  # pylint: disable=W0212
+        assert aln._records[1].description is None  # pylint: disable=W0212
@@ -1,7 +1,12 @@
 # -*- coding: utf-8 -*-
 """Nose tests for Sequence and its subclasses.
 """
-from bseq.sequence import Sequence, NuclSequence, ProtSequence, CodonSequence
+import copy
+import pickle
+import numpy as np
+from bseq.sequence import Sequence, NuclSequence, ProtSequence, CodonSequence, \
+    PackedNuclSequence, SequenceView, NuclSequenceView, ProtSequenceView, \
+    CodonSequenceView
 
 
 class TestSequence:
@@ -72,6 +77,17 @@ class TestSequence:
         assert counter['C'] == 3
         assert counter['G'] == 3
 
+    def test_i(self):
+        codes = self.seq.i
+        assert codes.dtype == np.uint8
+        assert codes.tobytes() == b'ATGCATGCATGCAAA'
+        assert not codes.flags.writeable
+        # Created once and reused
+        assert self.seq.i is codes
+        assert self.seq.chars.dtype == np.dtype('S1')
+        assert self.seq.chars[1] == b'T'
+        assert np.shares_memory(self.seq.chars, codes)
+
 
 class TestNuclSequence:
     """Unit test for NuclSequence.
@@ -209,6 +225,13 @@ class TestCodonSequence:
         assert 'ATGCATGCATGCAAA' in self.seq
         assert 'ATGCGG' not in self.seq
 
+    def test_iter(self):
+        assert list(self.seq) == ['ATG', 'CAT', 'GCA', 'TGC', 'AAA']
+        # The trailing partial codon is not a codon
+        seq = CodonSequence('test', 'ATGCATGC')
+        assert list(seq) == ['ATG', 'CAT']
+        assert len(list(seq)) == len(seq)
+
     def test_str(self):
         assert str(self.seq) == 'ATG CAT GCA TGC AAA', print(str(self.seq))
 
@@ -227,3 +250,230 @@ class TestCodonSequence:
         assert counter['GCA'] == 1
         assert counter['TGC'] == 1
         assert counter['AAA'] == 1
+
+    def test_negative_index(self):
+        assert self.seq[-2] == 'TGC'
+        assert self.seq[-5] == 'ATG'
+        try:
+            self.seq[5]
+        except IndexError:
+            pass
+        else:
+            raise AssertionError('IndexError not raised')
+
+    def test_slice_step(self):
+        assert self.seq[:] == 'ATGCATGCATGCAAA'
+        assert self.seq[::2] == 'ATGGCAAAA'
+
+    def test_codon_codes(self):
+        # TCAG order: TTT is 0, GGG is 63
+        seq = CodonSequence('codes', 'TTTGGGATG---ATGNNA')
+        assert list(seq.codon_codes) == [0, 63, 35, 64, 35, 64]
+        assert seq.codon_matrix.shape == (6, 3)
+        # Computed once and kept with the views
+        assert seq.codon_codes is seq.codon_codes
+        assert not seq.codon_codes.flags.writeable
+        assert seq.view(2, 5).codon_codes.tolist() == [35, 64, 35]
+        assert copy.copy(seq).codon_codes.tolist() == \
+            seq.codon_codes.tolist()
+
+    def test_count_codon_gaps(self):
+        seq = CodonSequence('gaps', 'ATG---ATGNNAAT')
+        assert seq.count_codon('ATG') == 2
+        assert seq.count_codon('---') == 1
+        counter = seq.count_codon_all()
+        assert counter == {'ATG': 2, '---': 1, 'NNA': 1}
+
+    def test_i(self):
+        assert self.seq.i.shape == (5, 3)
+        assert self.seq.i[1].tobytes() == b'CAT'
+        assert self.seq.i is self.seq.i
+        assert self.seq.chars[4, 2] == b'A'
+        assert CodonSequence('partial', 'ATGCA').i.shape == (1, 3)
+
+class TestPackedNuclSequence:
+    """Unit test for PackedNuclSequence.
+
+    PackedNuclSequence is a subclass of NuclSequence.
+    """
+    def setup(self):
+        self.seq = NuclSequence('test', 'ATGCATGCATGCAAA').pack()
+        self.ambiguous = PackedNuclSequence('test', 'ATGCNNRY-A')
+
+    def test_bits(self):
+        assert self.seq.bits == 2
+        assert self.seq.nbytes == 4
+        assert self.ambiguous.bits == 4
+        assert self.ambiguous.nbytes == 5
+
+    def test_invalid(self):
+        try:
+            PackedNuclSequence('test', 'ATGCX')
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('invalid character not detected')
+
+    def test_soft_masked(self):
+        seq = PackedNuclSequence('test', 'ACGTacgtnnACgt')
+        assert seq.bits == 4
+        assert seq.sequence == 'ACGTacgtnnACgt'
+        assert seq[3:9] == 'Tacgtn'
+        assert seq[-3] == 'C'
+        assert seq.count('a') == 1 and seq.count('A') == 2
+        assert seq.count_all() == NuclSequence(
+            'test', 'ACGTacgtnnACgt').count_all()
+        assert PackedNuclSequence('test', 'acgtACGT').bits == 2
+
+    def test_rna(self):
+        seq = NuclSequence('test', 'ACGUuuGCA').pack()
+        assert seq.bits == 2
+        assert seq.sequence == 'ACGUuuGCA'
+        assert seq.count('U') == 1 and seq.count('T') == 0
+        assert list(seq)[3:6] == ['U', 'u', 'u']
+        try:
+            PackedNuclSequence('test', 'ACGTU')
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('mixed T and U not detected')
+
+    def test_len(self):
+        assert len(self.seq) == 15
+        assert len(self.ambiguous) == 10
+
+    def test_getitem(self):
+        assert self.seq[0] == 'A'
+        assert self.seq[4] == 'A'
+        assert self.seq[-1] == 'A'
+        assert self.seq[3:] == 'CATGCATGCAAA'
+        assert self.seq[-4:-1] == 'CAA'
+        assert self.seq[::5] == 'ATG'
+        assert self.ambiguous[4:9] == 'NNRY-'
+
+    def test_str(self):
+        assert str(self.seq) == 'ATGCATGCATGCAAA'
+        assert ''.join(self.ambiguous) == 'ATGCNNRY-A'
+
+    def test_count(self):
+        assert self.seq.count('A') == 6
+        assert self.seq.count('N') == 0
+        assert self.seq.count('GCA') == 3
+        assert self.ambiguous.count('N') == 2
+
+    def test_count_all(self):
+        assert self.seq.count_all() == NuclSequence(
+            'test', 'ATGCATGCATGCAAA').count_all()
+        assert self.ambiguous.count_all()['-'] == 1
+
+    def test_fasta_format(self):
+        assert self.seq.fasta_format(line_width=6) == \
+            '>test\nATGCAT\nGCATGC\nAAA\n'
+
+    def test_copy_pickle(self):
+        for seq in [self.seq, self.ambiguous]:
+            for other in [copy.copy(seq), copy.deepcopy(seq),
+                          pickle.loads(pickle.dumps(seq))]:
+                assert isinstance(other, PackedNuclSequence)
+                assert other.name == 'test'
+                assert other.bits == seq.bits
+                assert other.sequence == seq.sequence
+
+
+class TestSequenceView:
+    """Unit test for SequenceView and its subclasses.
+    """
+    def setup(self):
+        self.seq = NuclSequence('test', 'ATGCATGCATGCAAA', 'desc')
+
+    def test_view(self):
+        view = self.seq.view(2, 10)
+        assert isinstance(view, NuclSequenceView)
+        assert view.sequence == 'GCATGCAT'
+        assert len(view) == 8
+        assert (view.name, view.description) == ('test', 'desc')
+        assert (view.parent, view.start, view.stop) == (self.seq, 2, 10)
+        assert np.shares_memory(view.i, self.seq.i)
+
+    def test_sequence_api(self):
+        view = self.seq.view(2, 10)
+        assert view.count('A') == 2
+        assert view.count('GC') == 2
+        assert view.count_all() == {'G': 2, 'C': 2, 'A': 2, 'T': 2}
+        assert view.fasta_format() == '>test desc\nGCATGCAT\n'
+        assert ''.join(view) == 'GCATGCAT'
+        assert view[0] == 'G'
+        assert view[-1] == 'T'
+        assert 'CATG' in view
+        assert view.reverse_complement().sequence == 'ATGCATGC'
+
+    def test_no_decoding(self):
+        # Indexing, iteration and counting do not decode the whole view
+        class StrictView(NuclSequenceView):
+            __slots__ = ()
+
+            @property
+            def _sequence(self):
+                raise AssertionError('view was decoded')
+
+        view = StrictView(self.seq, 2, 10)
+        assert view[1] == 'C'
+        assert view[1:4] == 'CAT'
+        assert view[::3] == 'GTA'
+        assert list(view) == list('GCATGCAT')
+        assert 'TGC' in view and 'A' in view and 'N' not in view
+        assert view.count('GC') == 2
+        try:
+            view[8]
+        except IndexError:
+            pass
+        else:
+            raise AssertionError('index out of range was accepted')
+
+    def test_nested_view(self):
+        view = self.seq.view(2, 10).view(1, -1, name='inner')
+        assert view.name == 'inner'
+        assert view.sequence == 'CATGCA'
+        assert view.parent is self.seq
+        assert (view.start, view.stop) == (3, 9)
+
+    def test_view_bounds(self):
+        assert self.seq.view(-3).sequence == 'AAA'
+        assert self.seq.view(10, 5).sequence == ''
+        assert self.seq.pack().view(0, 4).sequence == 'ATGC'
+
+    def test_codon_view(self):
+        seq = CodonSequence('test', 'ATGAAACCCGGGTAA')
+        view = seq.view(1, 4)
+        assert isinstance(view, CodonSequenceView)
+        assert (view.start, view.stop) == (3, 12)
+        assert len(view) == 3
+        assert view[0] == 'AAA'
+        assert view[-1] == 'GGG'
+        assert str(view) == 'AAA CCC GGG'
+        assert view.count_codon('CCC') == 1
+        assert view.i.shape == (3, 3)
+        assert list(view) == ['AAA', 'CCC', 'GGG']
+        assert view[0:2] == 'AAACCC'
+        assert view[::2] == 'AAAGGG'
+
+    def test_slots(self):
+        view = self.seq.view(2, 10)
+        assert not hasattr(view, '__dict__')
+        assert isinstance(ProtSequence('p', 'MKV').view(1), ProtSequenceView)
+        assert isinstance(Sequence('s', 'ABC').view(1), SequenceView)
+
+    def test_copy_pickle(self):
+        views = [Sequence('s', 'ABCD').view(1, 3),
+                 self.seq.view(2, 10, name='part'),
+                 ProtSequence('p', 'MKVL').view(1),
+                 CodonSequence('c', 'ATGAAACCC').view(1, 3),
+                 self.seq.pack().view(1, 4)]
+        for view in views:
+            for other in [copy.copy(view), copy.deepcopy(view),
+                          pickle.loads(pickle.dumps(view))]:
+                assert type(other) is type(view)
+                assert other.name == view.name
+                assert other.description == view.description
+                assert (other.start, other.stop) == (view.start, view.stop)
+                assert other.sequence == view.sequence
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""Nose tests for codon translation.
+"""
+from bseq.sequence import CodonSequence, ProtSequence
+from bseq.alignment import CodonAlignment, ProtAlignment
+from bseq.translate import GENETIC_CODES, translate_sequence, \
+    translate_alignment
+
+
+class TestTranslateSequence:
+    """Unit tests for translate_sequence
+    """
+    def test_tables(self):
+        for _, amino_acids in GENETIC_CODES.values():
+            assert len(amino_acids) == 64
+
+    def test_standard(self):
+        seq = CodonSequence('test', 'ATGGCATGGTAA', 'desc')
+        prot = translate_sequence(seq)
+        assert isinstance(prot, ProtSequence)
+        assert prot.name == 'test'
+        assert prot.description == 'desc'
+        assert prot.sequence == 'MAW*'
+
+    def test_table(self):
+        seq = CodonSequence('test', 'ATGTGAAGAATA')
+        assert translate_sequence(seq).sequence == 'M*RI'
+        assert translate_sequence(seq, table=2).sequence == 'MW*M'
+        try:
+            translate_sequence(seq, table=7)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('ValueError not raised')
+
+    def test_gaps_and_ambiguity(self):
+        # TAR is TAA or TAG, both stops. GCN is always alanine.
+        seq = CodonSequence('test', 'TARGCN---NNNAT-RAYauguuu')
+        assert translate_sequence(seq).sequence == '*A-XXXMF'
+
+    def test_incomplete_codon(self):
+        seq = CodonSequence('test', 'ATGGC')
+        assert translate_sequence(seq).sequence == 'M'
+
+
+class TestTranslateAlignment:
+    """Unit tests for translate_alignment
+    """
+    def setup(self):
+        self.aln = CodonAlignment('aln', 'codon alignment')
+        self.aln.add_sequence('seq1', 'ATGAAA---TGA', 'codon',
+                              description='first')
+        self.aln.add_sequence('seq2', 'ATGAARGGGTAA', 'codon')
+
+    def test_translate(self):
+        prot_aln = translate_alignment(self.aln)
+        assert isinstance(prot_aln, ProtAlignment)
+        assert prot_aln.name == 'aln'
+        assert prot_aln.description == 'codon alignment'
+        assert ''.join(prot_aln['seq1']) == 'MK-*'
+        assert prot_aln._records[0].description == 'first'  # pylint: disable=W0212
+        assert prot_aln._records[1].seq_type == 'protein'  # pylint: disable=W0212
+        assert ''.join(prot_aln['seq2']) == 'MKG*'
+
+    def test_empty(self):
+        prot_aln = translate_alignment(CodonAlignment('empty'))
+        assert len(prot_aln) == 0  # pylint: disable=C1801
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Nose tests for writer functions.
+"""
+import gzip
+import io
+import os
+import tempfile
+from bseq.sequence import NuclSequence
+from bseq.alignment import NuclAlignment
+from bseq.reader import read_fasta_file
+from bseq.writer import write_fasta
+
+
+class TestWriteFasta:
+    """Unit tests for write_fasta
+    """
+    def setup(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.seqs = [NuclSequence('Test1', 'ATGCATGCATGCAAA',
+                                  description='This is a description'),
+                     NuclSequence('Test2', 'CATGCATGCAAATTT')]
+        self.aln = NuclAlignment('test')
+        for seq in self.seqs:
+            self.aln.add_sequence_obj(seq)
+
+    def teardown(self):
+        self.dir.cleanup()
+
+    def test_write_sequences(self):
+        buffer = io.BytesIO()
+        assert write_fasta(buffer, self.seqs, line_width=6) == 2
+        assert buffer.getvalue() == \
+            b'>Test1 This is a description\nATGCAT\nGCATGC\nAAA\n' \
+            b'>Test2\nCATGCA\nTGCAAA\nTTT\n'
+
+    def test_write_alignment(self):
+        buffer = io.StringIO()
+        write_fasta(buffer, self.aln, line_width=5)
+        assert buffer.getvalue() == \
+            '>Test1 This is a description\nATGCA\nTGCAT\nGCAAA\n' \
+            '>Test2\nCATGC\nATGCA\nAATTT\n'
+        assert self.aln.fasta_format() == \
+            ''.join(seq.fasta_format() for seq in self.seqs)
+
+    def test_write_gzip(self):
+        path = os.path.join(self.dir.name, 'test.fasta.gz')
+        write_fasta(path, self.aln)
+        with gzip.open(path, 'rt') as f:
+            assert f.read() == ''.join(seq.fasta_format()
+                                       for seq in self.seqs)
+        seq_list = read_fasta_file(path)
+        assert [s.sequence for s in seq_list] == \
+            [s.sequence for s in self.seqs]
+
+    def test_write_named_temporary_file(self):
+        # Text-mode wrappers are not TextIOBase instances
+        expected = ''.join(seq.fasta_format() for seq in self.seqs)
+        for mode in ['w+', 'w+b']:
+            with tempfile.NamedTemporaryFile(mode, dir=self.dir.name) as f:
+                assert write_fasta(f, self.seqs) == 2
+                f.seek(0)
+                content = f.read()
+            if 'b' in mode:
+                content = content.decode()
+            assert content == expected
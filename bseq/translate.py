@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""Translation of coding sequences and alignments to protein.
+
+Codons are converted to integer codes from 0 to 63 in TCAG order, the row
+order of the NCBI genetic code tables, so that a whole sequence or a
+whole alignment matrix is translated with a single lookup into a
+64-entry array of amino acids.
+
+Codons made only of gaps are translated to a gap. Codons containing
+ambiguous IUPAC bases are translated to the amino acid shared by all the
+codons they may represent, or to 'X' if these codons code for different
+amino acids. Any other codon is translated to 'X'.
+
+"""
+from itertools import product
+import numpy as np
+from bseq.sequence import ProtSequence, _codon_codes, _CODON_SENTINEL
+from bseq.alignment import ProtAlignment, SequenceAnnotation
+from bseq.writer import _as_byte_matrix
+
+
+# NCBI genetic code tables. Amino acids are listed in TCAG codon order,
+# from TTT to GGG.
+GENETIC_CODES = {
+    1: ('Standard',
+        'FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG'),
+    2: ('Vertebrate Mitochondrial',
+        'FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNKKSS**VVVVAAAADDEEGGGG'),
+    3: ('Yeast Mitochondrial',
+        'FFLLSSSSYY**CCWWTTTTPPPPHHQQRRRRIIMMTTTTNNKKSSRRVVVVAAAADDEEGGGG'),
+    4: ('Mold, Protozoan, and Coelenterate Mitochondrial and '
+        'Mycoplasma/Spiroplasma',
+        'FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG'),
+    5: ('Invertebrate Mitochondrial',
+        'FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNKKSSSSVVVVAAAADDEEGGGG'),
+    6: ('Ciliate, Dasycladacean and Hexamita Nuclear',
+        'FFLLSSSSYYQQCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG'),
+    9: ('Echinoderm and Flatworm Mitochondrial',
+        'FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNNKSSSSVVVVAAAADDEEGGGG'),
+    10: ('Euplotid Nuclear',
+         'FFLLSSSSYY**CCCWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG'),
+    11: ('Bacterial, Archaeal and Plant Plastid',
+         'FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG'),
+    12: ('Alternative Yeast Nuclear',
+         'FFLLSSSSYY**CC*WLLLSPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG'),
+    13: ('Ascidian Mitochondrial',
+         'FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNKKSSGGVVVVAAAADDEEGGGG'),
+    14: ('Alternative Flatworm Mitochondrial',
+         'FFLLSSSSYYY*CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNNKSSSSVVVVAAAADDEEGGGG'),
+    16: ('Chlorophycean Mitochondrial',
+         'FFLLSSSSYY*LCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG'),
+    21: ('Trematode Mitochondrial',
+         'FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNNKSSSSVVVVAAAADDEEGGGG'),
+    22: ('Scenedesmus obliquus Mitochondrial',
+         'FFLLSS*SYY*LCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG'),
+    23: ('Thraustochytrium Mitochondrial',
+         'FF*LSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG'),
+    24: ('Rhabdopleuridae Mitochondrial',
+         'FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSSKVVVVAAAADDEEGGGG'),
+    25: ('Candidate Division SR1 and Gracilibacteria',
+         'FFLLSSSSYY**CCGWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG'),
+}
+
+_BASES = 'TCAG'
+_IUPAC_BASES = {
+    'T': 'T', 'C': 'C', 'A': 'A', 'G': 'G', 'U': 'T',
+    'R': 'AG', 'Y': 'CT', 'S': 'CG', 'W': 'AT', 'K': 'GT', 'M': 'AC',
+    'B': 'CGT', 'D': 'AGT', 'H': 'ACT', 'V': 'ACG', 'N': 'ACGT',
+}
+
+# Maps character codes to base numbers in TCAG order. Lowercase bases and
+# U are accepted.
+_BASE_CODES = np.full(256, _CODON_SENTINEL, dtype=np.uint8)
+for _i, _base in enumerate(_BASES):
+    _BASE_CODES[ord(_base)] = _BASE_CODES[ord(_base.lower())] = _i
+_BASE_CODES[ord('U')] = _BASE_CODES[ord('u')] = 0
+
+
+def _lookup_table(table):
+    """Returns the 65-entry array of amino acid character codes of a genetic
+    code table. The last entry is used for codons that are not made of
+    T, C, A and G.
+    """
+    if table not in GENETIC_CODES:
+        raise ValueError('unknown genetic code table {}.'.format(table))
+    amino_acids = GENETIC_CODES[table][1] + 'X'
+    return np.frombuffer(amino_acids.encode(), dtype=np.uint8)
+
+
+def _translate_other(codon, amino_acids):
+    """Translates a codon containing gaps or ambiguous bases.
+    """
+    if codon == '---':
+        return '-'
+    try:
+        choices = [_IUPAC_BASES[base] for base in codon.upper()]
+    except KeyError:
+        return 'X'
+    translated = {amino_acids[_BASES.index(a)*16 + _BASES.index(b)*4 +
+                              _BASES.index(c)]
+                  for a, b, c in product(*choices)}
+    return translated.pop() if len(translated) == 1 else 'X'
+
+
+def translate_codes(codons, table=1):
+    """Translates an array of codons to amino acids.
+
+    Parameters
+    ----------
+    codons : numpy.ndarray
+        (n_codons, 3) array of uint8 character codes.
+    table : int, optional
+        NCBI genetic code table number. Defaults to the standard code.
+
+    Returns
+    -------
+    numpy.ndarray
+        uint8 array of amino acid character codes of length `n_codons`.
+
+    """
+    lookup = _lookup_table(table)
+    codes = _codon_codes(codons, base_codes=_BASE_CODES)
+    translated = lookup[codes]
+    other = codes == _CODON_SENTINEL
+    if other.any():
+        # Each distinct codon that is not made of T, C, A and G is
+        # translated once
+        rows = codons[other].astype(np.uint32)
+        keys = (rows[:, 0] << 16) | (rows[:, 1] << 8) | rows[:, 2]
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        amino_acids = GENETIC_CODES[table][1]
+        resolved = np.array(
+            [ord(_translate_other(bytes([k >> 16, (k >> 8) & 255, k & 255])
+                                  .decode('latin-1'), amino_acids))
+             for k in unique_keys.tolist()], dtype=np.uint8)
+        translated[other] = resolved[inverse.reshape(-1)]
+    return translated
+
+
+def translate_sequence(seq_obj, table=1):
+    """Translates a coding sequence to a protein sequence.
+
+    A trailing incomplete codon is ignored.
+
+    Parameters
+    ----------
+    seq_obj : CodonSequence or NuclSequence
+        Coding sequence to translate.
+    table : int, optional
+        NCBI genetic code table number. Defaults to the standard code.
+
+    Returns
+    -------
+    ProtSequence
+        Protein sequence with the same name and description.
+
+    """
+    codes = seq_obj._codes()  # pylint: disable=protected-access
+    n_codons = len(codes) // 3
+    codons = codes[:n_codons*3].reshape(n_codons, 3)
+    protein = translate_codes(codons, table=table).tobytes().decode()
+    return ProtSequence(seq_obj.name, protein, seq_obj.description)
+
+
+def translate_alignment(aln, table=1):
+    """Translates a codon alignment to a protein alignment.
+
+    The whole alignment matrix is translated at once. Markers are not
+    carried over to the protein alignment.
+
+    Parameters
+    ----------
+    aln : CodonAlignment
+        Alignment of coding sequences. Its length in nucleotides should
+        be a multiple of 3.
+    table : int, optional
+        NCBI genetic code table number. Defaults to the standard code.
+
+    Returns
+    -------
+    ProtAlignment
+        Protein alignment with the same name, description, and sequence
+        names and descriptions as the codon alignment.
+
+    """
+    # pylint: disable=protected-access
+    prot_aln = ProtAlignment(aln.name, aln.description)
+    if not aln._records:
+        return prot_aln
+    matrix = _as_byte_matrix(aln._aln_matrix)
+    n_rows = matrix.shape[0]
+    n_codons = matrix.shape[1] // 3
+    codons = np.ascontiguousarray(matrix[:, :n_codons*3]).reshape(-1, 3)
+    protein = translate_codes(codons, table=table).reshape(n_rows, n_codons)
+    prot_aln._records = [SequenceAnnotation(r.name, r.description, 'protein')
+                         for r in aln._records]
+    prot_aln._records_lookup_d = dict(aln._records_lookup_d)
+    prot_aln._aln_matrix = protein
+    return prot_aln
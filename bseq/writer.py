@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""Helper functions for writing files.
+"""
+import gzip
+import io
+import numpy as np
+
+
+# Buffer size of files opened by the writer functions.
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+
+def _as_byte_matrix(matrix):
+    """Returns the alignment matrix as an array of uint8 character codes.
+    """
+    matrix = np.asarray(matrix)
+    if matrix.dtype.kind == 'U':
+        return matrix.view(np.uint32).astype(np.uint8)
+    if matrix.dtype.kind == 'S':
+        return matrix.view(np.uint8)
+    return matrix.astype(np.uint8, copy=False)
+
+
+def _wrapped_lines(codes, line_width=None):
+    """Returns the characters as lines of at most `line_width` characters,
+    each terminated by a newline.
+
+    Full lines are produced by reshaping the characters into a matrix
+    with one line per row and appending a column of newlines.
+
+    Parameters
+    ----------
+    codes : numpy.ndarray
+        One-dimensional array of uint8 character codes.
+    line_width : int, optional
+        Number of characters per line. If None, all characters are written
+        on a single line.
+
+    Returns
+    -------
+    bytes
+
+    """
+    if not line_width or len(codes) <= line_width:
+        return codes.tobytes() + b'\n'
+    n_full = len(codes) // line_width
+    lines = np.empty((n_full, line_width + 1), dtype=np.uint8)
+    lines[:, :line_width] = codes[:n_full*line_width].reshape(n_full,
+                                                              line_width)
+    lines[:, line_width] = ord('\n')
+    rest = codes[n_full*line_width:]
+    if not len(rest):
+        return lines.tobytes()
+    return lines.tobytes() + rest.tobytes() + b'\n'
+
+
+def _header_line(name, description=None):
+    if description:
+        return '>{} {}\n'.format(name, description).encode()
+    return '>{}\n'.format(name).encode()
+
+
+def _iter_fasta_bytes(records, line_width=None):
+    """Yields the FASTA-formatted identifier line and sequence lines of
+    each record of an Alignment or an iterable of Sequence objects.
+    """
+    if hasattr(records, '_aln_matrix'):
+        matrix = records._aln_matrix  # pylint: disable=protected-access
+        for i, record in enumerate(records._records):  # pylint: disable=protected-access
+            yield (_header_line(record.name, record.description),
+                   _wrapped_lines(_as_byte_matrix(matrix[i]), line_width))
+        return
+    for seq_obj in records:
+        # Packed sequences are unpacked straight into character codes
+        codes = seq_obj._codes()  # pylint: disable=protected-access
+        yield (_header_line(seq_obj.name, seq_obj.description),
+               _wrapped_lines(codes, line_width))
+
+
+def _open_output(path, compress=None):
+    if compress is None and str(path).endswith('.gz'):
+        compress = 'gzip'
+    if compress == 'gzip':
+        return io.BufferedWriter(gzip.open(path, 'wb', compresslevel=6),
+                                 buffer_size=DEFAULT_BUFFER_SIZE)
+    if compress is not None:
+        raise ValueError('compress must be None or "gzip".')
+    return open(path, 'wb', buffering=DEFAULT_BUFFER_SIZE)
+
+
+def write_fasta(handle_or_path, records, line_width=None, compress=None):
+    """Writes sequences or an alignment to a file in the FASTA format.
+
+    Records are formatted one at a time and written directly to a buffered
+    file, so the whole FASTA text is never held in memory.
+
+    Parameters
+    ----------
+    handle_or_path : str or file object
+        Path to the output file, or an open file object. Binary file
+        objects are written to directly. Text file objects receive
+        decoded strings.
+    records : Alignment or iterable of Sequence objects
+        Sequences to write.
+    line_width : int, optional
+        Number of characters per line. By default, each sequence is written
+        on a single line.
+    compress : str, optional
+        Set to 'gzip' to compress the output. By default, output to a path
+        ending in '.gz' is compressed with gzip. Ignored when writing to
+        a file object.
+
+    Returns
+    -------
+    int
+        Number of records written.
+
+    """
+    if isinstance(handle_or_path, (str, bytes)) or \
+            hasattr(handle_or_path, '__fspath__'):
+        with _open_output(handle_or_path, compress=compress) as f:
+            return _write_fasta_handle(f, records, line_width)
+    return _write_fasta_handle(handle_or_path, records, line_width)
+
+
+def _is_text_handle(f):
+    """Returns True if a file object expects str rather than bytes.
+
+    Wrappers such as tempfile.NamedTemporaryFile are not TextIOBase
+    instances, so the mode of the handle is checked first. Some binary
+    handles, such as gzip.GzipFile, have a non-string mode.
+    """
+    mode = getattr(f, 'mode', None)
+    if isinstance(mode, str):
+        return 'b' not in mode
+    return isinstance(f, io.TextIOBase)
+
+
+def _write_fasta_handle(f, records, line_width):
+    text = _is_text_handle(f)
+    count = 0
+    for header, lines in _iter_fasta_bytes(records, line_width):
+        if text:
+            f.write(header.decode())
+            f.write(lines.decode())
+        else:
+            f.write(header)
+            f.write(lines)
+        count += 1
+    return count